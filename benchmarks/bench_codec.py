@@ -0,0 +1,35 @@
+"""
+Бенчмарк JSON кодеков на ответе /GetSales
+
+Запуск: python -m benchmarks.bench_codec [число продаж]
+"""
+
+import json
+import sys
+import timeit
+
+from benchmarks.payloads import make_sales_response
+from kit_api.codec import available_codecs, get_codec
+
+
+def best_of(func, repeat: int = 5) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main(count: int = 50_000) -> None:
+    response = make_sales_response(count)
+    body = json.dumps(response, ensure_ascii=False).encode()
+    print(f"Ответ /GetSales: {count} продаж, {len(body) / 1024 / 1024:.1f} МБ")
+
+    results = {}
+    for name in available_codecs():
+        codec = get_codec(name)
+        results[name] = best_of(lambda: codec.loads(body))
+        print(f"{name:>8}: разбор {results[name] * 1000:7.1f} мс")
+
+    fastest = min(results, key=results.get)
+    print(f"Ускорение {fastest} относительно json: x{results['json'] / results[fastest]:.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
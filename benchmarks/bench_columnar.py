@@ -0,0 +1,78 @@
+"""
+Бенчмарк колоночной таблицы и компактных записей продаж против коллекции моделей
+
+Запуск: python -m benchmarks.bench_columnar [число продаж]
+"""
+
+import json
+import sys
+import timeit
+import tracemalloc
+from collections import defaultdict
+
+from benchmarks.payloads import make_sales_response
+from kit_api.columnar import SalesTable
+from kit_api.models import SalesCollection
+from kit_api.records import SaleRecord, records_from_rows
+
+
+def best_of(func, repeat: int = 3) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def allocated(func) -> tuple[object, int]:
+    """Результат func и память, которую он удерживает"""
+    tracemalloc.start()
+    result = func()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def revenue_by_machine_models(sales: SalesCollection) -> dict:
+    result = defaultdict(float)
+    for sale in sales.items:
+        result[sale.vending_machine_id] += sale.price
+    return result
+
+
+def revenue_by_machine_records(records: list[SaleRecord]) -> dict:
+    result = defaultdict(float)
+    for sale in records:
+        result[sale.vending_machine_id] += sale.price
+    return result
+
+
+def revenue_by_machine_table(table: SalesTable) -> dict:
+    result = defaultdict(float)
+    for machine, price in zip(table.vending_machine_id, table.price):
+        result[machine] += price
+    return result
+
+
+def main(count: int = 50_000) -> None:
+    # Строки - из разобранного JSON, как в ответе API
+    rows = json.loads(json.dumps(make_sales_response(count)))["Sales"]
+    print(f"{count} продаж")
+
+    models, models_size = allocated(lambda: SalesCollection.model_validate({"Sales": rows}))
+    records, records_size = allocated(lambda: records_from_rows(rows))
+    table, table_size = allocated(lambda: SalesTable.from_rows(rows))
+    results = (
+        ("модели", models_size, lambda: SalesCollection.model_validate({"Sales": rows}),
+         lambda: revenue_by_machine_models(models)),
+        ("записи", records_size, lambda: records_from_rows(rows),
+         lambda: revenue_by_machine_records(records)),
+        ("таблица", table_size, lambda: SalesTable.from_rows(rows),
+         lambda: revenue_by_machine_table(table)),
+    )
+    for title, size, build, scan in results:
+        print(
+            f"  {title:>7}: память {size / 2**20:6.1f} МБ ({size / count:5.0f} Б на продажу), "
+            f"построение {best_of(build) * 1000:6.1f} мс, "
+            f"выручка по автоматам {best_of(scan) * 1000:5.1f} мс"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
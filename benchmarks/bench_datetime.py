@@ -0,0 +1,57 @@
+"""
+Бенчмарк разбора времени продаж Kit API
+
+Запуск: python -m benchmarks.bench_datetime [число продаж]
+"""
+
+import sys
+import timeit
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from benchmarks.payloads import make_sales_response
+from kit_api.models import SalesCollection
+from kit_api.project_time import ProjectTime, _parse_kit_datetime
+
+MOSCOW = ZoneInfo("Europe/Moscow")
+
+
+def best_of(func, repeat: int = 5) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def strptime_all(values: list[str]) -> None:
+    for value in values:
+        datetime.strptime(value, "%d.%m.%Y %H:%M:%S").replace(tzinfo=MOSCOW)
+
+
+def fast_all(values: list[str], cached: bool) -> None:
+    for value in values:
+        if not cached:
+            _parse_kit_datetime.cache_clear()
+        ProjectTime.datetime_from_str_kit(value)
+
+
+def main(count: int = 50_000) -> None:
+    sales = make_sales_response(count)["Sales"]
+    unique = [sale["DateTime"] for sale in sales]
+    # Время с точностью до минуты: повторяется в выгрузке по парку автоматов
+    repeated = [value[:-2] + "00" for value in unique]
+    print(f"{count} строк времени")
+
+    baseline = best_of(lambda: strptime_all(unique))
+    print(f"     strptime: {baseline * 1000:7.1f} мс")
+    for title, values, cached in (
+            ("без кэша", unique, False),
+            ("уникальные", unique, True),
+            ("повторы", repeated, True),
+    ):
+        elapsed = best_of(lambda: fast_all(values, cached))
+        print(f"{title:>13}: {elapsed * 1000:7.1f} мс (x{baseline / elapsed:.1f})")
+
+    elapsed = best_of(lambda: SalesCollection.model_validate({"Sales": sales}), repeat=3)
+    print(f"Валидация {count} продаж: {elapsed * 1000:.1f} мс")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
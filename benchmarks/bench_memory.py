@@ -0,0 +1,79 @@
+"""
+Бенчмарк памяти выгрузки продаж парка автоматов за месяц
+
+Каждое окно выгрузки разбирается из JSON отдельно, как ответ API; результат
+окон объединяется. Сравнивается удерживаемая память: модели без интернирования
+строк (валидация записей без SalesCollection), модели с интернированием
+(SalesCollection), компактные записи и колоночная таблица.
+
+Запуск: python -m benchmarks.bench_memory [автоматов] [продаж в сутки на автомат]
+"""
+
+import json
+import sys
+import tracemalloc
+
+from pydantic import TypeAdapter
+
+from benchmarks.payloads import make_sales_response
+from kit_api.columnar import SalesTable
+from kit_api.models import SalesCollection, SaleType
+from kit_api.records import records_from_rows
+
+DAYS = 30
+
+
+def make_windows(machines: int, daily: int) -> list[bytes]:
+    """Тела ответов /GetSales: одно окно - сутки по всем автоматам"""
+    sales = make_sales_response(machines * daily * DAYS, machines=machines)["Sales"]
+    size = machines * daily
+    return [
+        json.dumps({"ResultCode": 0, "Sales": sales[start:start + size]}).encode()
+        for start in range(0, len(sales), size)
+    ]
+
+
+def retained(windows: list[bytes], build) -> tuple[int, int]:
+    """Память, удерживаемая результатом выгрузки всех окон, и число продаж"""
+    tracemalloc.start()
+    result = []
+    for body in windows:
+        result.extend(build(json.loads(body)["Sales"]))
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, len(result)
+
+
+def main(machines: int = 50, daily: int = 100) -> None:
+    windows = make_windows(machines, daily)
+    print(f"{machines} автоматов x {daily} продаж в сутки x {DAYS} суток")
+
+    variants = (
+        ("модели без интернирования", TypeAdapter(list[SaleType]).validate_python),
+        ("модели", lambda rows: SalesCollection.model_validate({"Sales": rows}).items),
+        ("записи", records_from_rows),
+        ("таблица", lambda rows: SalesTable.from_rows(rows)),
+    )
+    baseline = None
+    for title, build in variants:
+        if title == "таблица":
+            # Таблица выгрузки одна: окна дописываются в неё
+            tracemalloc.start()
+            table = SalesTable()
+            for body in windows:
+                for row in json.loads(body)["Sales"]:
+                    table.append_row(row)
+            size, count = tracemalloc.get_traced_memory()[0], len(table)
+            tracemalloc.stop()
+        else:
+            size, count = retained(windows, build)
+        baseline = baseline or size
+        print(
+            f"  {title:>26}: {size / 2**20:7.1f} МБ, {size / count:5.0f} Б на продажу "
+            f"(x{baseline / size:.1f})"
+        )
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*args)
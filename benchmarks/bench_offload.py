@@ -0,0 +1,66 @@
+"""
+Бенчмарк задержки event loop при разборе большого ответа /GetSales
+в event loop, в пуле потоков и в пуле процессов
+
+Запуск: python -m benchmarks.bench_offload [число продаж]
+"""
+
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from benchmarks.payloads import make_sales_response
+from kit_api.client import _decode_and_validate
+from kit_api.codec import get_codec
+from kit_api.models import SalesCollection
+
+
+async def measure_lag(work) -> tuple[float, float]:
+    """Выполнить work и вернуть (время работы, максимальную задержку тиков event loop)"""
+    lag = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal lag
+        while not done:
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lag = max(lag, time.perf_counter() - started - 0.001)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    started = time.perf_counter()
+    await work()
+    elapsed = time.perf_counter() - started
+    done = True
+    await task
+    return elapsed, lag
+
+
+async def main(count: int) -> None:
+    codec = get_codec()
+    body = json.dumps(make_sales_response(count), ensure_ascii=False).encode()
+    print(f"Ответ /GetSales: {count} продаж, {len(body) / 1024 / 1024:.1f} МБ, кодек {codec.name}")
+    loop = asyncio.get_running_loop()
+
+    async def inline():
+        _decode_and_validate(codec, body, SalesCollection)
+
+    with ThreadPoolExecutor(max_workers=1) as threads, ProcessPoolExecutor(max_workers=1) as processes:
+        # Прогрев пула процессов
+        await loop.run_in_executor(processes, _decode_and_validate, codec, b'{"ResultCode": 1}', SalesCollection)
+
+        modes = {
+            "event loop": inline,
+            "потоки": lambda: loop.run_in_executor(threads, _decode_and_validate, codec, body, SalesCollection),
+            "процессы": lambda: loop.run_in_executor(processes, _decode_and_validate, codec, body, SalesCollection),
+        }
+        for name, work in modes.items():
+            elapsed, lag = await measure_lag(work)
+            print(f"{name:>10}: {elapsed * 1000:7.1f} мс, максимальная задержка loop {lag * 1000:7.1f} мс")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000))
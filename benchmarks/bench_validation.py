@@ -0,0 +1,41 @@
+"""
+Бенчмарк режимов валидации на ответах /GetSales
+
+Запуск: python -m benchmarks.bench_validation [число продаж ...]
+"""
+
+import sys
+import timeit
+
+from benchmarks.payloads import make_sales_response
+from kit_api.models import SalesCollection
+from kit_api.validation import ValidationMode, validate_model
+
+
+def best_of(func, repeat: int = 3) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def build_and_scan(response: dict, mode: ValidationMode, share: float) -> None:
+    """Построить коллекцию и обратиться к доле share её продаж"""
+    items = validate_model(SalesCollection, response, mode).items
+    for index in range(0, len(items), max(1, round(1 / share))):
+        items[index].price
+
+
+def main(counts: list[int]) -> None:
+    for count in counts:
+        response = make_sales_response(count)
+        print(f"{count} продаж")
+        strict = best_of(lambda: validate_model(SalesCollection, response, ValidationMode.STRICT))
+        for mode in ValidationMode:
+            for share in (0.01, 1.0):
+                elapsed = best_of(lambda: build_and_scan(response, mode, share))
+                print(
+                    f"  {mode.value:>8}, обращение к {share:4.0%} продаж: "
+                    f"{elapsed * 1000:8.1f} мс (x{strict / elapsed:.2f} к strict)"
+                )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 50_000, 200_000])
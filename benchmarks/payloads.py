@@ -0,0 +1,37 @@
+"""
+Генерация реалистичных ответов Kit API для бенчмарков
+"""
+
+import random
+from datetime import datetime, timedelta
+
+PRODUCT_NAMES = [
+    "Кофе американо", "Капучино", "Латте", "Горячий шоколад", "Чай чёрный",
+    "Сникерс", "Вода негазированная 0.5", "Кока-кола 0.33", "Чипсы Lays", "Батончик Mars",
+]
+
+
+def make_sales_response(count: int, machines: int = 20, seed: int = 1) -> dict:
+    """
+    Ответ /GetSales с count продажами: смесь продаж товаров и напитков
+    с повторяющимися названиями автоматов и товаров, как в реальных выгрузках
+    """
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    sales = []
+    for i in range(count):
+        machine = rng.randrange(machines)
+        sale = {
+            "LineNumber": rng.randrange(1, 60),
+            "Sum": float(rng.choice((45, 60, 85, 120, 150))),
+            "DateTime": (start + timedelta(seconds=i * 37)).strftime("%d.%m.%Y %H:%M:%S"),
+            "VendingMachine": 1000 + machine,
+            "VendingMachineName": f"Автомат №{machine} ТЦ Центральный",
+            "MatrixId": 500 + machine % 5,
+        }
+        if rng.random() < 0.6:
+            sale["FormulationId"] = rng.randrange(1, 30)
+        else:
+            sale["GoodsName"] = rng.choice(PRODUCT_NAMES)
+        sales.append(sale)
+    return {"ResultCode": 0, "ErrorMessage": None, "Sales": sales}
@@ -5,13 +5,24 @@ Kit Vending API Client Package
 """
 
 from kit_api.client import KitVendingAPIClient
+from kit_api.cache import ReferenceCache
+from kit_api.connection import ConnectionOptions
+from kit_api.pool import KitClientPool
+from kit_api.rate_limiter import Priority, request_priority
+from kit_api.tracing import RequestTrace, RequestTracer
+from kit_api.validation import ValidationMode, validation_mode
+from kit_api.columnar import SalesFormat, SalesTable
+from kit_api.records import ProductSaleRecord, RecipeDrinkSaleRecord, SaleRecord
 from kit_api.exceptions import (
     KitAPIError,
     KitAPIAuthError,
     KitAPINetworkError,
+    KitAPIRateLimitError,
     KitAPIResponseError,
     KitAPIValidationError,
 )
+from kit_api.fleet import FleetSalesResult, SalesFetchProgress
+from kit_api.sales_sync import IncrementalSalesSync, JsonWatermarkStore, SalesWatermark
 from kit_api.models import (
     MatricesKitCollection,
     ProductsKitCollection,
@@ -31,12 +42,38 @@ __version__ = "0.1.0"
 __all__ = [
     # Client
     "KitVendingAPIClient",
+    "ReferenceCache",
+    "ConnectionOptions",
+    "KitClientPool",
+    # Rate limiting
+    "Priority",
+    "request_priority",
+    # Tracing
+    "RequestTrace",
+    "RequestTracer",
+    # Validation
+    "ValidationMode",
+    "validation_mode",
+    # Sales formats
+    "SalesFormat",
+    "SalesTable",
+    "SaleRecord",
+    "ProductSaleRecord",
+    "RecipeDrinkSaleRecord",
     # Exceptions
     "KitAPIError",
     "KitAPIAuthError",
     "KitAPINetworkError",
+    "KitAPIRateLimitError",
     "KitAPIResponseError",
     "KitAPIValidationError",
+    # Bulk results
+    "FleetSalesResult",
+    "SalesFetchProgress",
+    # Incremental sync
+    "IncrementalSalesSync",
+    "JsonWatermarkStore",
+    "SalesWatermark",
     # Models
     "MatricesKitCollection",
     "ProductsKitCollection",
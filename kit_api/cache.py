@@ -0,0 +1,135 @@
+"""
+Кэш справочных данных Kit API (товары, рецепты, матрицы, автоматы)
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable, Mapping
+
+
+@dataclass
+class _CacheEntry:
+    value: Any
+    loaded_at: float
+
+
+class ReferenceCache:
+    """
+    TTL-кэш со stale-while-revalidate.
+
+    Пока запись моложе TTL, она возвращается без обращения к API. Устаревшая
+    запись возвращается сразу, а её обновление запускается в фоне; ошибка
+    фонового обновления не затирает имеющиеся данные. Число записей
+    ограничено: при переполнении вытесняется давно не использованная запись.
+    """
+
+    def __init__(
+            self,
+            ttl: float = 300.0,
+            ttls: Mapping[str, float] | None = None,
+            stale_ttl: float | None = 3600.0,
+            max_entries: int = 64
+    ):
+        """
+        Args:
+            ttl: Время актуальности записи в секундах по умолчанию
+            ttls: Время актуальности по эндпоинтам, например {"/GetGoods": 600}
+            stale_ttl: Сколько секунд после истечения TTL запись ещё можно отдавать
+                       устаревшей (None - без ограничения)
+            max_entries: Максимальное число записей
+        """
+        self._ttl = ttl
+        self._ttls = dict(ttls or {})
+        self._stale_ttl = stale_ttl
+        self._max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, Hashable], _CacheEntry] = OrderedDict()
+        self._refreshing: dict[tuple[str, Hashable], asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_or_load(
+            self,
+            endpoint: str,
+            key: Hashable,
+            loader: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Получить значение из кэша или загрузить его
+
+        Args:
+            endpoint: Эндпоинт API (определяет TTL)
+            key: Дополнительный ключ (например, учётные данные)
+            loader: Корутина загрузки актуального значения
+
+        Returns:
+            Any: Актуальное или устаревшее (с фоновым обновлением) значение
+        """
+        cache_key = (endpoint, key)
+        entry = self._entries.get(cache_key)
+
+        if entry is not None:
+            age = time.monotonic() - entry.loaded_at
+            ttl = self._ttls.get(endpoint, self._ttl)
+
+            if age < ttl:
+                self._entries.move_to_end(cache_key)
+                return entry.value
+
+            if self._stale_ttl is None or age < ttl + self._stale_ttl:
+                self._entries.move_to_end(cache_key)
+                self._refresh_in_background(cache_key, loader)
+                return entry.value
+
+        value = await loader()
+        self._store(cache_key, value)
+        return value
+
+    def invalidate(self, endpoint: str | None = None) -> None:
+        """
+        Удалить записи из кэша
+
+        Args:
+            endpoint: Эндпоинт, записи которого нужно удалить (None - все записи)
+        """
+        for cache_key in [k for k in self._entries if endpoint is None or k[0] == endpoint]:
+            del self._entries[cache_key]
+        # Незавершённое фоновое обновление не должно вернуть удалённые данные
+        for cache_key in [k for k in self._refreshing if endpoint is None or k[0] == endpoint]:
+            self._refreshing.pop(cache_key).cancel()
+
+    async def aclose(self) -> None:
+        """Отменить фоновые обновления"""
+        tasks = list(self._refreshing.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._refreshing.clear()
+
+    def _store(self, cache_key: tuple[str, Hashable], value: Any) -> None:
+        self._entries[cache_key] = _CacheEntry(value, time.monotonic())
+        self._entries.move_to_end(cache_key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def _refresh_in_background(
+            self,
+            cache_key: tuple[str, Hashable],
+            loader: Callable[[], Awaitable[Any]]
+    ) -> None:
+        if cache_key in self._refreshing:
+            return
+
+        async def refresh() -> None:
+            try:
+                self._store(cache_key, await loader())
+            except Exception as e:
+                logging.warning(f"Не удалось обновить кэш {cache_key[0]}: {e}")
+            finally:
+                if self._refreshing.get(cache_key) is asyncio.current_task():
+                    del self._refreshing[cache_key]
+
+        self._refreshing[cache_key] = asyncio.create_task(refresh())
@@ -1,19 +1,25 @@
+import asyncio
 import hashlib
-import json
+import logging
 import os
-from datetime import datetime
+import time
+from concurrent.futures import Executor
+from contextlib import aclosing
+from datetime import datetime, timedelta
 from enum import IntEnum
-from typing import Mapping, Any
+from typing import Mapping, Any, AsyncIterator, Iterable, Callable, Awaitable, Sequence, TypeVar, Collection
 
 import aiohttp
-from aiohttp import ClientError as AioHTTPClientError, ContentTypeError
+from aiohttp import ClientError as AioHTTPClientError
 from dotenv import load_dotenv
+from pydantic import BaseModel, ValidationError
 
 from kit_api.models import RecipesKitCollection
 from kit_api.exceptions import (
     KitAPIError,
     KitAPIAuthError,
     KitAPINetworkError,
+    KitAPIRateLimitError,
     KitAPIResponseError,
     KitAPIValidationError,
 )
@@ -23,10 +29,49 @@ from kit_api.models import (
     SalesCollection,
     VendingMachinesCollection,
 )
-from kit_api.models.sales import ProductSaleModel
-from kit_api.timestamp_api import TimestampAPI
+from kit_api.models.sales import BaseSaleModel
+from kit_api.timestamp_api import TimestampAPI, SyncedTimestampAPI
+from kit_api.cache import ReferenceCache
+from kit_api.single_flight import SingleFlight
 from kit_api.project_time import ProjectTime
-from kit_api.rate_limiter import rate_limit
+from kit_api.codec import JSONCodec, get_codec
+from kit_api.columnar import SalesFormat, SalesTable, resolve_sales_format
+from kit_api.records import SaleRecord, records_from_collection
+from kit_api.connection import ConnectionOptions
+from kit_api.streaming import JSONArrayStreamParser
+from kit_api.tracing import (
+    RequestTrace,
+    RequestTracer,
+    connection_trace_config,
+    current_trace,
+    finish_trace,
+    start_trace,
+)
+from kit_api.validation import (
+    ValidationMode,
+    current_validation_mode,
+    resolve_validation_mode,
+    validate_items,
+    validate_model,
+    validation_mode,
+)
+from kit_api.rate_limiter import (
+    AdaptiveRateLimiter,
+    Priority,
+    RateLimiter,
+    SharedFileRateLimiter,
+    api_method,
+    rate_limit,
+    request_priority,
+)
+from kit_api.fleet import (
+    FleetSalesResult,
+    SalesProgressCallback,
+    gather_sales,
+    resolve_machine_ids,
+)
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
 
 
 class ResultCodes(IntEnum):
@@ -39,11 +84,73 @@ load_dotenv()
 try:
     max_requests = int(os.getenv("KIT_API_REQUEST_PER_WINDOW", 1))
     time_window = int(os.getenv("KIT_API_WINDOW_SECONDS", 10))
+    max_adaptive_requests = int(os.getenv("KIT_API_MAX_REQUEST_PER_WINDOW", 0)) or None
 except ValueError as e:
-    raise KitAPIValidationError("KIT_API_REQUEST_PER_WINDOW and KIT_API_WINDOW_SECONDS (.env) должны быть числами.")
+    raise KitAPIValidationError(
+        "KIT_API_REQUEST_PER_WINDOW, KIT_API_WINDOW_SECONDS и KIT_API_MAX_REQUEST_PER_WINDOW (.env) "
+        "должны быть числами."
+    )
+
+# Адаптивный режим: лимит подстраивается под ответы сервера с кодом 27
+adaptive_rate_limit = os.getenv("KIT_API_ADAPTIVE_RATE_LIMIT", "false").lower() in ("1", "true", "yes")
+# Файл общего окна для нескольких процессов с одними учётными данными
+shared_rate_limit_file = os.getenv("KIT_API_RATE_LIMIT_FILE") or None
+
+
+def _create_limiter(scope: str | None = None) -> RateLimiter:
+    """
+    Создать ограничитель запросов по настройкам окружения
+
+    Args:
+        scope: Идентификатор набора учётных данных; для общего файла окна
+               каждому набору соответствует свой файл
+    """
+    if shared_rate_limit_file:
+        path = f"{shared_rate_limit_file}.{scope}" if scope else shared_rate_limit_file
+        return SharedFileRateLimiter(path, max_requests, time_window)
+    if adaptive_rate_limit:
+        return AdaptiveRateLimiter(max_requests, time_window, max_limit=max_adaptive_requests)
+    return RateLimiter(max_requests, time_window)
+
+
+# Ограничители по учётным данным: у каждой пары (login, company_id) своя серверная квота
+_credential_limiters: dict[tuple[str, int], RateLimiter] = {}
 
 
-@rate_limit(max_requests, time_window)
+def _limiter_for_credentials(login: str, company_id: int) -> RateLimiter:
+    """Получить общий для процесса ограничитель набора учётных данных"""
+    key = (login, company_id)
+    limiter = _credential_limiters.get(key)
+    if limiter is None:
+        scope = hashlib.md5(f"{company_id}:{login}".encode("utf-8")).hexdigest()[:12]
+        limiter = _credential_limiters[key] = _create_limiter(scope)
+    return limiter
+
+
+# Провайдеры RequestId по учётным данным: значения должны строго возрастать для всех
+# клиентов процесса с одними учётными данными, иначе в одну секунду они совпадут
+_credential_timestamps: dict[tuple[str, int], SyncedTimestampAPI] = {}
+_default_timestamp_provider = SyncedTimestampAPI()
+
+
+def _timestamp_for_credentials(login: str, company_id: int) -> SyncedTimestampAPI:
+    """Получить общий для процесса провайдер RequestId набора учётных данных"""
+    key = (login, company_id)
+    provider = _credential_timestamps.get(key)
+    if provider is None:
+        provider = _credential_timestamps[key] = SyncedTimestampAPI()
+    return provider
+
+
+# Максимальная длина окна get_sales при автоматическом подборе
+_MAX_AUTO_SALES_WINDOW_DAYS = 7
+# Число повторов окна iter_sales после отказа с кодом 27 (как у api_method)
+_STREAM_THROTTLE_RETRIES = 3
+# Слотов окна ограничителя на запрос /GetSales (get_sales и iter_sales)
+_SALES_WINDOW_COST = 1
+
+
+@rate_limit(limiter=_create_limiter(), wrap_methods=False)
 class KitVendingAPIClient:
     """
     Клиент для работы с Kit Vending API (api2.kit-invest.ru)
@@ -55,20 +162,84 @@ class KitVendingAPIClient:
             password: str | None = None,
             company_id: int | None = None,
             timestamp_provider: TimestampAPI | None = None,
-            session: aiohttp.ClientSession | None = None
+            session: aiohttp.ClientSession | None = None,
+            sales_window: timedelta | None = None,
+            sales_window_retries: int = 2,
+            cache: ReferenceCache | None = None,
+            coalesce_requests: bool = True,
+            rate_limiter: RateLimiter | None = None,
+            bucket_limiters: Mapping[str, RateLimiter] | None = None,
+            tracer: RequestTracer | None = None,
+            connection_options: ConnectionOptions | None = None,
+            json_codec: str | JSONCodec | None = None,
+            offload_threshold: int | None = None,
+            offload_executor: Executor | None = None,
+            validation: ValidationMode | str = ValidationMode.STRICT,
+            resync_result_codes: Collection[int] = ()
     ):
         """
         Args:
             login: Логин для авторизации (опционально, можно установить позже через login())
             password: Пароль для авторизации (опционально, можно установить позже через login())
             company_id: ID компании (опционально, можно установить позже через login())
-            timestamp_provider: Провайдер для получения timestamp (по умолчанию TimestampAPI)
+            timestamp_provider: Провайдер для получения timestamp. По умолчанию у каждого
+                                набора учётных данных свой SyncedTimestampAPI с локальными
+                                часами, общий для всех клиентов процесса с этими учётными данными
             session: HTTP сессия для переиспользования (опционально)
+            sales_window: Максимальная длина окна для get_sales
+                          (по умолчанию подбирается автоматически)
+            sales_window_retries: Число повторов неудачного окна get_sales
+            cache: Кэш справочных данных (товары, рецепты, матрицы, автоматы);
+                   по умолчанию кэширование выключено
+            coalesce_requests: Объединять одинаковые одновременные запросы в один
+            rate_limiter: Ограничитель запросов этого клиента. По умолчанию у каждого
+                          набора учётных данных (login, company_id) свой ограничитель,
+                          общий для всех клиентов процесса с этими учётными данными
+            bucket_limiters: Отдельные ограничители для эндпоинтов, например
+                             {"/GetSales": RateLimiter(2, 10)}. Эндпоинты без своего
+                             ограничителя используют общий rate_limiter
+            tracer: Трейсер, получающий замеры каждого вызова эндпоинта
+                    (по умолчанию трассировка выключена)
+            connection_options: Пул соединений, таймауты и сжатие ответов для сессии,
+                                создаваемой клиентом (по умолчанию ConnectionOptions())
+            json_codec: JSON кодек тела запросов и ответов: "orjson", "msgspec", "ujson",
+                        "json" или готовый JSONCodec (по умолчанию - самый быстрый из установленных)
+            offload_threshold: Ответы больше этого размера (в байтах) разбираются и валидируются
+                               вне event loop (по умолчанию - всегда в event loop)
+            offload_executor: Пул для разбора больших ответов: ThreadPoolExecutor или
+                              ProcessPoolExecutor (по умолчанию - пул потоков event loop)
+            validation: Режим построения моделей из ответов: "strict" (полная валидация),
+                        "trusted" (без проверки типов значений) или "lazy" (элементы
+                        коллекций валидируются при обращении); можно переопределить
+                        в каждом вызове
+            resync_result_codes: Коды ответа, которые может вызвать устаревший RequestId:
+                                 после них часы провайдера пересинхронизируются
+                                 (по умолчанию - ни после каких)
         """
-        self._timestamp_provider = timestamp_provider or TimestampAPI()
+        self._explicit_timestamp_provider = timestamp_provider
+        self._timestamp_provider = timestamp_provider or _default_timestamp_provider
         self._base_url = "https://api2.kit-invest.ru/APIService.svc"
         self._session = session
         self._own_session = session is None
+        # Источник общей сессии, если сессией владеет не клиент
+        self._session_factory: Callable[[], aiohttp.ClientSession] | None = None
+        self._sales_window = sales_window
+        self._sales_window_retries = sales_window_retries
+        self._cache = cache
+        self._single_flight = SingleFlight() if coalesce_requests else None
+        self._explicit_limiter = rate_limiter
+        self._limiter = rate_limiter or type(self)._limiter
+        self._bucket_limiters = dict(bucket_limiters or {})
+        self._tracer = tracer
+        self._connection_options = connection_options or ConnectionOptions()
+        self._request_headers = self._connection_options.headers
+        # Тело запроса передаётся байтами - сохраняем тип содержимого, как у строки
+        self._post_headers = {**self._request_headers, "Content-Type": "text/plain; charset=utf-8"}
+        self._codec = get_codec(json_codec)
+        self._offload_threshold = offload_threshold
+        self._offload_executor = offload_executor
+        self._validation = resolve_validation_mode(validation)
+        self._resync_result_codes = frozenset(resync_result_codes)
         
         # Учётные данные изначально не заданы
         self._login: str | None = None
@@ -83,120 +254,582 @@ class KitVendingAPIClient:
             self,
             vending_machine_id: int,
             from_date: datetime,
-            to_date: datetime
-    ) -> SalesCollection:
+            to_date: datetime,
+            window: timedelta | None = None,
+            priority: Priority | None = None,
+            validation: ValidationMode | str | None = None,
+            sales_format: SalesFormat | str = SalesFormat.MODELS
+    ) -> SalesCollection | SalesTable | list[SaleRecord]:
         """
         Получить продажи по торговому автомату за период
-        
+
+        Длинный период разбивается на окна (по московским суткам), которые
+        запрашиваются конкурентно в пределах лимита запросов; неудачное окно
+        повторяется отдельно. Результаты объединяются в одну коллекцию,
+        упорядоченную по времени и без дублей.
+
         Args:
             vending_machine_id: ID торгового автомата
             from_date: Начальная дата
             to_date: Конечная дата
-            
+            window: Максимальная длина окна запроса
+                    (по умолчанию - sales_window клиента или подбирается автоматически)
+            priority: Приоритет запросов в очереди ограничителя
+                      (по умолчанию - из request_priority() или NORMAL)
+            validation: Режим валидации ответа (по умолчанию - режим клиента,
+                        для sales_format "table" и "records" - LAZY: модели не строятся)
+            sales_format: Представление результата: "models" - SalesCollection,
+                          "table" - колоночная SalesTable, "records" - список SaleRecord
+
         Returns:
-            SalesCollection: Коллекция продаж
+            SalesCollection | SalesTable | list[SaleRecord]: Продажи в выбранном представлении
         """
-        endpoint = "/GetSales"
-        request_id = await self._timestamp_provider.async_get_now()
-        url = f"{self._base_url}{endpoint}"
-        to_dt_api_format = ProjectTime.datetime_to_str_kit(to_date)
-        from_dt_api_format = ProjectTime.datetime_to_str_kit(from_date)
-
-        data = {
-            "Auth": self._build_auth(request_id),
-            "Filter": {
-                "UpDate": from_dt_api_format,
-                "ToDate": to_dt_api_format,
-                "VendingMachineId": vending_machine_id,
-            }
-        }
+        sales_format = resolve_sales_format(sales_format)
+        if sales_format is not SalesFormat.MODELS and validation is None:
+            validation = ValidationMode.LAZY
 
-        response = await self._async_send_post_request(url, data)
+        with request_priority(priority), validation_mode(validation):
+            collection = await self._get_sales_collection(vending_machine_id, from_date, to_date, window)
 
-        res = []
+        if sales_format is SalesFormat.TABLE:
+            return SalesTable.from_collection(collection)
+        if sales_format is SalesFormat.RECORDS:
+            return records_from_collection(collection)
+        return collection
 
-        for sale in response["Sales"]:
-            product_name = sale.get("GoodsName")
+    async def _get_sales_collection(
+            self,
+            vending_machine_id: int,
+            from_date: datetime,
+            to_date: datetime,
+            window: timedelta | None
+    ) -> SalesCollection:
+        """Продажи по торговому автомату за период: запрос по окнам и объединение"""
+        from_date = ProjectTime.to_project_timezone(from_date)
+        to_date = ProjectTime.to_project_timezone(to_date)
+        window = window or self._sales_window or self._auto_sales_window(from_date, to_date)
+
+        if to_date - from_date <= window:
+            windows = [(from_date, to_date)]
+        else:
+            windows = ProjectTime.split_period(from_date, to_date, window)
+
+        if len(windows) == 1:
+            return await self._get_sales_window_with_retries(vending_machine_id, *windows[0])
 
-            if product_name is not None:
-                res.append(
-                    ProductSaleModel.model_validate(sale)
+        semaphore = asyncio.Semaphore(max(1, self._limiter_for("/GetSales").max_requests))
+
+        async def fetch(window_from: datetime, window_to: datetime) -> SalesCollection:
+            async with semaphore:
+                return await self._get_sales_window_with_retries(
+                    vending_machine_id, window_from, window_to
                 )
 
-        sales_collection = SalesCollection.model_validate(response)
+        collections = await asyncio.gather(*(fetch(*w) for w in windows))
 
-        return sales_collection
+        return SalesCollection.merge(collections)
 
-    async def get_products(self) -> ProductsKitCollection:
+    async def get_sales_for_machines(
+            self,
+            vending_machines: Iterable[int] | VendingMachinesCollection,
+            from_date: datetime,
+            to_date: datetime,
+            max_concurrency: int | None = None,
+            on_progress: SalesProgressCallback | None = None,
+            priority: Priority | None = None,
+            validation: ValidationMode | str | None = None,
+    ) -> FleetSalesResult:
         """
-        Получить список товаров
-        
+        Получить продажи по нескольким торговым автоматам за период
+
+        Запросы выполняются конкурентно, темп задаётся ограничителем запросов клиента.
+        Ошибка по одному автомату не прерывает загрузку остальных.
+
+        Args:
+            vending_machines: ID торговых автоматов или результат get_vending_machines()
+            from_date: Начальная дата
+            to_date: Конечная дата
+            max_concurrency: Максимальное число одновременных запросов
+                             (по умолчанию - лимит запросов за окно)
+            on_progress: Callback, вызываемый после обработки каждого автомата
+                         с его частичным результатом
+            priority: Приоритет запросов, например Priority.BULK для массовой выгрузки
+            validation: Режим валидации ответов (по умолчанию - режим клиента)
+
         Returns:
-            ProductsKitCollection: Коллекция товаров
+            FleetSalesResult: Продажи по автоматам и ошибки по автоматам, которые не удалось загрузить
         """
-        endpoint = "/GetGoods"
-        request_id = await self._timestamp_provider.async_get_now()
-        url = f"{self._base_url}{endpoint}"
-        data = {
-            "Auth": self._build_auth(request_id),
-        }
+        if max_concurrency is None:
+            max_concurrency = self._limiter_for("/GetSales").max_requests
+
+        with request_priority(priority), validation_mode(validation):
+            return await gather_sales(
+                resolve_machine_ids(vending_machines),
+                lambda machine_id: self.get_sales(machine_id, from_date, to_date),
+                max_concurrency,
+                on_progress,
+            )
+
+    async def iter_sales(
+            self,
+            vending_machines: int | Iterable[int] | VendingMachinesCollection,
+            from_date: datetime,
+            to_date: datetime,
+            window: timedelta | None = None,
+            priority: Priority | None = None,
+            chunk_size: int = 64 * 1024,
+            validation: ValidationMode | str | None = None
+    ) -> AsyncIterator[BaseSaleModel]:
+        """
+        Получать продажи потоком, не загружая весь ответ в память
 
-        response = await self._async_send_post_request(url, data)
-        products_collection = ProductsKitCollection.model_validate(response)
+        Автоматы и окна периода запрашиваются последовательно; массив Sales
+        разбирается по мере получения тела ответа, и продажи отдаются
+        сразу после валидации. Следующая часть ответа читается только когда
+        потребитель запрашивает следующие продажи, поэтому темп загрузки
+        задаёт потребитель, а в памяти находится не больше одной части ответа.
 
-        return products_collection
+        Продажи отдаются в порядке ответа API: автомат за автоматом, окно за
+        окном. Дубли на общей границе соседних окон отбрасываются.
 
-    async def get_recipes(self) -> RecipesKitCollection:
-        """Получить список рецептов напитков."""
-        endpoint = "/GetFormulations"
-        request_id = await self._timestamp_provider.async_get_now()
-        url = f"{self._base_url}{endpoint}"
-        data = {
-            "Auth": self._build_auth(request_id),
-        }
+        Args:
+            vending_machines: ID торгового автомата, несколько ID или результат get_vending_machines()
+            from_date: Начальная дата
+            to_date: Конечная дата
+            window: Максимальная длина окна запроса
+                    (по умолчанию - sales_window клиента или подбирается автоматически)
+            priority: Приоритет запросов в очереди ограничителя
+            chunk_size: Размер части тела ответа, читаемой за раз (в байтах)
+            validation: Режим валидации продаж (по умолчанию - режим клиента)
+
+        Yields:
+            BaseSaleModel: Продажа
+        """
+        validation = self._validation_for(validation)
+        if isinstance(vending_machines, int):
+            machine_ids = [vending_machines]
+        else:
+            machine_ids = resolve_machine_ids(vending_machines)
 
-        response = await self._async_send_post_request(url, data)
-        models = RecipesKitCollection.model_validate(response)
+        from_date = ProjectTime.to_project_timezone(from_date)
+        to_date = ProjectTime.to_project_timezone(to_date)
+        window = window or self._sales_window or self._auto_sales_window(from_date, to_date)
+        if to_date - from_date <= window:
+            windows = [(from_date, to_date)]
+        else:
+            windows = ProjectTime.split_period(from_date, to_date, window)
 
-        return models
+        for machine_id in machine_ids:
+            # Ключи продаж предыдущего окна: соседние окна имеют общую границу
+            previous_keys: set[tuple] = set()
+            for window_from, window_to in windows:
+                keys = set()
+                async with aclosing(self._stream_sales_window(
+                        machine_id, window_from, window_to, priority, chunk_size, validation
+                )) as sales:
+                    async for sale in sales:
+                        key = sale.key
+                        if key in previous_keys:
+                            continue
+                        keys.add(key)
+                        yield sale
+                previous_keys = keys
 
-    async def get_product_matrices(self) -> MatricesKitCollection:
+    async def get_products(
+            self,
+            priority: Priority | None = None,
+            validation: ValidationMode | str | None = None
+    ) -> ProductsKitCollection:
         """
-        Получить матрицы товаров
-        
+        Получить список товаров
+
+        Args:
+            priority: Приоритет запроса в очереди ограничителя
+            validation: Режим валидации ответа (по умолчанию - режим клиента)
+
         Returns:
-            MatricesKitCollection: Коллекция матриц
+            ProductsKitCollection: Коллекция товаров
         """
-        endpoint = "/GetGoodsMatrices"
-        request_id = await self._timestamp_provider.async_get_now()
-        url = f"{self._base_url}{endpoint}"
-        data = {
-            "Auth": self._build_auth(request_id),
-        }
+        with request_priority(priority), validation_mode(validation):
+            return await self._cached("/GetGoods", self._get_products)
+
+    async def get_recipes(
+            self,
+            priority: Priority | None = None,
+            validation: ValidationMode | str | None = None
+    ) -> RecipesKitCollection:
+        """
+        Получить список рецептов напитков
+
+        Args:
+            priority: Приоритет запроса в очереди ограничителя
+            validation: Режим валидации ответа (по умолчанию - режим клиента)
 
-        response = await self._async_send_post_request(url, data)
-        matrix_collection = MatricesKitCollection.model_validate(response)
+        Returns:
+            RecipesKitCollection: Коллекция рецептов
+        """
+        with request_priority(priority), validation_mode(validation):
+            return await self._cached("/GetFormulations", self._get_recipes)
 
-        return matrix_collection
+    async def get_product_matrices(
+            self,
+            priority: Priority | None = None,
+            validation: ValidationMode | str | None = None
+    ) -> MatricesKitCollection:
+        """
+        Получить матрицы товаров
+
+        Args:
+            priority: Приоритет запроса в очереди ограничителя
+            validation: Режим валидации ответа (по умолчанию - режим клиента)
 
-    async def get_vending_machines(self) -> VendingMachinesCollection:
+        Returns:
+            MatricesKitCollection: Коллекция матриц
+        """
+        with request_priority(priority), validation_mode(validation):
+            return await self._cached("/GetGoodsMatrices", self._get_product_matrices)
+
+    async def get_vending_machines(
+            self,
+            priority: Priority | None = None,
+            validation: ValidationMode | str | None = None
+    ) -> VendingMachinesCollection:
         """
         Получить список торговых автоматов
-        
+
+        Args:
+            priority: Приоритет запроса в очереди ограничителя
+            validation: Режим валидации ответа (по умолчанию - режим клиента)
+
         Returns:
             VendingMachinesCollection: Коллекция торговых автоматов
         """
-        endpoint = "/GetVendingMachines"
+        with request_priority(priority), validation_mode(validation):
+            return await self._cached("/GetVendingMachines", self._get_vending_machines)
+
+    def invalidate_cache(self, endpoint: str | None = None) -> None:
+        """
+        Сбросить кэш справочных данных
+
+        Args:
+            endpoint: Эндпоинт, например "/GetGoods" (None - весь кэш)
+        """
+        if self._cache is not None:
+            self._cache.invalidate(endpoint)
+
+    @api_method(bucket="/GetGoods")
+    async def _get_products(self) -> ProductsKitCollection:
+        """Загрузить список товаров из API"""
+        return await self._request("/GetGoods", ProductsKitCollection)
+
+    @api_method(bucket="/GetFormulations")
+    async def _get_recipes(self) -> RecipesKitCollection:
+        """Загрузить список рецептов напитков из API"""
+        return await self._request("/GetFormulations", RecipesKitCollection)
+
+    @api_method(bucket="/GetGoodsMatrices")
+    async def _get_product_matrices(self) -> MatricesKitCollection:
+        """Загрузить матрицы товаров из API"""
+        return await self._request("/GetGoodsMatrices", MatricesKitCollection)
+
+    @api_method(bucket="/GetVendingMachines")
+    async def _get_vending_machines(self) -> VendingMachinesCollection:
+        """Загрузить список торговых автоматов из API"""
+        return await self._request("/GetVendingMachines", VendingMachinesCollection)
+
+    @api_method(bucket="/GetSales", cost=_SALES_WINDOW_COST)
+    async def _get_sales_window(
+            self,
+            vending_machine_id: int,
+            from_date: datetime,
+            to_date: datetime
+    ) -> SalesCollection:
+        """Получить продажи по торговому автомату за одно окно (один запрос к API)"""
+        return await self._request(
+            "/GetSales", SalesCollection, _sales_filter(vending_machine_id, from_date, to_date)
+        )
+
+    async def _request(self, endpoint: str, model: type[ModelT], payload: Mapping | None = None) -> ModelT:
+        """
+        Выполнить запрос к эндпоинту с авторизацией и провалидировать ответ моделью.
+
+        Ответ больше offload_threshold байт разбирается и валидируется в
+        offload_executor, чтобы не блокировать event loop.
+        """
+        trace = current_trace()
+        started = time.perf_counter()
         request_id = await self._timestamp_provider.async_get_now()
-        url = f"{self._base_url}{endpoint}"
-        data = {
-            "Auth": self._build_auth(request_id),
-        }
+        if trace is not None:
+            trace.request_id += time.perf_counter() - started
 
-        response = await self._async_send_post_request(url, data)
-        collection = VendingMachinesCollection.model_validate(response)
+        data = {"Auth": self._build_auth(request_id), **(payload or {})}
+        content = await self._fetch(f"{self._base_url}{endpoint}", data)
 
-        return collection
+        if self._offload_threshold is None or len(content) < self._offload_threshold:
+            response = self._check_result(self._decode(content))
+            return self._validate(model, response)
+
+        loop = asyncio.get_running_loop()
+        try:
+            response, result, decode_time, validation_time = await loop.run_in_executor(
+                self._offload_executor, _decode_and_validate,
+                self._codec, content, model, self._current_validation()
+            )
+        except ValidationError:
+            raise
+        except ValueError as e:
+            raise KitAPIResponseError(f"Не удалось разобрать JSON ответ от API: {e}", result_code=-1)
+
+        if trace is not None:
+            trace.decode += decode_time
+            trace.validation += validation_time
+            trace.offloaded = True
+            trace.result_code = ResultCodes.SUCCESS
+        if result is None:
+            # Ответ с ошибкой: проверка кода выбросит соответствующее исключение
+            self._check_result(response)
+        return result
+
+    def _validate(self, model: type[ModelT], response: Mapping) -> ModelT:
+        """Провалидировать ответ API моделью в режиме валидации текущего вызова"""
+        trace = current_trace()
+        started = time.perf_counter()
+        result = validate_model(model, response, self._current_validation())
+        if trace is not None:
+            trace.validation += time.perf_counter() - started
+        return result
+
+    async def _get_sales_window_with_retries(
+            self,
+            vending_machine_id: int,
+            from_date: datetime,
+            to_date: datetime
+    ) -> SalesCollection:
+        """Получить продажи за одно окно, повторяя запрос при временных ошибках"""
+        key = (
+            "/GetSales", self._company_id, self._login, vending_machine_id, from_date, to_date,
+            self._current_validation(),
+        )
+        return await self._coalesced(
+            key, lambda: self._retry_sales_window(vending_machine_id, from_date, to_date)
+        )
+
+    async def _retry_sales_window(
+            self,
+            vending_machine_id: int,
+            from_date: datetime,
+            to_date: datetime
+    ) -> SalesCollection:
+        """Выполнить запрос окна, повторяя его при сетевых ошибках и таймаутах"""
+        attempt = 0
+        while True:
+            try:
+                return await self._get_sales_window(vending_machine_id, from_date, to_date)
+            except KitAPINetworkError:
+                # Отказы с кодом 27 повторяет api_method
+                if attempt >= self._sales_window_retries:
+                    raise
+                attempt += 1
+
+    async def _stream_sales_window(
+            self,
+            vending_machine_id: int,
+            from_date: datetime,
+            to_date: datetime,
+            priority: Priority | None,
+            chunk_size: int,
+            validation: ValidationMode
+    ) -> AsyncIterator[BaseSaleModel]:
+        """
+        Получать продажи одного окна потоком в слоте ограничителя.
+
+        Отказ с кодом 27 и сетевая ошибка повторяются, только если ни одна
+        продажа окна ещё не отдана потребителю. С трейсером окно - один вызов
+        эндпоинта, как у api_method; его total включает и время потребителя
+        между частями ответа. Трасса передаётся явно, а не через current_trace():
+        генератор не держит ContextVar между yield.
+        """
+        if self._tracer is None:
+            async with aclosing(self._stream_sales_attempts(
+                    vending_machine_id, from_date, to_date, priority, chunk_size, validation, None
+            )) as sales:
+                async for sale in sales:
+                    yield sale
+            return
+
+        trace = start_trace(self._tracer, "/GetSales")
+        try:
+            # aclosing: при досрочном закрытии внешнего генератора трасса
+            # завершается сразу, а не при сборке мусора
+            async with aclosing(self._stream_sales_attempts(
+                    vending_machine_id, from_date, to_date, priority, chunk_size, validation, trace
+            )) as sales:
+                async for sale in sales:
+                    yield sale
+        except GeneratorExit:
+            # Потребитель прекратил выгрузку - это не ошибка запроса
+            raise
+        except BaseException as e:
+            trace.error = e
+            raise
+        finally:
+            finish_trace(self._tracer, trace)
+
+    async def _stream_sales_attempts(
+            self,
+            vending_machine_id: int,
+            from_date: datetime,
+            to_date: datetime,
+            priority: Priority | None,
+            chunk_size: int,
+            validation: ValidationMode,
+            trace: RequestTrace | None
+    ) -> AsyncIterator[BaseSaleModel]:
+        """Выполнить запрос окна потоком, повторяя его до отдачи первой продажи"""
+        limiter = self._limiter_for("/GetSales")
+        payload = _sales_filter(vending_machine_id, from_date, to_date)
+        throttled = 0
+        failed = 0
+        while True:
+            if trace is None:
+                await limiter.wait(_SALES_WINDOW_COST, priority)
+            else:
+                started = time.perf_counter()
+                await limiter.wait(_SALES_WINDOW_COST, priority)
+                trace.rate_limit_wait += time.perf_counter() - started
+                trace.attempts += 1
+            yielded = False
+            try:
+                async with aclosing(self._stream_sales(payload, chunk_size, validation, trace)) as sales:
+                    async for sale in sales:
+                        yielded = True
+                        yield sale
+            except KitAPIRateLimitError:
+                limiter.on_throttled()
+                if yielded or throttled >= _STREAM_THROTTLE_RETRIES:
+                    raise
+                throttled += 1
+                continue
+            except KitAPINetworkError:
+                if yielded or failed >= self._sales_window_retries:
+                    raise
+                failed += 1
+                continue
+            limiter.on_success()
+            return
+
+    async def _stream_sales(
+            self,
+            payload: Mapping,
+            chunk_size: int,
+            validation: ValidationMode,
+            trace: RequestTrace | None
+    ) -> AsyncIterator[BaseSaleModel]:
+        """
+        Выполнить запрос /GetSales и разбирать массив Sales по мере получения ответа.
+        Общий таймаут сессии не применяется: тело читается в темпе потребителя
+        """
+        started = time.perf_counter()
+        request_id = await self._timestamp_provider.async_get_now()
+        if trace is not None:
+            trace.request_id += time.perf_counter() - started
+        body = self._codec.dumps({"Auth": self._build_auth(request_id), **payload})
+        if trace is not None:
+            trace.request_bytes += len(body)
+        session = await self._get_session()
+        parser = JSONArrayStreamParser("Sales")
+        checked = False
+
+        try:
+            async with session.post(
+                    url=f"{self._base_url}/GetSales", data=body, headers=self._post_headers,
+                    timeout=self._connection_options.create_stream_timeout(),
+            ) as response:
+                response.raise_for_status()
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    if trace is not None:
+                        trace.response_bytes += len(chunk)
+                    try:
+                        rows = parser.feed(chunk)
+                    except ValueError as e:
+                        raise KitAPIResponseError(f"Не удалось разобрать JSON ответ от API: {e}", result_code=-1)
+                    if not checked and "ResultCode" in parser.fields:
+                        # Код ответа пришёл до массива: ошибка обнаруживается сразу
+                        self._check_result(self._stream_fields(parser), trace)
+                        checked = True
+                    if rows:
+                        for sale in self._validate_sales_rows(rows, validation):
+                            yield sale
+        except AioHTTPClientError as e:
+            raise KitAPINetworkError(f"Ошибка сети: {e}") from e
+        except asyncio.TimeoutError as e:
+            raise KitAPINetworkError("Превышено время ожидания ответа API") from e
+
+        try:
+            parser.close()
+        except ValueError as e:
+            raise KitAPIResponseError(f"Не удалось разобрать JSON ответ от API: {e}", result_code=-1)
+        if not checked:
+            self._check_result(self._stream_fields(parser), trace)
+
+    def _stream_fields(self, parser: JSONArrayStreamParser) -> dict[str, Any]:
+        """Разобрать поля верхнего уровня потокового ответа (кроме массива)"""
+        try:
+            return {key: self._codec.loads(raw) for key, raw in parser.fields.items()}
+        except ValueError as e:
+            raise KitAPIResponseError(f"Не удалось разобрать JSON ответ от API: {e}", result_code=-1)
+
+    def _validate_sales_rows(self, rows: list[bytes], validation: ValidationMode) -> Sequence[BaseSaleModel]:
+        """Разобрать и провалидировать полученные элементы массива Sales одним вызовом кодека"""
+        try:
+            decoded = self._codec.loads(b"[" + b",".join(rows) + b"]")
+        except ValueError as e:
+            raise KitAPIResponseError(f"Не удалось разобрать JSON ответ от API: {e}", result_code=-1)
+        return validate_items(SalesCollection, "items", decoded, validation)
+
+    async def _cached(self, endpoint: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Получить справочные данные через кэш клиента (если он задан)"""
+        # Результаты разных режимов валидации кэшируются отдельно
+        credentials = (self._company_id, self._login, self._current_validation())
+
+        async def load() -> Any:
+            return await self._coalesced((endpoint, credentials), loader)
+
+        if self._cache is None:
+            return await load()
+        return await self._cache.get_or_load(endpoint, credentials, load)
+
+    async def _coalesced(self, key: tuple, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Выполнить запрос, объединив его с одинаковым уже выполняющимся запросом"""
+        if self._single_flight is None:
+            return await fn()
+        return await self._single_flight.do(key, fn)
+
+    def _auto_sales_window(self, from_date: datetime, to_date: datetime) -> timedelta:
+        """
+        Подобрать длину окна для периода: так, чтобы окна укладывались в лимит
+        запросов за одно временное окно, но не короче суток и не длиннее недели
+        """
+        per_request = (to_date - from_date) / max(1, self._limiter_for("/GetSales").max_requests)
+        days = -(-per_request // timedelta(days=1))
+        return timedelta(days=min(max(1, days), _MAX_AUTO_SALES_WINDOW_DAYS))
+
+    def _validation_for(self, validation: ValidationMode | str | None) -> ValidationMode:
+        """Режим валидации вызова (None - режим клиента)"""
+        return self._validation if validation is None else resolve_validation_mode(validation)
+
+    def _current_validation(self) -> ValidationMode:
+        """Режим валидации текущего вызова: из validation_mode() или режим клиента"""
+        return current_validation_mode() or self._validation
+
+    def _limiter_for(self, endpoint: str) -> RateLimiter:
+        """Ограничитель, которым ограничивается эндпоинт"""
+        return self._bucket_limiters.get(endpoint) or self._limiter
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        """Ограничитель запросов клиента (текущий темп - rate_limiter.effective_rate)"""
+        return self._limiter
 
     def login(self, login: str, password: str, company_id: int) -> None:
         """Установить учётные данные для авторизации"""
@@ -210,12 +843,18 @@ class KitVendingAPIClient:
         self._login = login
         self._password = password
         self._company_id = company_id
+        self._limiter = self._explicit_limiter or _limiter_for_credentials(login, company_id)
+        self._timestamp_provider = (
+            self._explicit_timestamp_provider or _timestamp_for_credentials(login, company_id)
+        )
 
     def logout(self) -> None:
         """Удалить учётные данные"""
         self._login = None
         self._password = None
         self._company_id = None
+        self._limiter = self._explicit_limiter or type(self)._limiter
+        self._timestamp_provider = self._explicit_timestamp_provider or _default_timestamp_provider
 
     def is_authenticated(self) -> bool:
         """Проверить, установлены ли учётные данные"""
@@ -236,58 +875,133 @@ class KitVendingAPIClient:
             "Sign": sign,
         }
 
+    def _invalidate_timestamp(self) -> None:
+        """Сбросить синхронизацию провайдера timestamp, если он её поддерживает"""
+        invalidate = getattr(self._timestamp_provider, "invalidate", None)
+        if invalidate is not None:
+            invalidate()
+
     async def _get_session(self) -> aiohttp.ClientSession:
         """Получить HTTP сессию, создав её при необходимости"""
         if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession()
+            if self._session_factory is not None:
+                # Общая сессия владельца клиента (KitClientPool)
+                self._session = self._session_factory()
+                return self._session
+            trace_configs = [connection_trace_config()] if self._tracer is not None else None
+            self._session = self._connection_options.create_session(trace_configs)
             self._own_session = True
         return self._session
 
-    async def _async_send_post_request(self, url: str, data: Mapping) -> Mapping:
-        """Отправить асинхронный POST запрос"""
+    async def _fetch(self, url: str, data: Mapping) -> bytes:
+        """Отправить POST запрос и получить тело ответа"""
         session = await self._get_session()
+        trace = current_trace()
+        body = self._codec.dumps(data)
 
         try:
-            async with session.post(url=url, data=json.dumps(data)) as response:
+            connect_before = trace.connect if trace is not None else 0.0
+            sent_at = time.perf_counter()
+            async with session.post(url=url, data=body, headers=self._post_headers) as response:
+                headers_at = time.perf_counter()
                 response.raise_for_status()
-
-                try:
-                    response_data = await response.json()
-                except (ContentTypeError, json.JSONDecodeError) as e:
-                    raise KitAPIResponseError(
-                        f"Не удалось разобрать JSON ответ от API: {e}",
-                        result_code=-1
-                    )
-
-                try:
-                    result_code = response_data['ResultCode']
-                except KeyError:
-                    raise KitAPIResponseError(
-                        "Ответ API не содержит поле ResultCode",
-                        result_code=-1
-                    )
-
-                if result_code == ResultCodes.TOO_MANY_REQUEST:
-                    raise KitAPIResponseError(
-                        f"Превышен лимит запросов к API. Код ответа: {result_code}",
-                        result_code=result_code
-                    )
-
-                if result_code != ResultCodes.SUCCESS:
-                    message = response_data.get("ErrorMessage", "Неизвестная ошибка")
-                    raise KitAPIResponseError(
-                        f'Не удалось получить данные от Kit API, код ответа - {result_code}, текст ошибки: {message}',
-                        result_code=result_code
-                    )
-
-                return response_data
+                content = await response.read()
 
         except AioHTTPClientError as e:
             raise KitAPINetworkError(f"Ошибка сети: {e}") from e
-        except KitAPIResponseError:
-            raise
+        except asyncio.TimeoutError as e:
+            raise KitAPINetworkError("Превышено время ожидания ответа API") from e
         except Exception as e:
-            raise KitAPIError(f"Неожиданная ошибка при выполнении запроса: {e}") from e
+            raise KitAPIError(f"Неожиданная ошибка при выполнении запроса: {e!r}") from e
+
+        if trace is not None:
+            trace.time_to_first_byte += headers_at - sent_at - (trace.connect - connect_before)
+            trace.download += time.perf_counter() - headers_at
+            trace.request_bytes += len(body)
+            trace.response_bytes += len(content)
+        return content
+
+    def _decode(self, content: bytes) -> Mapping:
+        """Разобрать JSON тело ответа"""
+        trace = current_trace()
+        started = time.perf_counter()
+        try:
+            response_data = self._codec.loads(content)
+        except ValueError as e:
+            raise KitAPIResponseError(
+                f"Не удалось разобрать JSON ответ от API: {e}",
+                result_code=-1
+            )
+        if trace is not None:
+            trace.decode += time.perf_counter() - started
+        return response_data
+
+    def _check_result(self, response_data: Mapping, trace: RequestTrace | None = None) -> Mapping:
+        """
+        Проверить ResultCode ответа
+
+        Args:
+            response_data: Разобранный ответ
+            trace: Трасса вызова (по умолчанию - current_trace())
+        """
+        if not isinstance(response_data, Mapping) or 'ResultCode' not in response_data:
+            raise KitAPIResponseError(
+                "Ответ API не содержит поле ResultCode",
+                result_code=-1
+            )
+        result_code = response_data['ResultCode']
+
+        if trace is None:
+            trace = current_trace()
+        if trace is not None:
+            trace.result_code = result_code
+
+        if result_code == ResultCodes.TOO_MANY_REQUEST:
+            raise KitAPIRateLimitError(
+                f"Превышен лимит запросов к API. Код ответа: {result_code}",
+                result_code=result_code
+            )
+
+        if result_code in self._resync_result_codes:
+            # Отказ может быть вызван устаревшим RequestId - пересинхронизируем часы
+            self._invalidate_timestamp()
+
+        if result_code != ResultCodes.SUCCESS:
+            message = response_data.get("ErrorMessage", "Неизвестная ошибка")
+            raise KitAPIResponseError(
+                f'Не удалось получить данные от Kit API, код ответа - {result_code}, текст ошибки: {message}',
+                result_code=result_code
+            )
+
+        return response_data
+
+    async def warmup(self, connections: int | None = None) -> None:
+        """
+        Заранее открыть соединения с API (DNS, TCP и TLS) и синхронизировать
+        часы провайдера RequestId, чтобы первый запрос не тратил на это время.
+        Ошибки прогрева записываются в лог и не прерывают работу.
+
+        Args:
+            connections: Сколько соединений открыть
+                         (по умолчанию - prewarm_connections из ConnectionOptions, минимум 1)
+        """
+        session = await self._get_session()
+        count = connections or self._connection_options.prewarm_connections or 1
+
+        async def open_connection() -> None:
+            try:
+                async with session.head(self._base_url, headers=self._request_headers) as response:
+                    await response.read()
+            except (AioHTTPClientError, asyncio.TimeoutError) as e:
+                logging.warning(f"Не удалось заранее открыть соединение с Kit API: {e}")
+
+        await asyncio.gather(*(open_connection() for _ in range(count)))
+
+        if getattr(self._timestamp_provider, "is_synced", True) is False:
+            try:
+                await self._timestamp_provider.async_sync()
+            except KitAPIError as e:
+                logging.warning(f"Не удалось синхронизировать часы при прогреве: {e}")
 
     async def close(self):
         """Закрыть HTTP сессию, если она была создана клиентом"""
@@ -297,8 +1011,43 @@ class KitVendingAPIClient:
 
     async def __aenter__(self):
         """Асинхронный контекстный менеджер: вход"""
+        if self._connection_options.prewarm_connections:
+            await self.warmup()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Асинхронный контекстный менеджер: выход (закрытие сессии)"""
         await self.close()
+
+
+def _sales_filter(vending_machine_id: int, from_date: datetime, to_date: datetime) -> dict[str, Any]:
+    """Тело запроса /GetSales за окно (без авторизации)"""
+    return {
+        "Filter": {
+            "UpDate": ProjectTime.datetime_to_str_kit(from_date),
+            "ToDate": ProjectTime.datetime_to_str_kit(to_date),
+            "VendingMachineId": vending_machine_id,
+        }
+    }
+
+
+def _decode_and_validate(
+        codec: JSONCodec,
+        content: bytes,
+        model: type[ModelT],
+        validation: ValidationMode = ValidationMode.STRICT
+) -> tuple[Mapping | None, ModelT | None, float, float]:
+    """
+    Разобрать и провалидировать ответ вне event loop (в потоке или процессе).
+
+    Returns:
+        Для успешного ответа - (None, модель, время разбора, время валидации);
+        для ответа с ошибкой - (разобранный ответ, None, время разбора, 0)
+    """
+    started = time.perf_counter()
+    response = codec.loads(content)
+    decoded = time.perf_counter()
+    if not isinstance(response, dict) or response.get("ResultCode") != ResultCodes.SUCCESS:
+        return response, None, decoded - started, 0.0
+    result = validate_model(model, response, validation)
+    return None, result, decoded - started, time.perf_counter() - decoded
@@ -0,0 +1,130 @@
+"""
+JSON кодеки для тела запросов и ответов Kit API
+"""
+
+import json
+from typing import Any
+
+from kit_api.exceptions import KitAPIValidationError
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - зависит от окружения
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - зависит от окружения
+    msgspec = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover - зависит от окружения
+    ujson = None
+
+
+class JSONCodec:
+    """
+    Кодек JSON на стандартной библиотеке.
+
+    Кодеки работают с байтами: loads() принимает тело ответа из
+    response.read() без промежуточной строки, dumps() возвращает байты
+    для отправки. Ошибка разбора - ValueError.
+    """
+
+    name = "json"
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    """Кодек на orjson"""
+
+    name = "orjson"
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class MsgspecCodec(JSONCodec):
+    """Кодек на msgspec"""
+
+    name = "msgspec"
+
+    def __init__(self):
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+
+    def __reduce__(self):
+        # Кодер и декодер msgspec не сериализуются - пересоздаём их (для пула процессов)
+        return MsgspecCodec, ()
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj)
+
+    def loads(self, data: bytes) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+
+class UjsonCodec(JSONCodec):
+    """Кодек на ujson"""
+
+    name = "ujson"
+
+    def dumps(self, obj: Any) -> bytes:
+        return ujson.dumps(obj, ensure_ascii=False).encode()
+
+    def loads(self, data: bytes) -> Any:
+        return ujson.loads(data)
+
+
+# Кодеки в порядке предпочтения и признак доступности их библиотек
+_CODECS = {
+    OrjsonCodec.name: (OrjsonCodec, orjson is not None),
+    MsgspecCodec.name: (MsgspecCodec, msgspec is not None),
+    UjsonCodec.name: (UjsonCodec, ujson is not None),
+    JSONCodec.name: (JSONCodec, True),
+}
+
+
+def available_codecs() -> list[str]:
+    """Имена кодеков, библиотеки которых установлены (в порядке предпочтения)"""
+    return [name for name, (_, installed) in _CODECS.items() if installed]
+
+
+def get_codec(codec: str | JSONCodec | None = None) -> JSONCodec:
+    """
+    Получить JSON кодек
+
+    Args:
+        codec: Имя кодека ("orjson", "msgspec", "ujson", "json"), готовый кодек
+               или None - самый быстрый из установленных
+
+    Returns:
+        JSONCodec: Кодек
+
+    Raises:
+        KitAPIValidationError: Неизвестный кодек или его библиотека не установлена
+    """
+    if isinstance(codec, JSONCodec):
+        return codec
+    if codec is None:
+        codec = available_codecs()[0]
+
+    try:
+        codec_class, installed = _CODECS[codec]
+    except KeyError:
+        raise KitAPIValidationError(f"Неизвестный JSON кодек: {codec}")
+    if not installed:
+        raise KitAPIValidationError(f"Библиотека JSON кодека {codec} не установлена")
+    return codec_class()
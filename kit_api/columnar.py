@@ -0,0 +1,393 @@
+"""
+Колоночное представление продаж Kit API
+"""
+
+from array import array
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Iterable, Iterator, Mapping
+
+from kit_api.exceptions import KitAPIValidationError
+from kit_api.models.sales import (
+    SALE_TAG_DRINK,
+    SALE_TAG_PRODUCT,
+    BaseSaleModel,
+    ProductSaleModel,
+    RecipeDrinkSaleModel,
+    SalesCollection,
+    row_sale_kind,
+)
+from kit_api.project_time import ProjectTime
+from kit_api.validation import LazyList
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - зависит от окружения
+    numpy = None
+
+try:
+    import pyarrow
+    import pyarrow.compute
+except ImportError:  # pragma: no cover - зависит от окружения
+    pyarrow = None
+
+
+class SalesFormat(str, Enum):
+    """
+    Представление результата get_sales
+
+    MODELS - SalesCollection с моделями pydantic.
+    TABLE - колоночная SalesTable.
+    RECORDS - список компактных записей SaleRecord (kit_api.records).
+    """
+    MODELS = "models"
+    TABLE = "table"
+    RECORDS = "records"
+
+
+def resolve_sales_format(sales_format: SalesFormat | str) -> SalesFormat:
+    """
+    Привести представление продаж к SalesFormat
+
+    Raises:
+        KitAPIValidationError: Неизвестное представление
+    """
+    try:
+        return SalesFormat(sales_format)
+    except ValueError:
+        raise KitAPIValidationError(f"Неизвестное представление продаж: {sales_format}")
+
+
+# Значения колонки kind
+SALE_KIND_OTHER = 0
+SALE_KIND_PRODUCT = 1
+SALE_KIND_DRINK = 2
+
+# Нет значения в целочисленной колонке (recipe_id, коды строк)
+NULL = -1
+
+# Числовые колонки и их типы array
+_NUMERIC_COLUMNS = {
+    "line": "q",
+    "price": "d",
+    "timestamp": "q",
+    "vending_machine_id": "q",
+    "matrix_id": "q",
+    "recipe_id": "q",
+    "kind": "b",
+}
+# Строковые колонки (хранятся кодами словаря)
+_STRING_COLUMNS = ("vending_machine_name", "product_name")
+
+
+class StringDictionary:
+    """Словарь строковой колонки: каждое значение хранится один раз, строки - кодами"""
+
+    __slots__ = ("values", "_codes")
+
+    def __init__(self):
+        self.values: list[str] = []
+        self._codes: dict[str, int] = {}
+
+    def encode(self, value: str | None) -> int:
+        """Код значения (NULL для None)"""
+        if value is None:
+            return NULL
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def decode(self, code: int) -> str | None:
+        """Значение по коду"""
+        return self.values[code] if code != NULL else None
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class SalesTable:
+    """
+    Продажи в колонках: типизированные массивы вместо объекта на каждую продажу.
+
+    Числовые колонки - array.array (line, price, timestamp - секунды Unix,
+    vending_machine_id, matrix_id, recipe_id, kind), строковые - коды
+    StringDictionary. Строка таблицы материализуется по запросу как
+    SaleRowView (table[i]) или модель (row.to_model()).
+    """
+
+    def __init__(self):
+        for name, typecode in _NUMERIC_COLUMNS.items():
+            setattr(self, name, array(typecode))
+        self.dictionaries = {name: StringDictionary() for name in _STRING_COLUMNS}
+        self.codes = {name: array("q") for name in _STRING_COLUMNS}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Mapping[str, Any]]) -> "SalesTable":
+        """
+        Построить таблицу из записей ответа /GetSales (поле Sales)
+
+        Raises:
+            ValueError: Запись не соответствует формату Kit API
+        """
+        table = cls()
+        for row in rows:
+            table.append_row(row)
+        return table
+
+    @classmethod
+    def from_sales(cls, sales: Iterable[BaseSaleModel]) -> "SalesTable":
+        """Построить таблицу из моделей продаж"""
+        table = cls()
+        for sale in sales:
+            table.append_sale(sale)
+        return table
+
+    @classmethod
+    def from_collection(cls, collection: SalesCollection) -> "SalesTable":
+        """
+        Построить таблицу из коллекции продаж. Для ленивой коллекции
+        (ValidationMode.LAZY) таблица строится из исходных записей без построения моделей
+        """
+        if isinstance(collection.items, LazyList):
+            return cls.from_rows(collection.items.raw)
+        return cls.from_sales(collection.items)
+
+    def append_row(self, row: Mapping[str, Any]) -> None:
+        """Добавить запись ответа /GetSales"""
+        try:
+            sale_kind = row_sale_kind(row)
+            if sale_kind == SALE_TAG_PRODUCT:
+                kind, product_name, recipe_id = SALE_KIND_PRODUCT, str(row["GoodsName"]), NULL
+            elif sale_kind == SALE_TAG_DRINK:
+                kind, product_name, recipe_id = SALE_KIND_DRINK, None, int(row["FormulationId"])
+            else:
+                kind, product_name, recipe_id = SALE_KIND_OTHER, None, NULL
+            self._append(
+                int(row["LineNumber"]),
+                float(row["Sum"]),
+                int(ProjectTime.datetime_from_str_kit(row["DateTime"]).timestamp()),
+                int(row["VendingMachine"]),
+                str(row["VendingMachineName"]),
+                int(row["MatrixId"]),
+                kind,
+                product_name,
+                recipe_id,
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Некорректная запись продажи: {e!r}") from e
+
+    def append_sale(self, sale: BaseSaleModel) -> None:
+        """Добавить модель продажи"""
+        if isinstance(sale, ProductSaleModel):
+            kind, product_name, recipe_id = SALE_KIND_PRODUCT, sale.product_name, NULL
+        elif isinstance(sale, RecipeDrinkSaleModel):
+            kind, product_name, recipe_id = SALE_KIND_DRINK, None, sale.recipe_id
+        else:
+            kind, product_name, recipe_id = SALE_KIND_OTHER, None, NULL
+        self._append(
+            sale.line,
+            sale.price,
+            int(ProjectTime.to_project_timezone(sale.timestamp).timestamp()),
+            sale.vending_machine_id,
+            sale.vending_machine_name,
+            sale.matrix_id,
+            kind,
+            product_name,
+            recipe_id,
+        )
+
+    def _append(
+            self,
+            line: int,
+            price: float,
+            timestamp: int,
+            vending_machine_id: int,
+            vending_machine_name: str,
+            matrix_id: int,
+            kind: int,
+            product_name: str | None,
+            recipe_id: int
+    ) -> None:
+        self.line.append(line)
+        self.price.append(price)
+        self.timestamp.append(timestamp)
+        self.vending_machine_id.append(vending_machine_id)
+        self.matrix_id.append(matrix_id)
+        self.kind.append(kind)
+        self.recipe_id.append(recipe_id)
+        self.codes["vending_machine_name"].append(
+            self.dictionaries["vending_machine_name"].encode(vending_machine_name)
+        )
+        self.codes["product_name"].append(self.dictionaries["product_name"].encode(product_name))
+
+    def __len__(self) -> int:
+        return len(self.line)
+
+    def __getitem__(self, index: int) -> "SaleRowView":
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Индекс продажи вне таблицы")
+        return SaleRowView(self, index)
+
+    def __iter__(self) -> Iterator["SaleRowView"]:
+        for index in range(len(self)):
+            yield SaleRowView(self, index)
+
+    def column(self, name: str) -> array | list:
+        """
+        Колонка таблицы: array.array для числовых колонок,
+        список значений для строковых (материализуется)
+        """
+        if name in _STRING_COLUMNS:
+            decode = self.dictionaries[name].decode
+            return [decode(code) for code in self.codes[name]]
+        if name not in _NUMERIC_COLUMNS:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    @property
+    def nbytes(self) -> int:
+        """Размер массивов колонок в байтах (без словарей строк)"""
+        arrays = [getattr(self, name) for name in _NUMERIC_COLUMNS] + list(self.codes.values())
+        return sum(len(column) * column.itemsize for column in arrays)
+
+    def to_models(self) -> SalesCollection:
+        """Материализовать все продажи в коллекцию моделей"""
+        return SalesCollection.model_construct(items=[row.to_model() for row in self])
+
+    def to_numpy(self) -> dict[str, Any]:
+        """
+        Колонки как массивы NumPy без копирования данных. Строковые колонки
+        передаются кодами (<колонка>_code), значения - в dictionaries
+
+        Массивы ссылаются на буферы колонок: пока они существуют, append_row()
+        и append_sale() выбрасывают BufferError (array.array нельзя расширить).
+
+        Raises:
+            ImportError: NumPy не установлен
+        """
+        if numpy is None:
+            raise ImportError("Для to_numpy() установите numpy")
+        result = {
+            name: numpy.frombuffer(getattr(self, name), dtype=getattr(self, name).typecode)
+            for name in _NUMERIC_COLUMNS
+        }
+        for name in _STRING_COLUMNS:
+            result[f"{name}_code"] = numpy.frombuffer(self.codes[name], dtype="q")
+        return result
+
+    def to_arrow(self) -> Any:
+        """
+        Таблица pyarrow. Числовые колонки и коды строк передаются без копирования;
+        строковые колонки - словарные (DictionaryArray), время - timestamp[s] с часовым поясом проекта
+
+        Таблица pyarrow ссылается на буферы колонок: пока она существует, append_row()
+        и append_sale() выбрасывают BufferError (array.array нельзя расширить).
+
+        Raises:
+            ImportError: pyarrow не установлен
+        """
+        if pyarrow is None:
+            raise ImportError("Для to_arrow() установите pyarrow")
+        types = {"q": pyarrow.int64(), "d": pyarrow.float64(), "b": pyarrow.int8()}
+        length = len(self)
+
+        def wrap(column: array, arrow_type, validity=None) -> Any:
+            return pyarrow.Array.from_buffers(arrow_type, length, [validity, pyarrow.py_buffer(column)])
+
+        columns = {}
+        for name, typecode in _NUMERIC_COLUMNS.items():
+            if name == "timestamp":
+                timezone_name = str(ProjectTime.now().tzinfo)
+                columns[name] = wrap(self.timestamp, pyarrow.timestamp("s", tz=timezone_name))
+            else:
+                columns[name] = wrap(getattr(self, name), types[typecode])
+        for name in _STRING_COLUMNS:
+            codes = wrap(self.codes[name], pyarrow.int64())
+            # Коды NULL - пропуски: битовая маска валидности строится, буфер кодов не копируется
+            valid = pyarrow.compute.not_equal(codes, NULL)
+            columns[name] = pyarrow.DictionaryArray.from_arrays(
+                wrap(self.codes[name], pyarrow.int64(), valid.buffers()[1]),
+                pyarrow.array(self.dictionaries[name].values, type=pyarrow.string()),
+            )
+        return pyarrow.table(columns)
+
+
+class SaleRowView:
+    """Строка SalesTable: значения читаются из колонок при обращении"""
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: SalesTable, index: int):
+        self._table = table
+        self._index = index
+
+    @property
+    def line(self) -> int:
+        return self._table.line[self._index]
+
+    @property
+    def price(self) -> float:
+        return self._table.price[self._index]
+
+    @property
+    def timestamp(self) -> datetime:
+        return ProjectTime.to_project_timezone(
+            datetime.fromtimestamp(self._table.timestamp[self._index], timezone.utc)
+        )
+
+    @property
+    def vending_machine_id(self) -> int:
+        return self._table.vending_machine_id[self._index]
+
+    @property
+    def vending_machine_name(self) -> str:
+        table = self._table
+        return table.dictionaries["vending_machine_name"].decode(table.codes["vending_machine_name"][self._index])
+
+    @property
+    def matrix_id(self) -> int:
+        return self._table.matrix_id[self._index]
+
+    @property
+    def kind(self) -> int:
+        """Вид продажи: SALE_KIND_PRODUCT, SALE_KIND_DRINK или SALE_KIND_OTHER"""
+        return self._table.kind[self._index]
+
+    @property
+    def product_name(self) -> str | None:
+        table = self._table
+        return table.dictionaries["product_name"].decode(table.codes["product_name"][self._index])
+
+    @property
+    def recipe_id(self) -> int | None:
+        recipe_id = self._table.recipe_id[self._index]
+        return recipe_id if recipe_id != NULL else None
+
+    @property
+    def key(self) -> tuple:
+        """Ключ продажи, как у соответствующей модели"""
+        return self.to_model().key
+
+    def to_model(self) -> BaseSaleModel:
+        """Материализовать строку в модель продажи"""
+        fields = dict(
+            line=self.line,
+            price=self.price,
+            timestamp=self.timestamp,
+            vending_machine_id=self.vending_machine_id,
+            vending_machine_name=self.vending_machine_name,
+            matrix_id=self.matrix_id,
+        )
+        kind = self.kind
+        if kind == SALE_KIND_PRODUCT:
+            return ProductSaleModel.model_construct(product_name=self.product_name, **fields)
+        if kind == SALE_KIND_DRINK:
+            return RecipeDrinkSaleModel.model_construct(recipe_id=self.recipe_id, **fields)
+        return BaseSaleModel.model_construct(**fields)
+
+    def __repr__(self) -> str:
+        return f"SaleRowView({self.to_model()!r})"
@@ -0,0 +1,100 @@
+"""
+Настройки HTTP соединений с Kit API
+"""
+
+from dataclasses import dataclass
+from typing import Sequence
+
+import aiohttp
+
+try:
+    from aiohttp.compression_utils import HAS_BROTLI
+except ImportError:  # pragma: no cover - старые версии aiohttp
+    HAS_BROTLI = False
+
+
+@dataclass
+class ConnectionOptions:
+    """
+    Параметры пула соединений, таймаутов и сжатия ответов.
+
+    Ответы /GetSales - большие и однообразные JSON, поэтому сжатие (gzip,
+    deflate и br, если установлен Brotli) включено по умолчанию.
+    """
+    # Максимальное число соединений в пуле (0 - без ограничения)
+    limit: int = 100
+    # Максимальное число соединений с одним хостом (0 - без ограничения)
+    limit_per_host: int = 10
+    # Сколько секунд держать неиспользуемое соединение открытым
+    keepalive_timeout: float = 30.0
+    # Время жизни записей DNS кэша в секундах (None - без истечения)
+    ttl_dns_cache: int | None = 300
+    # Общий таймаут запроса в секундах (None - без ограничения)
+    total_timeout: float | None = 120.0
+    # Таймаут получения соединения из пула и его установки
+    connect_timeout: float | None = 10.0
+    # Таймаут чтения очередной порции ответа
+    read_timeout: float | None = 60.0
+    # Запрашивать сжатые ответы
+    compress_responses: bool = True
+    # Сколько соединений открыть заранее при входе в async with клиента (0 - не открывать)
+    prewarm_connections: int = 0
+
+    @property
+    def accept_encoding(self) -> str:
+        """Значение заголовка Accept-Encoding"""
+        if not self.compress_responses:
+            return "identity"
+        return "gzip, deflate, br" if HAS_BROTLI else "gzip, deflate"
+
+    @property
+    def headers(self) -> dict[str, str]:
+        """Заголовки, добавляемые к каждому запросу"""
+        return {"Accept-Encoding": self.accept_encoding}
+
+    def create_connector(self) -> aiohttp.TCPConnector:
+        """Создать коннектор с пулом соединений"""
+        return aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            use_dns_cache=True,
+            ttl_dns_cache=self.ttl_dns_cache,
+        )
+
+    def create_timeout(self) -> aiohttp.ClientTimeout:
+        """Создать таймауты запроса"""
+        return aiohttp.ClientTimeout(
+            total=self.total_timeout,
+            connect=self.connect_timeout,
+            sock_read=self.read_timeout,
+        )
+
+    def create_stream_timeout(self) -> aiohttp.ClientTimeout:
+        """
+        Таймауты потокового запроса: без общего таймаута, потому что тело читается
+        в темпе потребителя. Ожидание сервера ограничивает read_timeout - пока
+        чтение приостановлено потребителем, он не отсчитывается
+        """
+        return aiohttp.ClientTimeout(
+            total=None,
+            connect=self.connect_timeout,
+            sock_read=self.read_timeout,
+        )
+
+    def create_session(
+            self,
+            trace_configs: Sequence[aiohttp.TraceConfig] | None = None
+    ) -> aiohttp.ClientSession:
+        """
+        Создать HTTP сессию с этими параметрами
+
+        Args:
+            trace_configs: TraceConfig aiohttp для трассировки соединений
+        """
+        return aiohttp.ClientSession(
+            connector=self.create_connector(),
+            timeout=self.create_timeout(),
+            headers=self.headers,
+            trace_configs=list(trace_configs) if trace_configs else None,
+        )
@@ -13,11 +13,6 @@ class KitAPIAuthError(KitAPIError):
     pass
 
 
-class KitAPIRateLimitError(KitAPIError):
-    """Ошибка превышения лимита запросов"""
-    pass
-
-
 class KitAPIResponseError(KitAPIError):
     """Ошибка ответа от API"""
     def __init__(self, message: str, result_code: int):
@@ -25,6 +20,12 @@ class KitAPIResponseError(KitAPIError):
         super().__init__(message)
 
 
+class KitAPIRateLimitError(KitAPIResponseError):
+    """Ошибка превышения лимита запросов (ResultCode 27)"""
+    def __init__(self, message: str, result_code: int = 27):
+        super().__init__(message, result_code)
+
+
 class KitAPINetworkError(KitAPIError):
     """Ошибка сети"""
     pass
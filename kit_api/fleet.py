@@ -0,0 +1,86 @@
+"""
+Результаты массовых запросов по парку торговых автоматов
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Iterable
+
+from kit_api.models import SalesCollection, VendingMachinesCollection
+
+
+@dataclass
+class SalesFetchProgress:
+    """Прогресс массовой загрузки продаж после обработки одного автомата"""
+    vending_machine_id: int
+    completed: int
+    total: int
+    sales: SalesCollection | None = None
+    error: Exception | None = None
+
+
+SalesProgressCallback = Callable[[SalesFetchProgress], None]
+
+
+@dataclass
+class FleetSalesResult:
+    """Результат загрузки продаж по нескольким торговым автоматам"""
+    sales: dict[int, SalesCollection] = field(default_factory=dict)
+    errors: dict[int, Exception] = field(default_factory=dict)
+
+    @property
+    def is_complete(self) -> bool:
+        """Проверить, что продажи получены по всем автоматам"""
+        return not self.errors
+
+    def merged(self) -> SalesCollection:
+        """Объединить продажи всех успешно обработанных автоматов в одну коллекцию"""
+        return SalesCollection.merge(self.sales.values())
+
+
+def resolve_machine_ids(vending_machines: Iterable[int] | VendingMachinesCollection) -> list[int]:
+    """Получить список уникальных ID автоматов с сохранением порядка"""
+    if isinstance(vending_machines, VendingMachinesCollection):
+        return [machine.id for machine in vending_machines.items]
+    return list(dict.fromkeys(vending_machines))
+
+
+async def gather_sales(
+        machine_ids: list[int],
+        fetch: Callable[[int], Awaitable[SalesCollection]],
+        max_concurrency: int,
+        on_progress: SalesProgressCallback | None = None
+) -> FleetSalesResult:
+    """
+    Конкурентно выполнить fetch для каждого автомата, собирая продажи и ошибки
+
+    Args:
+        machine_ids: ID торговых автоматов
+        fetch: Корутина загрузки продаж одного автомата
+        max_concurrency: Максимальное число одновременных загрузок
+        on_progress: Callback, вызываемый после обработки каждого автомата
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    result = FleetSalesResult()
+    total = len(machine_ids)
+
+    async def run(machine_id: int) -> None:
+        async with semaphore:
+            try:
+                sales = await fetch(machine_id)
+            except Exception as e:
+                # Любая ошибка автомата (API, валидация ответа, таймаут) не прерывает
+                # загрузку остальных; отмена (CancelledError) пробрасывается
+                result.errors[machine_id] = e
+                progress = SalesFetchProgress(machine_id, 0, total, error=e)
+            else:
+                result.sales[machine_id] = sales
+                progress = SalesFetchProgress(machine_id, 0, total, sales=sales)
+
+        if on_progress is not None:
+            progress.completed = len(result.sales) + len(result.errors)
+            on_progress(progress)
+
+    await asyncio.gather(*(run(machine_id) for machine_id in machine_ids))
+
+    return result
@@ -22,6 +22,7 @@ from kit_api.models.recipes import (
 )
 from kit_api.models.sales import (
     SalesCollection,
+    SaleType,
     ProductSaleModel,
     RecipeDrinkSaleModel
 )
@@ -49,6 +50,7 @@ __all__ = [
     "RecipeKitModel",
     # Sales
     "SalesCollection",
+    "SaleType",
     "ProductSaleModel",
     "RecipeDrinkSaleModel",
     # Vending Machines
@@ -3,7 +3,9 @@
 """
 
 import logging
-from pydantic import BaseModel
+from typing import Any, Callable, Hashable, Iterable
+
+from pydantic import BaseModel, PrivateAttr
 
 
 class ProductModel(BaseModel):
@@ -50,3 +52,55 @@ class ProductModel(BaseModel):
         )
         return cls(name=val.strip(), code=None)
 
+
+class IndexedCollection(BaseModel):
+    """
+    Коллекция с индексами по items, которые строятся при первом обращении и кэшируются.
+
+    Индексы сбрасываются, когда items заменяется другим списком (присваиванием,
+    model_copy(update=...)); изменения списка на месте не отслеживаются.
+    """
+    _indexes: dict[str, dict] = PrivateAttr(default_factory=dict)
+    _indexed_items: Any = PrivateAttr(default=None)
+
+    def __eq__(self, other: Any) -> bool:
+        # Построенные индексы (приватные атрибуты) не участвуют в сравнении
+        if not isinstance(other, BaseModel):
+            return NotImplemented
+        return (
+            type(self) is type(other)
+            and self.__dict__ == other.__dict__
+            and self.__pydantic_extra__ == other.__pydantic_extra__
+        )
+
+    def _index(self, name: str, key: Callable[[Any], Hashable]) -> dict:
+        """Индекс элемента по ключу (при повторе ключа - первый элемент)"""
+        return self._cached_index(name, lambda items: _unique_index(items, key))
+
+    def _group_index(self, name: str, key: Callable[[Any], Hashable]) -> dict:
+        """Индекс кортежей элементов по ключу"""
+        return self._cached_index(name, lambda items: _group_index(items, key))
+
+    def _cached_index(self, name: str, build: Callable[[Iterable], dict]) -> dict:
+        items = self.items
+        if self._indexed_items is not items:
+            self._indexes = {}
+            self._indexed_items = items
+        index = self._indexes.get(name)
+        if index is None:
+            index = self._indexes[name] = build(items)
+        return index
+
+
+def _unique_index(items: Iterable, key: Callable[[Any], Hashable]) -> dict:
+    index = {}
+    for item in items:
+        index.setdefault(key(item), item)
+    return index
+
+
+def _group_index(items: Iterable, key: Callable[[Any], Hashable]) -> dict:
+    groups = {}
+    for item in items:
+        groups.setdefault(key(item), []).append(item)
+    return {value: tuple(group) for value, group in groups.items()}
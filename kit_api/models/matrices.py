@@ -6,6 +6,7 @@ from typing import Literal, Union, Annotated
 from pydantic import BaseModel, Field, Tag
 
 from kit_api.models.cells import GoodsCell, BaseMatrixCell, RecipeCell
+from kit_api.models.common import IndexedCollection
 
 
 class MatrixKitModel(BaseModel):
@@ -38,7 +39,7 @@ MatrixType = Annotated[
 ]
 
 
-class MatricesKitCollection(BaseModel):
+class MatricesKitCollection(IndexedCollection):
     items: Annotated[list[MatrixType], Field(validation_alias="GoodsMatrices")]
 
     def get_snack_matrices(self) -> list[GoodsMatrixKitModel]:
@@ -51,3 +52,24 @@ class MatricesKitCollection(BaseModel):
 
     def get_all_matrices(self) -> list[MatrixKitModel]:
         return self.items.copy()
+
+    def get_by_id(self, matrix_id: int) -> MatrixKitModel | None:
+        """Матрица по ID"""
+        return self._index("id", lambda item: item.id).get(matrix_id)
+
+    def get_by_type(self, matrix_type: int) -> tuple[MatrixKitModel, ...]:
+        """Матрицы типа matrix_type (1 - товары, 2 - рецепты, 3 - комбо)"""
+        return self._group_index("type", lambda item: item.type).get(matrix_type, ())
+
+    def get_cell(self, matrix_id: int, line_number: int) -> BaseMatrixCell | None:
+        """Ячейка матрицы по номеру линии (при повторе номера - первая в матрице)"""
+        cells = self._cached_index("cells", _index_cells)
+        return cells.get((matrix_id, line_number))
+
+
+def _index_cells(matrices) -> dict[tuple[int, int], BaseMatrixCell]:
+    cells = {}
+    for matrix in matrices:
+        for cell in matrix.cells:
+            cells.setdefault((matrix.id, cell.line_number), cell)
+    return cells
@@ -5,6 +5,8 @@
 from typing import Annotated
 from pydantic import BaseModel, Field
 
+from kit_api.models.common import IndexedCollection
+
 
 class ProductKitModel(BaseModel):
     """Модель товара из Kit API"""
@@ -12,9 +14,17 @@ class ProductKitModel(BaseModel):
     name: Annotated[str, Field(validation_alias="GoodsName")]
 
 
-class ProductsKitCollection(BaseModel):
+class ProductsKitCollection(IndexedCollection):
     """Коллекция товаров из Kit API"""
     items: Annotated[list[ProductKitModel], Field(validation_alias="Goods")]
 
     def get_all(self) -> list[ProductKitModel]:
         return self.items.copy()
+
+    def get_by_id(self, product_id: int) -> ProductKitModel | None:
+        """Товар по ID"""
+        return self._index("id", lambda item: item.id).get(product_id)
+
+    def get_by_name(self, name: str) -> ProductKitModel | None:
+        """Товар по названию (при повторе названия - первый в коллекции)"""
+        return self._index("name", lambda item: item.name).get(name)
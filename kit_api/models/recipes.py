@@ -2,6 +2,8 @@ from typing import Annotated
 
 from pydantic import BaseModel, Field
 
+from kit_api.models.common import IndexedCollection
+
 
 class RecipeKitModel(BaseModel):
     """Модель рецепта из Kit API"""
@@ -9,9 +11,17 @@ class RecipeKitModel(BaseModel):
     name: Annotated[str, Field(validation_alias="FormulationName")]
 
 
-class RecipesKitCollection(BaseModel):
+class RecipesKitCollection(IndexedCollection):
     """Коллекция рецептов из Kit API"""
     items: Annotated[list[RecipeKitModel], Field(validation_alias="Formulations")]
 
     def get_all(self) -> list[RecipeKitModel]:
         return self.items.copy()
+
+    def get_by_id(self, recipe_id: int) -> RecipeKitModel | None:
+        """Рецепт по ID"""
+        return self._index("id", lambda item: item.id).get(recipe_id)
+
+    def get_by_name(self, name: str) -> RecipeKitModel | None:
+        """Рецепт по названию (при повторе названия - первый в коллекции)"""
+        return self._index("name", lambda item: item.name).get(name)
@@ -1,7 +1,11 @@
+import sys
 from datetime import datetime
-from typing import Annotated
+from typing import Annotated, Any, Iterable, Mapping, Union
 
-from pydantic import BaseModel, Field, BeforeValidator
+from pydantic import BaseModel, Field, BeforeValidator, Discriminator, Tag
+
+from kit_api.project_time import ProjectTime
+from kit_api.validation import LazyList
 
 
 class BaseSaleModel(BaseModel):
@@ -11,7 +15,7 @@ class BaseSaleModel(BaseModel):
         datetime,
         Field(validation_alias="DateTime"),
         BeforeValidator(
-            lambda val: datetime.strptime(val, "%d.%m.%Y %H:%M:%S")
+            lambda val: ProjectTime.datetime_from_str_kit(val) if isinstance(val, str) else val
         )
     ]
 
@@ -19,17 +23,94 @@ class BaseSaleModel(BaseModel):
     vending_machine_name: Annotated[str, Field(validation_alias="VendingMachineName")]
     matrix_id: Annotated[int, Field(validation_alias="MatrixId")]
 
+    @property
+    def key(self) -> tuple:
+        """Ключ продажи для устранения дублей при объединении выгрузок"""
+        return self.vending_machine_id, self.timestamp, self.line, self.price, self.matrix_id
+
 
 class RecipeDrinkSaleModel(BaseSaleModel):
     recipe_id: Annotated[int, Field(validation_alias="FormulationId")]
 
+    @property
+    def key(self) -> tuple:
+        return *super().key, self.recipe_id
+
 
 class ProductSaleModel(BaseSaleModel):
     product_name: Annotated[str, Field(validation_alias="GoodsName")]
 
+    @property
+    def key(self) -> tuple:
+        return *super().key, self.product_name
+
+
+SALE_TAG_PRODUCT = "product"
+SALE_TAG_DRINK = "drink"
+SALE_TAG_OTHER = "sale"
+
+
+def row_sale_kind(row: Mapping[str, Any]) -> str:
+    """
+    Вид продажи по записи ответа /GetSales: товар (GoodsName) или напиток (FormulationId).
+    Поле со значением null не учитывается: запись напитка может содержать "GoodsName": null.
+    Общий для моделей, записей и колоночной таблицы, чтобы вид продажи не расходился
+    """
+    if row.get("GoodsName") is not None:
+        return SALE_TAG_PRODUCT
+    if row.get("FormulationId") is not None:
+        return SALE_TAG_DRINK
+    return SALE_TAG_OTHER
+
+
+def _sale_kind(value: Any) -> str:
+    """
+    Вид продажи по полям записи или по классу модели.
+    Выбирает модель без пробной валидации каждого варианта объединения.
+    """
+    if isinstance(value, dict):
+        return row_sale_kind(value)
+    if isinstance(value, ProductSaleModel):
+        return SALE_TAG_PRODUCT
+    if isinstance(value, RecipeDrinkSaleModel):
+        return SALE_TAG_DRINK
+    return SALE_TAG_OTHER
+
+
+SaleType = Annotated[
+    Union[
+        Annotated[ProductSaleModel, Tag(SALE_TAG_PRODUCT)],
+        Annotated[RecipeDrinkSaleModel, Tag(SALE_TAG_DRINK)],
+        Annotated[BaseSaleModel, Tag(SALE_TAG_OTHER)],
+    ],
+    Discriminator(_sale_kind)
+]
+
+
+def intern_sale_strings(rows: Any) -> Any:
+    """
+    Интернировать названия автоматов и товаров в записях ответа /GetSales (на месте).
+
+    Кодек создаёт отдельную строку для каждой записи; после интернирования все продажи
+    с одним названием - в ответе и в других окнах выгрузки - ссылаются на один объект.
+    """
+    if not isinstance(rows, list):
+        return rows
+    intern = sys.intern
+    for row in rows:
+        if type(row) is not dict:
+            continue
+        name = row.get("VendingMachineName")
+        if type(name) is str:
+            row["VendingMachineName"] = intern(name)
+        name = row.get("GoodsName")
+        if type(name) is str:
+            row["GoodsName"] = intern(name)
+    return rows
+
 
 class SalesCollection(BaseModel):
-    items: Annotated[list[BaseSaleModel], Field(validation_alias="Sales")]
+    items: Annotated[list[SaleType], Field(validation_alias="Sales"), BeforeValidator(intern_sale_strings)]
 
     def get_product_sales(self) -> list[ProductSaleModel]:
         return [sale for sale in self.items if isinstance(sale, ProductSaleModel)]
@@ -39,3 +120,32 @@ class SalesCollection(BaseModel):
 
     def get_all(self) -> list[BaseSaleModel]:
         return self.items.copy()
+
+    @classmethod
+    def merge(cls, collections: Iterable["SalesCollection"]) -> "SalesCollection":
+        """Объединить несколько коллекций продаж в одну, упорядоченную по времени и без дублей"""
+        collections = list(collections)
+        if collections and all(isinstance(collection.items, LazyList) for collection in collections):
+            return cls._merge_lazy(collections)
+
+        unique = {}
+        for collection in collections:
+            for sale in collection.items:
+                unique.setdefault(sale.key, sale)
+        items = sorted(unique.values(), key=lambda sale: sale.timestamp)
+        # Записи уже провалидированы - собираем коллекцию без повторной валидации
+        return cls.model_construct(items=items)
+
+    @classmethod
+    def _merge_lazy(cls, collections: list["SalesCollection"]) -> "SalesCollection":
+        """Объединить ленивые коллекции по исходным записям, не валидируя их"""
+        unique = {}
+        for collection in collections:
+            for row in collection.items.raw:
+                unique.setdefault(tuple(row.get(alias) for alias in _RAW_KEY_FIELDS), row)
+        rows = sorted(unique.values(), key=lambda row: ProjectTime.datetime_from_str_kit(row["DateTime"]))
+        return cls.model_construct(items=collections[0].items.with_raw(rows))
+
+
+# Поля исходной записи, соответствующие BaseSaleModel.key и ключам подклассов
+_RAW_KEY_FIELDS = ("VendingMachine", "DateTime", "LineNumber", "Sum", "MatrixId", "FormulationId", "GoodsName")
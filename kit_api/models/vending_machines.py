@@ -6,6 +6,8 @@ from typing import Annotated
 
 from pydantic import BaseModel, Field
 
+from kit_api.models.common import IndexedCollection
+
 
 class VendingMachineModel(BaseModel):
     """Модель торгового автомата из Kit API"""
@@ -15,9 +17,21 @@ class VendingMachineModel(BaseModel):
     number: Annotated[int, Field(validation_alias="AutomatNumber")]
 
 
-class VendingMachinesCollection(BaseModel):
+class VendingMachinesCollection(IndexedCollection):
     """Коллекция торговых автоматов из Kit API"""
     items: Annotated[list[VendingMachineModel], Field(validation_alias="VendingMachines")]
 
     def get_all(self) -> list[VendingMachineModel]:
         return self.items.copy()
+
+    def get_by_id(self, vending_machine_id: int) -> VendingMachineModel | None:
+        """Торговый автомат по ID"""
+        return self._index("id", lambda item: item.id).get(vending_machine_id)
+
+    def get_by_number(self, number: int) -> VendingMachineModel | None:
+        """Торговый автомат по номеру"""
+        return self._index("number", lambda item: item.number).get(number)
+
+    def get_by_matrix_id(self, matrix_id: int) -> tuple[VendingMachineModel, ...]:
+        """Торговые автоматы с матрицей товаров matrix_id"""
+        return self._group_index("matrix_id", lambda item: item.matrix_id).get(matrix_id, ())
@@ -0,0 +1,205 @@
+"""
+Пул клиентов Kit API для нескольких компаний (учётных данных)
+"""
+
+import asyncio
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Hashable
+
+import aiohttp
+
+from kit_api.client import KitVendingAPIClient
+from kit_api.connection import ConnectionOptions
+from kit_api.exceptions import KitAPIValidationError
+
+
+class _FairScheduler:
+    """
+    Ограничивает число одновременных операций и выдаёт освободившиеся места
+    арендаторам по кругу, чтобы один арендатор с большой очередью не занимал
+    все места.
+    """
+
+    def __init__(self, limit: int):
+        self._limit = limit
+        self._active = 0
+        self._queues: OrderedDict[Hashable, deque[asyncio.Future]] = OrderedDict()
+
+    async def acquire(self, tenant: Hashable) -> None:
+        if self._active < self._limit and not self._queues:
+            self._active += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(tenant, deque()).append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Место уже выдано, но задача отменена - отдаём его следующему
+                self.release()
+            else:
+                queue = self._queues.get(tenant)
+                # Отменённое ожидание могло быть уже снято с очереди в _grant()
+                if queue is not None and waiter in queue:
+                    queue.remove(waiter)
+                    if not queue:
+                        del self._queues[tenant]
+                self._grant()
+            raise
+
+    def release(self) -> None:
+        self._active -= 1
+        self._grant()
+
+    def _grant(self) -> None:
+        while self._active < self._limit and self._queues:
+            tenant, queue = next(iter(self._queues.items()))
+            waiter = queue.popleft()
+            if queue:
+                self._queues.move_to_end(tenant)
+            else:
+                del self._queues[tenant]
+            if waiter.done():
+                continue
+            self._active += 1
+            waiter.set_result(None)
+
+
+class KitClientPool:
+    """
+    Пул клиентов для нескольких наборов учётных данных (login, company_id).
+
+    У каждого набора учётных данных свой ограничитель запросов (своя серверная
+    квота), а HTTP сессия с пулом соединений общая. Операции через run()
+    выполняются с ограничением общего числа одновременных операций и
+    справедливой (по кругу) очередью между арендаторами.
+    """
+
+    def __init__(
+            self,
+            session: aiohttp.ClientSession | None = None,
+            max_concurrency: int = 10,
+            connection_options: ConnectionOptions | None = None,
+            **client_kwargs: Any
+    ):
+        """
+        Args:
+            session: Общая HTTP сессия (по умолчанию создаётся пулом)
+            max_concurrency: Максимальное число одновременных операций по всем арендаторам
+            connection_options: Пул соединений, таймауты и сжатие для общей сессии
+            client_kwargs: Параметры, передаваемые каждому KitVendingAPIClient
+        """
+        self._connection_options = connection_options or ConnectionOptions()
+        client_kwargs.setdefault("connection_options", self._connection_options)
+        self._session = session
+        self._own_session = session is None
+        self._client_kwargs = client_kwargs
+        self._clients: dict[tuple[str, int], KitVendingAPIClient] = {}
+        self._scheduler = _FairScheduler(max_concurrency)
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def add(self, login: str, password: str, company_id: int, **client_kwargs: Any) -> KitVendingAPIClient:
+        """
+        Добавить клиента для набора учётных данных
+
+        Args:
+            login: Логин
+            password: Пароль
+            company_id: ID компании
+            client_kwargs: Параметры клиента (дополняют параметры пула)
+
+        Returns:
+            KitVendingAPIClient: Клиент, использующий общую сессию пула (и при
+                                 вызовах напрямую, без run())
+        """
+        key = (login, company_id)
+        if key in self._clients:
+            raise KitAPIValidationError(f"Клиент для {login} (компания {company_id}) уже добавлен")
+
+        client = KitVendingAPIClient(
+            login=login,
+            password=password,
+            company_id=company_id,
+            session=self._session,
+            **{**self._client_kwargs, **client_kwargs},
+        )
+        # Сессия создаётся при первом запросе клиента (для этого нужен event loop)
+        client._session_factory = self._shared_session
+        client._own_session = False
+        self._clients[key] = client
+        return client
+
+    def get(self, company_id: int, login: str | None = None) -> KitVendingAPIClient:
+        """
+        Получить клиента компании
+
+        Args:
+            company_id: ID компании
+            login: Логин (нужен, если у компании несколько клиентов)
+        """
+        matches = [
+            client for (client_login, client_company_id), client in self._clients.items()
+            if client_company_id == company_id and (login is None or client_login == login)
+        ]
+        if not matches:
+            raise KitAPIValidationError(f"Клиент для компании {company_id} не найден")
+        if len(matches) > 1:
+            raise KitAPIValidationError(f"Для компании {company_id} несколько клиентов, укажите login")
+        return matches[0]
+
+    async def run(
+            self,
+            company_id: int,
+            operation: Callable[[KitVendingAPIClient], Awaitable[Any]],
+            login: str | None = None
+    ) -> Any:
+        """
+        Выполнить операцию клиентом компании в порядке справедливой очереди
+
+        Args:
+            company_id: ID компании
+            operation: Корутина, принимающая клиента, например
+                       lambda client: client.get_sales(machine_id, from_date, to_date)
+            login: Логин (нужен, если у компании несколько клиентов)
+
+        Returns:
+            Any: Результат операции
+        """
+        client = self.get(company_id, login)
+        await self._attach_session()
+
+        await self._scheduler.acquire((client._login, company_id))
+        try:
+            return await operation(client)
+        finally:
+            self._scheduler.release()
+
+    async def close(self) -> None:
+        """Закрыть общую HTTP сессию, если она была создана пулом"""
+        if self._session and not self._session.closed and self._own_session:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def _shared_session(self) -> aiohttp.ClientSession:
+        """Общая сессия пула (создаётся при необходимости)"""
+        if self._session is None or self._session.closed:
+            self._session = self._connection_options.create_session()
+            self._own_session = True
+        return self._session
+
+    async def _attach_session(self) -> None:
+        """Создать общую сессию при необходимости и подключить к ней клиентов"""
+        self._shared_session()
+        for client in self._clients.values():
+            if client._session is not self._session:
+                client._session = self._session
+                client._own_session = False
@@ -2,7 +2,8 @@
 Утилиты для работы с датой и временем в форматах Kit API
 """
 
-from datetime import datetime
+from datetime import datetime, timedelta, tzinfo
+from functools import lru_cache
 from zoneinfo import ZoneInfo
 
 
@@ -22,6 +23,65 @@ class ProjectTime:
         """Установка часового пояса проекта"""
         cls._project_timezone = ZoneInfo(tz_name)
 
+    @classmethod
+    def now(cls) -> datetime:
+        """Текущее время в часовом поясе проекта"""
+        return datetime.now(cls._project_timezone)
+
+    @classmethod
+    def to_project_timezone(cls, dt: datetime) -> datetime:
+        """
+        Привести datetime к часовому поясу проекта.
+        Naive datetime считается заданным в часовом поясе проекта.
+        """
+        if dt.tzinfo is None:
+            return dt.replace(tzinfo=cls._project_timezone)
+        return dt.astimezone(cls._project_timezone)
+
+    @classmethod
+    def split_period(
+            cls,
+            from_date: datetime,
+            to_date: datetime,
+            step: timedelta
+    ) -> list[tuple[datetime, datetime]]:
+        """
+        Разбить период на последовательные окна длиной не более step.
+
+        Границы окон выравниваются по московским суткам (если step кратен суткам)
+        или часам (если step кратен часу). Соседние окна имеют общую границу.
+
+        Args:
+            from_date: Начало периода
+            to_date: Конец периода
+            step: Максимальная длина окна
+
+        Returns:
+            list[tuple[datetime, datetime]]: Окна (начало, конец) в часовом поясе проекта
+        """
+        if step <= timedelta(0):
+            raise ValueError("step должен быть положительным")
+
+        start = cls.to_project_timezone(from_date)
+        end = cls.to_project_timezone(to_date)
+
+        if step % timedelta(days=1) == timedelta(0):
+            grid_origin = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        elif step % timedelta(hours=1) == timedelta(0):
+            grid_origin = start.replace(minute=0, second=0, microsecond=0)
+        else:
+            grid_origin = start
+
+        windows = []
+        boundary = grid_origin + step
+        while start < end:
+            window_end = min(boundary, end)
+            windows.append((start, window_end))
+            start = window_end
+            boundary += step
+
+        return windows
+
     @classmethod
     def datetime_to_str_kit(cls, dt: datetime) -> str:
         """
@@ -54,6 +114,26 @@ class ProjectTime:
         Returns:
             datetime: datetime объект с московским часовым поясом
         """
-        dt = datetime.strptime(val, cls._KIT_API_DATETIME_FORMAT)
-        return dt.replace(tzinfo=cls._project_timezone)
+        return _parse_kit_datetime(val, cls._project_timezone)
+
+
+@lru_cache(maxsize=4096)
+def _parse_kit_datetime(val: str, tz: tzinfo) -> datetime:
+    """
+    Разбор строки dd.mm.yyyy HH:MM:SS срезами по фиксированным позициям.
+
+    В ответе /GetSales одно и то же время встречается во многих записях
+    (разные автоматы, соседние окна), поэтому результаты кэшируются.
+    Строки другой раскладки (например, день без ведущего нуля) разбираются strptime.
+    """
+    if (
+            len(val) != 19 or val[2] != "." or val[5] != "." or val[10] != " "
+            or val[13] != ":" or val[16] != ":"
+    ):
+        return datetime.strptime(val, ProjectTime._KIT_API_DATETIME_FORMAT).replace(tzinfo=tz)
+    return datetime(
+        int(val[6:10]), int(val[3:5]), int(val[0:2]),
+        int(val[11:13]), int(val[14:16]), int(val[17:19]),
+        tzinfo=tz,
+    )
 
@@ -3,81 +3,738 @@
 """
 
 import asyncio
+import functools
 import inspect
+import logging
+import os
 import time
+from array import array
+from bisect import bisect_left
 from collections import deque
-from typing import Deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, replace
+from enum import IntEnum
+from typing import Callable, Deque, Mapping
+
+from kit_api.exceptions import KitAPIError, KitAPIRateLimitError
+from kit_api.tracing import current_trace, trace_request
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+class Priority(IntEnum):
+    """Класс приоритета запроса"""
+    INTERACTIVE = 0
+    NORMAL = 1
+    BULK = 2
+
+
+# Веса очередей по умолчанию: доля слотов, которую получает очередь при конкуренции
+DEFAULT_PRIORITY_WEIGHTS = {
+    Priority.INTERACTIVE: 6,
+    Priority.NORMAL: 3,
+    Priority.BULK: 1,
+}
+
+_current_priority: ContextVar[Priority] = ContextVar("kit_api_priority", default=Priority.NORMAL)
+
+
+@contextmanager
+def request_priority(priority: Priority | None):
+    """
+    Контекстный менеджер: запросы внутри блока (в том числе в созданных в нём
+    задачах) ожидают слот в очереди указанного приоритета.
+
+    Args:
+        priority: Приоритет запросов (None - не менять текущий)
+    """
+    if priority is None:
+        yield
+        return
+    token = _current_priority.set(Priority(priority))
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> Priority:
+    """Приоритет запросов в текущем контексте"""
+    return _current_priority.get()
+
+
+# Верхние границы корзин гистограммы времени ожидания слота, секунды
+WAIT_HISTOGRAM_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, float("inf"))
+
+# Пауза между попытками взять занятую блокировку файла общего окна (секунды)
+_FILE_LOCK_RETRY_MIN = 0.0005
+_FILE_LOCK_RETRY_MAX = 0.02
+
+
+@dataclass
+class LaneStats:
+    """Статистика очереди одного приоритета"""
+    queued: int = 0
+    granted: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    @property
+    def mean_wait(self) -> float:
+        """Среднее время ожидания слота в секундах"""
+        return self.total_wait / self.granted if self.granted else 0.0
+
+
+@dataclass(frozen=True)
+class RateLimiterSnapshot:
+    """Снимок метрик ограничителя"""
+    timestamp: float
+    max_requests: int
+    time_window: float
+    # Слоты, занятые в текущем окне
+    slots_used: int
+    queue_size: int
+    peak_queue_size: int
+    # Накопленные значения с момента создания ограничителя
+    requests_total: int
+    slots_total: int
+    throttled_total: int
+    wait_total: float
+    wait_max: float
+    # Верхняя граница корзины (секунды) -> число ожиданий
+    wait_histogram: dict[float, int]
+    lanes: dict[Priority, LaneStats]
+
+    @property
+    def slot_utilisation(self) -> float:
+        """Доля занятых слотов текущего окна (0..1)"""
+        return self.slots_used / self.max_requests if self.max_requests else 0.0
+
+    @property
+    def mean_wait(self) -> float:
+        """Среднее время ожидания слота в секундах"""
+        return self.wait_total / self.requests_total if self.requests_total else 0.0
+
+
+MetricsCallback = Callable[[RateLimiterSnapshot], None]
 
 
 class RateLimiter:
     """
     Упрощенный ограничитель запросов для одного API с одним набором лимитов.
+
+    Ожидающие распределены по очередям приоритетов (Priority). Внутри очереди
+    слоты выдаются строго по порядку (FIFO), а между очередями - взвешенным
+    циклическим обходом, так что массовая выгрузка не блокирует интерактивные
+    запросы, но и сама не останавливается. Часть окна можно зарезервировать
+    только для интерактивных запросов.
+
+    Ожидающие не держат блокировку: каждый ждёт своё собственное future, а
+    один таймер будит ровно столько ожидающих, сколько слотов освободилось в
+    окне. Слот отменённого ожидающего достаётся следующему в очереди.
     """
 
-    def __init__(self, max_requests: int, time_window: float = 1.0):
+    def __init__(
+            self,
+            max_requests: int,
+            time_window: float = 1.0,
+            weights: Mapping[Priority, int] | None = None,
+            reserved_share: float = 0.0
+    ):
         """
         Args:
             max_requests: Максимальное количество запросов в time_window секунд
             time_window: Временное окно в секундах
+            weights: Веса очередей приоритетов (по умолчанию DEFAULT_PRIORITY_WEIGHTS)
+            reserved_share: Доля окна (0..1), доступная только интерактивным запросам
         """
         self.max_requests = max_requests
         self.time_window = time_window
+        self.weights = {**DEFAULT_PRIORITY_WEIGHTS, **(weights or {})}
+        self.reserved_share = reserved_share
+        # Время выдачи слотов в текущем окне
         self.requests: Deque[float] = deque()
-        self._lock = asyncio.Lock()
+        # Очереди ожидающих по приоритетам: (future, стоимость в слотах, время постановки)
+        self._lanes: dict[Priority, Deque[tuple[asyncio.Future, int, float]]] = {
+            priority: deque() for priority in Priority
+        }
+        self._credits: dict[Priority, float] = {priority: 0.0 for priority in Priority}
+        self._lane_stats: dict[Priority, LaneStats] = {priority: LaneStats() for priority in Priority}
+        self._timer: asyncio.TimerHandle | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+        # Метрики: простые счётчики, обновляемые при выдаче слота
+        self._queued = 0
+        self._peak_queued = 0
+        self._slots_total = 0
+        self._throttled_total = 0
+        self._wait_histogram = [0] * len(WAIT_HISTOGRAM_BUCKETS)
+        self._metrics_callback: MetricsCallback | None = None
+        self._metrics_interval = 0.0
+        self._metrics_reported_at = float("-inf")
+
+    @property
+    def effective_rate(self) -> float:
+        """Текущий допустимый темп запросов (запросов в секунду)"""
+        return self.max_requests / self.time_window
+
+    @property
+    def queue_size(self) -> int:
+        """Количество задач, ожидающих слот"""
+        return self._queued
+
+    def snapshot(self) -> RateLimiterSnapshot:
+        """
+        Снимок метрик ограничителя
 
-    async def wait(self):
+        Returns:
+            RateLimiterSnapshot: Время ожидания, длина очереди, занятость окна
+                                 и число отказов с кодом 27
+        """
+        lanes = self.lane_stats()
+        return RateLimiterSnapshot(
+            timestamp=time.monotonic(),
+            max_requests=self.max_requests,
+            time_window=self.time_window,
+            slots_used=self._slots_in_window(),
+            queue_size=self.queue_size,
+            peak_queue_size=self._peak_queued,
+            requests_total=sum(stats.granted for stats in lanes.values()),
+            slots_total=self._slots_total,
+            throttled_total=self._throttled_total,
+            wait_total=sum(stats.total_wait for stats in lanes.values()),
+            wait_max=max(stats.max_wait for stats in lanes.values()),
+            wait_histogram=dict(zip(WAIT_HISTOGRAM_BUCKETS, self._wait_histogram)),
+            lanes=lanes,
+        )
+
+    def set_metrics_callback(self, callback: MetricsCallback | None, interval: float = 10.0) -> None:
+        """
+        Установить callback для экспорта метрик
+
+        Callback получает snapshot() не чаще раза в interval секунд - при выдаче
+        слота или отказе сервера. Ошибка в callback не влияет на запросы.
+
+        Args:
+            callback: Функция, принимающая RateLimiterSnapshot (None - отключить)
+            interval: Минимальный интервал между вызовами в секундах
+        """
+        self._metrics_callback = callback
+        self._metrics_interval = interval
+        self._metrics_reported_at = float("-inf")
+
+    def lane_stats(self) -> dict[Priority, LaneStats]:
+        """
+        Статистика очередей приоритетов
+
+        Returns:
+            dict[Priority, LaneStats]: Текущая длина очереди, число выданных слотов
+                                       и время ожидания по каждому приоритету
+        """
+        return {
+            priority: replace(stats, queued=self._lane_size(priority))
+            for priority, stats in self._lane_stats.items()
+        }
+
+    async def wait(self, cost: int = 1, priority: Priority | None = None):
         """
         Асинхронно ожидает, когда можно будет выполнить следующий запрос.
+
+        Args:
+            cost: Сколько слотов окна расходует запрос (не больше max_requests)
+            priority: Приоритет запроса (по умолчанию - из request_priority())
         """
-        async with self._lock:
-            current_time = time.monotonic()
+        loop = asyncio.get_running_loop()
+        self._bind_loop(loop)
+        priority = current_priority() if priority is None else Priority(priority)
+        cost = self._clamp_cost(cost, priority)
+        now = time.monotonic()
+
+        if not self._has_waiters() and self._try_acquire(now, cost, self._capacity(priority)):
+            self._record_grant(priority, 0.0, cost)
+            return
 
-            # Удаляем старые запросы
-            while self.requests and self.requests[0] <= current_time - self.time_window:
-                self.requests.popleft()
+        waiter = loop.create_future()
+        self._lanes[priority].append((waiter, cost, now))
+        self._queued += 1
+        self._peak_queued = max(self._peak_queued, self._queued)
+        self._schedule()
 
-            if len(self.requests) < self.max_requests:
-                # Можно выполнить запрос сразу
-                self.requests.append(current_time)
-                return
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Слоты уже выданы, но задача отменена - возвращаем их очереди
+                self._give_back(waiter.result(), cost)
+            else:
+                self._queued -= 1
+            raise
 
-            # Нужно подождать
-            wait_until = self.requests[0] + self.time_window
-            wait_time = max(0.0, wait_until - current_time)
+    def on_success(self) -> None:
+        """Сообщить ограничителю об успешном запросе"""
 
-            # Обновляем очередь
-            self.requests.append(wait_until)
+    def on_throttled(self) -> None:
+        """
+        Сообщить ограничителю, что сервер отклонил запрос из-за превышения лимита.
+        Текущее окно считается исчерпанным: следующий слот - не раньше, чем через окно.
+        """
+        now = time.monotonic()
+        self._prune(now)
+        while len(self.requests) < self.max_requests:
+            self.requests.append(now)
+        self._throttled_total += 1
+        self._report_metrics(now)
+
+    def _capacity(self, priority: Priority) -> int:
+        """Сколько слотов окна доступно запросам приоритета"""
+        if priority == Priority.INTERACTIVE or self.reserved_share <= 0:
+            return self.max_requests
+        reserved = min(int(self.max_requests * self.reserved_share), self.max_requests - 1)
+        return self.max_requests - max(0, reserved)
+
+    def _clamp_cost(self, cost: int, priority: Priority = Priority.NORMAL) -> int:
+        return min(max(1, cost), max(1, self._capacity(priority)))
+
+    def _lane_size(self, priority: Priority) -> int:
+        return sum(1 for waiter, _, _ in self._lanes[priority] if not waiter.done())
+
+    def _has_waiters(self) -> bool:
+        return any(self._lanes.values())
+
+    def _bind_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Сбросить очередь, оставшуюся от другого (завершённого) event loop"""
+        if self._loop is not loop:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            for lane in self._lanes.values():
+                lane.clear()
+            self._queued = 0
+            self._loop = loop
+
+    def _prune(self, now: float) -> None:
+        """Удалить слоты, вышедшие из временного окна"""
+        while self.requests and self.requests[0] <= now - self.time_window:
             self.requests.popleft()
 
-            if wait_time > 0:
-                await asyncio.sleep(wait_time)
+    def _try_acquire(self, now: float, cost: int = 1, capacity: int | None = None) -> bool:
+        self._prune(now)
+        if len(self.requests) + cost <= (self.max_requests if capacity is None else capacity):
+            self.requests.extend([now] * cost)
+            return True
+        return False
+
+    def _slots_in_window(self) -> int:
+        self._prune(time.monotonic())
+        return len(self.requests)
+
+    def _record_grant(self, priority: Priority, waited: float, cost: int = 1) -> None:
+        stats = self._lane_stats[priority]
+        stats.granted += 1
+        stats.total_wait += waited
+        if waited > stats.max_wait:
+            stats.max_wait = waited
+        self._slots_total += cost
+        self._wait_histogram[bisect_left(WAIT_HISTOGRAM_BUCKETS, waited)] += 1
+        if self._metrics_callback is not None:
+            self._report_metrics(time.monotonic())
+
+    def _report_metrics(self, now: float) -> None:
+        if self._metrics_callback is None or now - self._metrics_reported_at < self._metrics_interval:
+            return
+        self._metrics_reported_at = now
+        try:
+            self._metrics_callback(self.snapshot())
+        except Exception as e:
+            logging.warning(f"Ошибка callback метрик ограничителя: {e}")
+
+    def _schedule(self) -> None:
+        """Запланировать выдачу слотов к моменту, когда их хватит первому в какой-либо очереди"""
+        if self._timer is not None or not self._has_waiters():
+            return
+        now = time.monotonic()
+        self._prune(now)
+        delay = None
+        for priority, lane in self._lanes.items():
+            if not lane:
+                continue
+            cost = self._clamp_cost(lane[0][1], priority)
+            excess = len(self.requests) + cost - self._capacity(priority)
+            if excess <= 0:
+                lane_delay = 0.0
+            else:
+                lane_delay = max(0.0, self.requests[excess - 1] + self.time_window - now)
+            delay = lane_delay if delay is None else min(delay, lane_delay)
+        self._timer = self._loop.call_later(delay, self._dispatch)
+
+    def _dispatch(self) -> None:
+        """Выдать освободившиеся слоты ожидающим: FIFO внутри очереди, по весам между очередями"""
+        self._timer = None
+        now = time.monotonic()
+        self._prune(now)
+
+        while True:
+            eligible = []
+            for priority, lane in self._lanes.items():
+                # Ожидающие отменены - слоты достаются следующим
+                while lane and lane[0][0].done():
+                    lane.popleft()
+                if not lane:
+                    self._credits[priority] = 0.0
+                    continue
+                cost = self._clamp_cost(lane[0][1], priority)
+                if len(self.requests) + cost <= self._capacity(priority):
+                    eligible.append(priority)
+            if not eligible:
+                break
+
+            priority = self._pick_lane(eligible)
+            waiter, cost, enqueued_at = self._lanes[priority].popleft()
+            cost = self._clamp_cost(cost, priority)
+            self.requests.extend([now] * cost)
+            self._queued -= 1
+            self._record_grant(priority, now - enqueued_at, cost)
+            waiter.set_result(now)
+
+        self._schedule()
+
+    def _pick_lane(self, eligible: list[Priority]) -> Priority:
+        """Выбрать очередь плавным взвешенным циклическим обходом"""
+        if len(eligible) == 1:
+            return eligible[0]
+        total = 0
+        for priority in eligible:
+            weight = max(1, self.weights.get(priority, 1))
+            self._credits[priority] += weight
+            total += weight
+        chosen = max(eligible, key=lambda p: (self._credits[p], -p))
+        self._credits[chosen] -= total
+        return chosen
 
+    def _give_back(self, granted_at: float, cost: int = 1) -> None:
+        """Вернуть выданные, но не использованные слоты"""
+        for _ in range(cost):
+            try:
+                self.requests.remove(granted_at)
+            except ValueError:
+                break
+        if self._has_waiters():
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._schedule()
 
-def rate_limit(max_requests: int, time_window: float = 1.0):
+
+class AdaptiveRateLimiter(RateLimiter):
+    """
+    Ограничитель, подстраивающийся под реальный лимит сервера (AIMD).
+
+    Пока запросы проходят, лимит растёт аддитивно - примерно на increase
+    запросов за каждое окно успешных запросов. При отказе с кодом 27 лимит
+    уменьшается мультипликативно (в decrease раз), а текущее окно
+    считается исчерпанным.
+    """
+
+    def __init__(
+            self,
+            max_requests: int,
+            time_window: float = 1.0,
+            min_requests: int = 1,
+            max_limit: int | None = None,
+            increase: float = 1.0,
+            decrease: float = 0.5,
+            weights: Mapping[Priority, int] | None = None,
+            reserved_share: float = 0.0
+    ):
+        """
+        Args:
+            max_requests: Начальное количество запросов в time_window секунд
+            time_window: Временное окно в секундах
+            min_requests: Нижняя граница лимита
+            max_limit: Верхняя граница лимита (None - без ограничения)
+            increase: Прирост лимита за окно успешных запросов
+            decrease: Множитель лимита при отказе сервера (0 < decrease < 1)
+            weights: Веса очередей приоритетов (по умолчанию DEFAULT_PRIORITY_WEIGHTS)
+            reserved_share: Доля окна (0..1), доступная только интерактивным запросам;
+                            считается от текущего лимита
+        """
+        super().__init__(max_requests, time_window, weights, reserved_share)
+        self.min_requests = min_requests
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.limit = float(max_requests)
+
+    def on_success(self) -> None:
+        previous = self.max_requests
+        self.limit += self.increase / self.limit
+        if self.max_limit is not None:
+            self.limit = min(self.limit, float(self.max_limit))
+        self.max_requests = max(self.min_requests, int(self.limit))
+        if self.max_requests > previous and self._has_waiters() and self._timer is not None:
+            # Лимит вырос - ожидающие могут получить слоты раньше
+            self._timer.cancel()
+            self._timer = None
+            self._schedule()
+
+    def on_throttled(self) -> None:
+        self.limit = max(float(self.min_requests), self.limit * self.decrease)
+        self.max_requests = max(self.min_requests, int(self.limit))
+        super().on_throttled()
+
+
+class SharedFileRateLimiter(RateLimiter):
+    """
+    Ограничитель с общим окном для нескольких процессов на одном хосте.
+
+    Время выданных и зарезервированных слотов хранится в файле, доступ к
+    которому защищён блокировкой fcntl.flock. Под блокировкой процесс только
+    резервирует ближайший свободный слот (чтение и запись нескольких сотен
+    байт), а ждёт его наступления уже без блокировки. Отменённая резервация
+    удаляется из файла.
+
+    Блокировка берётся без ожидания (LOCK_NB): wait() при занятом файле
+    повторяет попытку через asyncio.sleep, а не останавливает event loop.
+    snapshot() в этом случае возвращает занятость окна по последнему чтению
+    файла, а on_throttled() и освобождение резервации применяются фоновой
+    задачей.
+
+    Доступен только на POSIX системах.
+    """
+
+    def __init__(self, path: str | os.PathLike, max_requests: int, time_window: float = 1.0):
+        """
+        Args:
+            path: Путь к файлу общего окна (создаётся при необходимости)
+            max_requests: Максимальное количество запросов в time_window секунд
+            time_window: Временное окно в секундах
+        """
+        if fcntl is None:
+            raise KitAPIError("SharedFileRateLimiter доступен только на POSIX системах")
+        super().__init__(max_requests, time_window)
+        self.path = os.fspath(path)
+        self._fd: int | None = None
+        self._fd_pid: int | None = None
+        # Занятость общего окна по последнему чтению файла
+        self._slots_used = 0
+        # Изменения файла, отложенные до освобождения блокировки
+        self._pending_updates: set[asyncio.Task] = set()
+
+    @property
+    def queue_size(self) -> int:
+        """Количество задач этого процесса, ожидающих слот"""
+        return self._queued
+
+    async def wait(self, cost: int = 1, priority: Priority | None = None):
+        """
+        Асинхронно ожидает, когда можно будет выполнить следующий запрос.
+
+        Args:
+            cost: Сколько слотов окна расходует запрос (не больше max_requests)
+            priority: Учитывается только в статистике: общее окно процессов
+                      не делится на очереди
+        """
+        priority = current_priority() if priority is None else Priority(priority)
+        cost = self._clamp_cost(cost)
+        slot = await self._reserve(cost)
+        delay = slot - time.time()
+        if delay <= 0:
+            self._record_grant(priority, 0.0, cost)
+            return
+
+        self._queued += 1
+        self._peak_queued = max(self._peak_queued, self._queued)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self._release(slot, cost)
+            raise
+        finally:
+            self._queued -= 1
+        self._record_grant(priority, delay, cost)
+
+    def on_throttled(self) -> None:
+        """Считать общее окно исчерпанным для всех процессов"""
+
+        def exhaust(slots: list[float]) -> None:
+            now = time.time()
+            active = sum(1 for slot in slots if slot <= now)
+            slots.extend([now] * max(0, self.max_requests - active))
+
+        self._update(exhaust)
+        self._throttled_total += 1
+        self._report_metrics(time.monotonic())
+
+    def _slots_in_window(self) -> int:
+        """Слоты общего окна, занятые всеми процессами (по последнему чтению, если файл занят)"""
+        try:
+            with self._locked(blocking=not _in_event_loop()):
+                pass
+        except BlockingIOError:
+            pass
+        return self._slots_used
+
+    async def _reserve(self, cost: int = 1) -> float:
+        """Зарезервировать ближайшие cost свободных слотов в общем окне"""
+        async with self._locked() as slots:
+            now = time.time()
+            excess = len(slots) + cost - self.max_requests
+            if excess <= 0:
+                slot = now
+            else:
+                slot = max(now, slots[excess - 1] + self.time_window)
+            slots.extend([slot] * cost)
+            return slot
+
+    def _release(self, slot: float, cost: int = 1) -> None:
+        """Удалить неиспользованную резервацию"""
+
+        def release(slots: list[float]) -> None:
+            for _ in range(cost):
+                if slot not in slots:
+                    break
+                slots.remove(slot)
+
+        self._update(release)
+
+    def _update(self, apply: Callable[[list[float]], None]) -> None:
+        """
+        Изменить слоты общего окна из синхронного кода.
+        В event loop при занятой блокировке изменение применяет фоновая задача
+        """
+        in_loop = _in_event_loop()
+        try:
+            with self._locked(blocking=not in_loop) as slots:
+                apply(slots)
+            return
+        except BlockingIOError:
+            pass
+        task = asyncio.get_running_loop().create_task(self._update_later(apply))
+        self._pending_updates.add(task)
+        task.add_done_callback(self._pending_updates.discard)
+
+    async def _update_later(self, apply: Callable[[list[float]], None]) -> None:
+        async with self._locked() as slots:
+            apply(slots)
+
+    def _locked(self, blocking: bool = False) -> "_LockedSlots":
+        return _LockedSlots(self, self._get_fd(), blocking)
+
+    def _get_fd(self) -> int:
+        # После fork дескриптор (и блокировка flock) общие с родителем - открываем заново
+        if self._fd is None or self._fd_pid != os.getpid():
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._fd_pid = os.getpid()
+        return self._fd
+
+
+class _LockedSlots:
+    """
+    Контекстный менеджер: эксклюзивная блокировка файла и отсортированный список слотов.
+
+    async with ждёт занятую блокировку паузами asyncio.sleep. Синхронный with
+    без blocking при занятой блокировке сразу выбрасывает BlockingIOError.
+    """
+
+    def __init__(self, limiter: SharedFileRateLimiter, fd: int, blocking: bool = False):
+        self._limiter = limiter
+        self._fd = fd
+        self._blocking = blocking
+        self._slots: list[float] = []
+
+    def __enter__(self) -> list[float]:
+        fcntl.flock(self._fd, fcntl.LOCK_EX if self._blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return self._read()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        try:
+            if exc_type is None:
+                data = array("d", sorted(self._slots)).tobytes()
+                os.pwrite(self._fd, data, 0)
+                os.ftruncate(self._fd, len(data))
+                now = time.time()
+                self._limiter._slots_used = sum(1 for slot in self._slots if slot <= now)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    async def __aenter__(self) -> list[float]:
+        delay = _FILE_LOCK_RETRY_MIN
+        while True:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, _FILE_LOCK_RETRY_MAX)
+        return self._read()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.__exit__(exc_type, exc_val, exc_tb)
+
+    def _read(self) -> list[float]:
+        """Прочитать слоты окна; вызывается под блокировкой"""
+        try:
+            size = os.fstat(self._fd).st_size
+            data = os.pread(self._fd, size, 0) if size else b""
+            stored = array("d")
+            stored.frombytes(data[:len(data) - len(data) % stored.itemsize])
+            horizon = time.time() - self._limiter.time_window
+            self._slots = sorted(slot for slot in stored if slot > horizon)
+        except BaseException:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            raise
+        return self._slots
+
+
+def _in_event_loop() -> bool:
+    """Выполняется ли код в запущенном event loop"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def rate_limit(
+        max_requests: int | None = None,
+        time_window: float = 1.0,
+        limiter: RateLimiter | None = None,
+        wrap_methods: bool = True
+):
     """
     Декоратор класса для автоматического ограничения запросов к API.
 
     Args:
         max_requests: Максимальное количество запросов в time_window секунд
         time_window: Временное окно в секундах
+        limiter: Готовый ограничитель (вместо max_requests/time_window)
+        wrap_methods: Оборачивать ли все публичные асинхронные методы класса.
+                      При False ограничитель только подключается к классу, а
+                      ограничиваются лишь методы, явно помеченные @api_method
     """
+    if limiter is None and max_requests is None:
+        raise ValueError("Нужно указать max_requests или limiter")
 
     def decorator(cls):
         # Создаем экземпляр ограничителя для класса
-        limiter = RateLimiter(max_requests, time_window)
+        class_limiter = limiter or RateLimiter(max_requests, time_window)
 
         # Обходим все методы класса
-        for attr_name in dir(cls):
+        for attr_name in dir(cls) if wrap_methods else ():
             if attr_name.startswith('_'):
                 continue
 
             attr = getattr(cls, attr_name)
             # Если это асинхронный метод, оборачиваем его
             if callable(attr) and inspect.iscoroutinefunction(attr):
-                setattr(cls, attr_name, _wrap_method(attr, limiter))
+                setattr(cls, attr_name, _wrap_method(attr, class_limiter))
 
         # Добавляем ограничитель как атрибут класса
-        cls._limiter = limiter
+        cls._limiter = class_limiter
         return cls
 
     return decorator
@@ -95,15 +752,39 @@ def _wrap_method(method, limiter):
     return wrapper
 
 
-def api_method(max_requests: int = None, time_window: float = 1.0):
+def api_method(
+        max_requests: int = None,
+        time_window: float = 1.0,
+        throttle_retries: int = 3,
+        cost: int = 1,
+        bucket: str | None = None
+):
     """
     Декоратор для отдельных методов API.
     Если параметры не указаны, используются параметры из декоратора класса.
+
+    Если метод завершился KitAPIRateLimitError (ResultCode 27), ограничитель
+    получает сигнал on_throttled(), а вызов повторяется (не более throttle_retries
+    раз) после ожидания нового слота. Успешный вызов сообщается через on_success().
+
+    Args:
+        max_requests: Лимит для метода, если у объекта нет ограничителя
+        time_window: Временное окно в секундах
+        throttle_retries: Количество повторов после отказа с ResultCode 27
+        cost: Сколько слотов окна расходует один вызов
+        bucket: Имя отдельного ограничителя (например, эндпоинт "/GetSales").
+                Ограничитель берётся из словаря _bucket_limiters объекта, а если
+                его там нет - используется общий ограничитель _limiter
     """
 
     def decorator(func):
+        @functools.wraps(func)
         async def wrapper(self, *args, **kwargs):
-            limiter = getattr(self, '_limiter', None)
+            limiter = None
+            if bucket is not None:
+                limiter = getattr(self, '_bucket_limiters', {}).get(bucket)
+            if limiter is None:
+                limiter = getattr(self, '_limiter', None)
             if limiter is None:
                 if max_requests is None:
                     raise ValueError(
@@ -112,10 +793,36 @@ def api_method(max_requests: int = None, time_window: float = 1.0):
                     )
                 limiter = RateLimiter(max_requests, time_window)
 
-            await limiter.wait()
-            return await func(self, *args, **kwargs)
+            tracer = getattr(self, '_tracer', None)
+            if tracer is None:
+                return await _call_limited(limiter, cost, throttle_retries, func, self, args, kwargs)
+            with trace_request(tracer, bucket or func.__name__):
+                return await _call_limited(limiter, cost, throttle_retries, func, self, args, kwargs)
 
         return wrapper
 
     return decorator
 
+
+async def _call_limited(limiter: RateLimiter, cost: int, throttle_retries: int, func, self, args, kwargs):
+    """Выполнить вызов в слоте ограничителя, повторяя его после отказа с кодом 27"""
+    trace = current_trace()
+    attempt = 0
+    while True:
+        if trace is None:
+            await limiter.wait(cost)
+        else:
+            started = time.perf_counter()
+            await limiter.wait(cost)
+            trace.rate_limit_wait += time.perf_counter() - started
+            trace.attempts += 1
+        try:
+            result = await func(self, *args, **kwargs)
+        except KitAPIRateLimitError:
+            limiter.on_throttled()
+            if attempt >= throttle_retries:
+                raise
+            attempt += 1
+            continue
+        limiter.on_success()
+        return result
@@ -0,0 +1,132 @@
+"""
+Компактные записи продаж Kit API
+"""
+
+import sys
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Any, Iterable, Mapping
+
+from kit_api.models.sales import (
+    SALE_TAG_DRINK,
+    SALE_TAG_PRODUCT,
+    BaseSaleModel,
+    ProductSaleModel,
+    RecipeDrinkSaleModel,
+    SalesCollection,
+    row_sale_kind,
+)
+from kit_api.project_time import ProjectTime
+from kit_api.validation import LazyList
+
+
+@dataclass(slots=True)
+class SaleRecord:
+    """
+    Продажа без накладных расходов pydantic: атрибуты в __slots__, без __dict__,
+    model_fields_set и валидатора. Поля - как у BaseSaleModel
+    """
+    line: int
+    price: float
+    timestamp: datetime
+    vending_machine_id: int
+    vending_machine_name: str
+    matrix_id: int
+
+    @property
+    def key(self) -> tuple:
+        """Ключ продажи для устранения дублей при объединении выгрузок"""
+        return self.vending_machine_id, self.timestamp, self.line, self.price, self.matrix_id
+
+    def to_model(self) -> BaseSaleModel:
+        """Модель продажи с теми же значениями"""
+        return BaseSaleModel.model_construct(**_fields(self))
+
+
+@dataclass(slots=True)
+class ProductSaleRecord(SaleRecord):
+    """Продажа товара (как ProductSaleModel)"""
+    product_name: str
+
+    @property
+    def key(self) -> tuple:
+        return *SaleRecord.key.fget(self), self.product_name
+
+    def to_model(self) -> ProductSaleModel:
+        return ProductSaleModel.model_construct(**_fields(self))
+
+
+@dataclass(slots=True)
+class RecipeDrinkSaleRecord(SaleRecord):
+    """Продажа напитка (как RecipeDrinkSaleModel)"""
+    recipe_id: int
+
+    @property
+    def key(self) -> tuple:
+        return *SaleRecord.key.fget(self), self.recipe_id
+
+    def to_model(self) -> RecipeDrinkSaleModel:
+        return RecipeDrinkSaleModel.model_construct(**_fields(self))
+
+
+def _fields(record: SaleRecord) -> dict[str, Any]:
+    return {field.name: getattr(record, field.name) for field in fields(record)}
+
+
+def record_from_row(row: Mapping[str, Any]) -> SaleRecord:
+    """
+    Запись продажи из записи ответа /GetSales. Названия автомата и товара
+    интернируются: одинаковые строки разных продаж - один объект
+
+    Raises:
+        ValueError: Запись не соответствует формату Kit API
+    """
+    try:
+        values = (
+            int(row["LineNumber"]),
+            float(row["Sum"]),
+            ProjectTime.datetime_from_str_kit(row["DateTime"]),
+            int(row["VendingMachine"]),
+            sys.intern(str(row["VendingMachineName"])),
+            int(row["MatrixId"]),
+        )
+        kind = row_sale_kind(row)
+        if kind == SALE_TAG_PRODUCT:
+            return ProductSaleRecord(*values, sys.intern(str(row["GoodsName"])))
+        if kind == SALE_TAG_DRINK:
+            return RecipeDrinkSaleRecord(*values, int(row["FormulationId"]))
+        return SaleRecord(*values)
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Некорректная запись продажи: {e!r}") from e
+
+
+def record_from_sale(sale: BaseSaleModel) -> SaleRecord:
+    """Запись продажи из модели"""
+    values = (
+        sale.line,
+        sale.price,
+        sale.timestamp,
+        sale.vending_machine_id,
+        sys.intern(sale.vending_machine_name),
+        sale.matrix_id,
+    )
+    if isinstance(sale, ProductSaleModel):
+        return ProductSaleRecord(*values, sys.intern(sale.product_name))
+    if isinstance(sale, RecipeDrinkSaleModel):
+        return RecipeDrinkSaleRecord(*values, sale.recipe_id)
+    return SaleRecord(*values)
+
+
+def records_from_rows(rows: Iterable[Mapping[str, Any]]) -> list[SaleRecord]:
+    """Записи продаж из записей ответа /GetSales"""
+    return [record_from_row(row) for row in rows]
+
+
+def records_from_collection(collection: SalesCollection) -> list[SaleRecord]:
+    """
+    Записи продаж из коллекции. Для ленивой коллекции (ValidationMode.LAZY)
+    записи строятся из исходных данных без построения моделей
+    """
+    if isinstance(collection.items, LazyList):
+        return records_from_rows(collection.items.raw)
+    return [record_from_sale(sale) for sale in collection.items]
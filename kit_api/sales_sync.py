@@ -0,0 +1,256 @@
+"""
+Инкрементальная синхронизация продаж с сохранением отметок (watermark) по автоматам
+"""
+
+import json
+import os
+import tempfile
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterable, TYPE_CHECKING
+
+from kit_api.exceptions import KitAPIValidationError
+from kit_api.fleet import FleetSalesResult, SalesProgressCallback, gather_sales, resolve_machine_ids
+from kit_api.models import SalesCollection, VendingMachinesCollection
+from kit_api.models.sales import BaseSaleModel
+from kit_api.project_time import ProjectTime
+
+if TYPE_CHECKING:
+    from kit_api.client import KitVendingAPIClient
+
+
+@dataclass
+class SalesWatermark:
+    """Отметка синхронизации торгового автомата"""
+    # Время последней полученной продажи (None - продаж ещё не было)
+    timestamp: datetime | None
+    # Ключи продаж, уже полученных в пределах перекрытия перед fetched_to
+    seen_keys: set[str] = field(default_factory=set)
+    # Конец последнего загруженного периода (None - как timestamp, для старых файлов)
+    fetched_to: datetime | None = None
+
+    @property
+    def resume_from(self) -> datetime:
+        """Момент, до которого продажи уже загружены"""
+        return self.fetched_to or self.timestamp
+
+    def to_dict(self) -> dict:
+        return {
+            "timestamp": _isoformat(self.timestamp),
+            "seen_keys": sorted(self.seen_keys),
+            "fetched_to": _isoformat(self.fetched_to),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SalesWatermark":
+        return cls(
+            timestamp=_parse_datetime(data.get("timestamp")),
+            seen_keys=set(data.get("seen_keys", ())),
+            fetched_to=_parse_datetime(data.get("fetched_to")),
+        )
+
+
+class JsonWatermarkStore:
+    """
+    Хранилище отметок синхронизации в JSON файле.
+    Файл перезаписывается атомарно при каждом сохранении.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        """
+        Args:
+            path: Путь к JSON файлу (создаётся при первом сохранении)
+        """
+        self._path = Path(path)
+        self._watermarks: dict[int, SalesWatermark] | None = None
+
+    def get(self, vending_machine_id: int) -> SalesWatermark | None:
+        """Получить отметку торгового автомата"""
+        return self._load().get(vending_machine_id)
+
+    def set(self, vending_machine_id: int, watermark: SalesWatermark) -> None:
+        """Сохранить отметку торгового автомата"""
+        self._load()[vending_machine_id] = watermark
+        self._flush()
+
+    def delete(self, vending_machine_id: int) -> None:
+        """Удалить отметку торгового автомата (следующая синхронизация начнётся заново)"""
+        if self._load().pop(vending_machine_id, None) is not None:
+            self._flush()
+
+    def _load(self) -> dict[int, SalesWatermark]:
+        if self._watermarks is None:
+            if self._path.exists():
+                try:
+                    raw = json.loads(self._path.read_text(encoding="utf-8"))
+                except json.JSONDecodeError as e:
+                    raise KitAPIValidationError(
+                        f"Не удалось разобрать файл отметок синхронизации {self._path}: {e}"
+                    ) from e
+                self._watermarks = {
+                    int(machine_id): SalesWatermark.from_dict(data)
+                    for machine_id, data in raw.items()
+                }
+            else:
+                self._watermarks = {}
+        return self._watermarks
+
+    def _flush(self) -> None:
+        data = {
+            str(machine_id): watermark.to_dict()
+            for machine_id, watermark in self._watermarks.items()
+        }
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self._path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+class IncrementalSalesSync:
+    """
+    Инкрементальная загрузка продаж на основе get_sales.
+
+    Для каждого автомата хранится отметка - время последней полученной продажи
+    и конец загруженного периода. Очередной запуск загружает только период после
+    отметки (с небольшим перекрытием для запоздавших записей) и отбрасывает уже
+    полученные продажи. Отметка сдвигается и после запуска без продаж, поэтому
+    простаивающий автомат не перезагружает растущий период.
+    """
+
+    def __init__(
+            self,
+            client: "KitVendingAPIClient",
+            store: JsonWatermarkStore,
+            start_date: datetime,
+            overlap: timedelta = timedelta(minutes=30)
+    ):
+        """
+        Args:
+            client: Клиент Kit API
+            store: Хранилище отметок синхронизации
+            start_date: Начало загрузки для автоматов без отметки
+            overlap: Перекрытие с предыдущей загрузкой для запоздавших записей
+        """
+        self._client = client
+        self._store = store
+        self._start_date = ProjectTime.to_project_timezone(start_date)
+        self._overlap = overlap
+
+    async def sync_machine(
+            self,
+            vending_machine_id: int,
+            to_date: datetime | None = None
+    ) -> SalesCollection:
+        """
+        Загрузить новые продажи торгового автомата и сдвинуть его отметку
+
+        Args:
+            vending_machine_id: ID торгового автомата
+            to_date: Конец периода (по умолчанию - текущее время)
+
+        Returns:
+            SalesCollection: Продажи, не полученные при предыдущих синхронизациях
+        """
+        to_date = ProjectTime.to_project_timezone(to_date or ProjectTime.now())
+        watermark = self._store.get(vending_machine_id)
+
+        if watermark is None:
+            from_date = self._start_date
+            seen_keys: set[str] = set()
+        else:
+            from_date = watermark.resume_from - self._overlap
+            seen_keys = watermark.seen_keys
+
+        if from_date >= to_date:
+            return SalesCollection.model_validate({"Sales": []})
+
+        sales = await self._client.get_sales(vending_machine_id, from_date, to_date)
+
+        new_items = [sale for sale in sales.items if _sale_key(sale) not in seen_keys]
+        self._store.set(vending_machine_id, self._advance(watermark, sales.items, to_date))
+
+        return SalesCollection.model_validate({"Sales": new_items})
+
+    async def sync(
+            self,
+            vending_machines: Iterable[int] | VendingMachinesCollection,
+            to_date: datetime | None = None,
+            max_concurrency: int | None = None,
+            on_progress: SalesProgressCallback | None = None
+    ) -> FleetSalesResult:
+        """
+        Загрузить новые продажи по нескольким торговым автоматам
+
+        Ошибка по одному автомату не прерывает синхронизацию остальных,
+        а его отметка не сдвигается.
+
+        Args:
+            vending_machines: ID торговых автоматов или результат get_vending_machines()
+            to_date: Конец периода (по умолчанию - текущее время)
+            max_concurrency: Максимальное число одновременно синхронизируемых автоматов
+            on_progress: Callback, вызываемый после обработки каждого автомата
+
+        Returns:
+            FleetSalesResult: Новые продажи и ошибки по автоматам
+        """
+        to_date = to_date or ProjectTime.now()
+        if max_concurrency is None:
+            max_concurrency = self._client.rate_limiter.max_requests
+
+        return await gather_sales(
+            resolve_machine_ids(vending_machines),
+            lambda machine_id: self.sync_machine(machine_id, to_date),
+            max_concurrency,
+            on_progress,
+        )
+
+    def _advance(
+            self,
+            previous: SalesWatermark | None,
+            items: list[BaseSaleModel],
+            to_date: datetime
+    ) -> SalesWatermark:
+        """Построить новую отметку по полученным продажам и концу загруженного периода"""
+        timestamps = [ProjectTime.to_project_timezone(sale.timestamp) for sale in items]
+        latest = max(timestamps, default=None)
+        fetched_to = to_date
+        seen_keys: set[str] = set()
+        if previous is not None:
+            if previous.timestamp is not None and (latest is None or previous.timestamp > latest):
+                latest = previous.timestamp
+            if previous.resume_from >= to_date:
+                # Период не продвинулся - уже полученные ключи перекрытия остаются нужны
+                fetched_to = previous.resume_from
+                seen_keys = set(previous.seen_keys)
+
+        overlap_start = fetched_to - self._overlap
+        seen_keys.update(
+            _sale_key(sale)
+            for sale, timestamp in zip(items, timestamps)
+            if timestamp >= overlap_start
+        )
+        return SalesWatermark(timestamp=latest, seen_keys=seen_keys, fetched_to=fetched_to)
+
+
+def _isoformat(value: datetime | None) -> str | None:
+    return None if value is None else value.isoformat()
+
+
+def _parse_datetime(value: str | None) -> datetime | None:
+    if value is None:
+        return None
+    return ProjectTime.to_project_timezone(datetime.fromisoformat(value))
+
+
+def _sale_key(sale: BaseSaleModel) -> str:
+    """Строковый ключ продажи для хранения в отметке"""
+    return "|".join(
+        ProjectTime.to_project_timezone(part).isoformat() if isinstance(part, datetime) else str(part)
+        for part in sale.key
+    )
@@ -0,0 +1,61 @@
+"""
+Объединение одинаковых одновременных запросов (single-flight)
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Объединяет конкурентные вызовы с одинаковым ключом в один.
+
+    Пока вызов с ключом выполняется, остальные вызовы с тем же ключом ждут
+    его результата, а не запускают свой. Отмена одного из ожидающих не
+    отменяет общий вызов для остальных; он отменяется, только когда его
+    больше никто не ждёт.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self._waiters: dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполнить fn или присоединиться к уже выполняющемуся вызову с тем же ключом
+
+        Args:
+            key: Ключ вызова (эндпоинт и параметры запроса)
+            fn: Корутина, выполняющая запрос
+
+        Returns:
+            Any: Результат общего вызова
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda t: self._forget(key, t))
+
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and self._calls.get(key) is task and self._waiters[key] == 1:
+                task.cancel()
+            raise
+        finally:
+            if self._calls.get(key) is task:
+                self._waiters[key] -= 1
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+            del self._waiters[key]
+        # Помечаем исключение как полученное, даже если результат уже никто не ждёт
+        if not task.cancelled():
+            task.exception()
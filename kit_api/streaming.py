@@ -0,0 +1,214 @@
+"""
+Потоковый разбор ответов Kit API
+"""
+
+import json
+import re
+
+_WHITESPACE = frozenset(b" \t\r\n")
+_STRUCTURAL = re.compile(rb'["{}\[\]]')
+_SCALAR_END = re.compile(rb"[,}\]\s]")
+
+_OPEN_OBJECT = ord("{")
+_OPEN_ARRAY = ord("[")
+_CLOSE_OBJECT = ord("}")
+_CLOSE_ARRAY = ord("]")
+_QUOTE = ord('"')
+_COMMA = ord(",")
+_COLON = ord(":")
+_BACKSLASH = ord("\\")
+
+_START, _KEY, _COLON_STATE, _VALUE, _ARRAY_START, _ARRAY, _DONE = range(7)
+
+
+class JSONArrayStreamParser:
+    """
+    Инкрементальный разбор JSON объекта верхнего уровня с большим массивом.
+
+    Тело ответа подаётся частями через feed(). Элементы массива array_key
+    возвращаются по мере того, как они полностью получены (в виде байтов,
+    без разбора), поэтому в памяти находится только текущая часть тела.
+    Остальные поля верхнего уровня (ResultCode, ErrorMessage) сохраняются
+    в fields в исходном виде.
+    """
+
+    def __init__(self, array_key: str = "Sales"):
+        """
+        Args:
+            array_key: Поле верхнего уровня с массивом элементов
+        """
+        self.array_key = array_key
+        self.fields: dict[str, bytes] = {}
+        self._buffer = bytearray()
+        self._pos = 0
+        self._state = _START
+        self._key: str | None = None
+
+    @property
+    def done(self) -> bool:
+        """Объект верхнего уровня получен полностью"""
+        return self._state == _DONE
+
+    def field(self, key: str):
+        """Разобранное значение поля верхнего уровня (None, если его ещё нет)"""
+        raw = self.fields.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    def feed(self, chunk: bytes) -> list[bytes]:
+        """
+        Подать очередную часть тела ответа
+
+        Args:
+            chunk: Часть тела
+
+        Returns:
+            list[bytes]: Полностью полученные элементы массива (JSON каждого элемента)
+
+        Raises:
+            ValueError: Тело не является JSON объектом ожидаемой структуры
+        """
+        self._buffer += chunk
+        items: list[bytes] = []
+        buffer = self._buffer
+
+        while self._state != _DONE:
+            i = self._skip_whitespace()
+            if i < 0:
+                break
+            char = buffer[i]
+
+            if self._state == _START:
+                if char != _OPEN_OBJECT:
+                    raise ValueError("Ожидался JSON объект")
+                self._pos = i + 1
+                self._state = _KEY
+
+            elif self._state == _KEY:
+                if char == _CLOSE_OBJECT:
+                    self._pos = i + 1
+                    self._state = _DONE
+                elif char == _COMMA:
+                    self._pos = i + 1
+                elif char == _QUOTE:
+                    end = _string_end(buffer, i)
+                    if end < 0:
+                        break
+                    self._key = json.loads(buffer[i:end])
+                    self._pos = end
+                    self._state = _COLON_STATE
+                else:
+                    raise ValueError(f"Неожиданный символ {chr(char)!r} на месте ключа")
+
+            elif self._state == _COLON_STATE:
+                if char != _COLON:
+                    raise ValueError("Ожидалось ':' после ключа")
+                self._pos = i + 1
+                self._state = _ARRAY_START if self._key == self.array_key else _VALUE
+
+            elif self._state == _ARRAY_START and char == _OPEN_ARRAY:
+                self._pos = i + 1
+                self._state = _ARRAY
+
+            elif self._state in (_VALUE, _ARRAY_START):
+                end = _value_end(buffer, i)
+                if end < 0:
+                    break
+                self.fields[self._key] = bytes(buffer[i:end])
+                self._pos = end
+                self._state = _KEY
+
+            elif self._state == _ARRAY:
+                if char == _CLOSE_ARRAY:
+                    self._pos = i + 1
+                    self._state = _KEY
+                elif char == _COMMA:
+                    self._pos = i + 1
+                else:
+                    end = _value_end(buffer, i)
+                    if end < 0:
+                        break
+                    items.append(bytes(buffer[i:end]))
+                    self._pos = end
+
+        # Разобранная часть буфера больше не нужна
+        del buffer[:self._pos]
+        self._pos = 0
+        return items
+
+    def close(self) -> None:
+        """
+        Проверить, что тело получено полностью
+
+        Raises:
+            ValueError: Тело ответа оборвалось
+        """
+        if self._state != _DONE:
+            raise ValueError("JSON ответ оборвался до конца объекта")
+
+    def _skip_whitespace(self) -> int:
+        buffer = self._buffer
+        i = self._pos
+        length = len(buffer)
+        while i < length and buffer[i] in _WHITESPACE:
+            i += 1
+        self._pos = i
+        return i if i < length else -1
+
+
+def _string_end(buffer: bytearray, start: int) -> int:
+    """Индекс после закрывающей кавычки строки, начинающейся в start (-1 - строка не получена)"""
+    i = start + 1
+    while True:
+        end = buffer.find(b'"', i)
+        if end < 0:
+            return -1
+        backslashes = 0
+        j = end - 1
+        while buffer[j] == _BACKSLASH:
+            backslashes += 1
+            j -= 1
+        if backslashes % 2 == 0:
+            return end + 1
+        i = end + 1
+
+
+def _value_end(buffer: bytearray, start: int) -> int:
+    """Индекс после JSON значения, начинающегося в start (-1 - значение не получено)"""
+    char = buffer[start]
+    if char == _QUOTE:
+        return _string_end(buffer, start)
+
+    if char == _OPEN_OBJECT:
+        # Быстрый путь для плоских объектов (строки продаж): без вложенных
+        # объектов, экранирования и фигурных скобок внутри строк
+        end = buffer.find(b"}", start)
+        if end < 0:
+            return -1
+        if (
+                buffer.count(b"{", start + 1, end) == 0
+                and buffer.count(b"\\", start, end) == 0
+                and buffer.count(b'"', start, end) % 2 == 0
+        ):
+            return end + 1
+
+    if char in (_OPEN_OBJECT, _OPEN_ARRAY):
+        depth = 0
+        i = start
+        while True:
+            match = _STRUCTURAL.search(buffer, i)
+            if match is None:
+                return -1
+            position = match.start()
+            found = buffer[position]
+            if found == _QUOTE:
+                i = _string_end(buffer, position)
+                if i < 0:
+                    return -1
+                continue
+            depth += 1 if found in (_OPEN_OBJECT, _OPEN_ARRAY) else -1
+            i = position + 1
+            if depth == 0:
+                return i
+
+    match = _SCALAR_END.search(buffer, start)
+    return match.start() if match else -1
@@ -2,7 +2,10 @@
 API для получения текущего timestamp
 """
 
+import asyncio
 import json
+import time
+
 import aiohttp
 import requests
 from aiohttp import ClientError as AioHTTPClientError, ContentTypeError
@@ -76,3 +79,119 @@ class TimestampAPI:
         except requests.RequestException as e:
             raise KitAPINetworkError(f"Ошибка сети при получении timestamp: {e}") from e
 
+
+
+class SyncedTimestampAPI(TimestampAPI):
+    """
+    Провайдер timestamp с локальными часами, синхронизированными с сервером.
+
+    Смещение относительно удалённого источника времени определяется одним
+    запросом к TimestampAPI и повторно - по расписанию (resync_interval)
+    или после вызова invalidate(). Между синхронизациями timestamp выдаётся
+    локально, без сетевых запросов.
+
+    Выдаваемые значения строго возрастают: если в одну секунду запрошено
+    несколько значений, следующие получают +1 к предыдущему. Поэтому при
+    всплеске запросов значения могут временно опережать реальное время.
+    """
+
+    def __init__(self, base_url: str | None = None, resync_interval: float | None = 3600.0):
+        """
+        Args:
+            base_url: URL для получения timestamp (см. TimestampAPI)
+            resync_interval: Интервал повторной синхронизации в секундах.
+                             None - синхронизироваться только один раз
+        """
+        super().__init__(base_url)
+        self._resync_interval = resync_interval
+        self._offset: float | None = None
+        self._synced_at: float = 0.0
+        self._last_issued: int = 0
+        # Провайдер общий для клиентов процесса: блокировка создаётся для каждого event loop
+        self._sync_lock: asyncio.Lock | None = None
+        self._sync_loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def is_synced(self) -> bool:
+        """Проверить, актуально ли смещение локальных часов"""
+        if self._offset is None:
+            return False
+        if self._resync_interval is None:
+            return True
+        return time.monotonic() - self._synced_at < self._resync_interval
+
+    def invalidate(self) -> None:
+        """Сбросить смещение: следующий запрос timestamp выполнит синхронизацию"""
+        self._offset = None
+
+    async def async_sync(self) -> None:
+        """
+        Синхронизировать локальные часы с удалённым источником времени
+
+        Raises:
+            KitAPINetworkError: Ошибка сети
+            KitAPIError: Ошибка при получении timestamp
+        """
+        started = time.time()
+        remote_now = await super().async_get_now()
+        finished = time.time()
+        self._apply_sync(remote_now, (started + finished) / 2)
+
+    def sync(self) -> None:
+        """
+        Синхронно синхронизировать локальные часы с удалённым источником времени
+
+        Raises:
+            KitAPINetworkError: Ошибка сети
+            KitAPIError: Ошибка при получении timestamp
+        """
+        started = time.time()
+        remote_now = super().get_now()
+        finished = time.time()
+        self._apply_sync(remote_now, (started + finished) / 2)
+
+    async def async_get_now(self) -> int:
+        """
+        Асинхронно получить следующий timestamp
+
+        Сетевой запрос выполняется только при отсутствии актуальной синхронизации;
+        конкурентные вызовы в этот момент ждут одну общую синхронизацию.
+
+        Returns:
+            int: Текущий timestamp в секундах, строго больший предыдущего выданного
+        """
+        if not self.is_synced:
+            async with self._lock():
+                if not self.is_synced:
+                    await self.async_sync()
+        return self._next()
+
+    def get_now(self) -> int:
+        """
+        Синхронно получить следующий timestamp
+
+        Returns:
+            int: Текущий timestamp в секундах, строго больший предыдущего выданного
+        """
+        if not self.is_synced:
+            self.sync()
+        return self._next()
+
+    def _lock(self) -> asyncio.Lock:
+        """Блокировка синхронизации для текущего event loop"""
+        loop = asyncio.get_running_loop()
+        if self._sync_lock is None or self._sync_loop is not loop:
+            self._sync_lock = asyncio.Lock()
+            self._sync_loop = loop
+        return self._sync_lock
+
+    def _apply_sync(self, remote_now: int, local_now: float) -> None:
+        """Сохранить смещение между удалённым и локальным временем"""
+        self._offset = remote_now - local_now
+        self._synced_at = time.monotonic()
+
+    def _next(self) -> int:
+        """Выдать следующий строго возрастающий timestamp"""
+        now = int(time.time() + self._offset)
+        self._last_issued = max(now, self._last_issued + 1)
+        return self._last_issued
@@ -0,0 +1,137 @@
+"""
+Хуки трассировки запросов к Kit API
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable
+
+import aiohttp
+
+
+@dataclass
+class RequestTrace:
+    """
+    Замеры одного вызова эндпоинта (все длительности - в секундах).
+
+    Если вызов повторялся после отказа с кодом 27, длительности суммируются
+    по всем попыткам, а attempts содержит их число.
+    """
+    endpoint: str
+    started_at: float = field(default_factory=time.perf_counter)
+    attempts: int = 0
+    # Получение RequestId
+    request_id: float = 0.0
+    # Ожидание слота ограничителя запросов
+    rate_limit_wait: float = 0.0
+    # Установка соединения (только для сессии, созданной клиентом)
+    connect: float = 0.0
+    # От отправки запроса до получения заголовков ответа (без connect)
+    time_to_first_byte: float = 0.0
+    # Загрузка тела ответа
+    download: float = 0.0
+    # Разбор JSON
+    decode: float = 0.0
+    # Валидация моделей pydantic
+    validation: float = 0.0
+    # Разбор и валидация выполнялись вне event loop
+    offloaded: bool = False
+    request_bytes: int = 0
+    response_bytes: int = 0
+    result_code: int | None = None
+    error: BaseException | None = None
+    total: float = 0.0
+
+
+class RequestTracer:
+    """
+    Интерфейс трассировки запросов.
+
+    Базовая реализация ничего не делает; для экспорта метрик переопределите
+    нужные методы и передайте экземпляр в KitVendingAPIClient(tracer=...).
+    Без трейсера клиент не создаёт RequestTrace и не делает лишних замеров.
+    """
+
+    def on_request_start(self, trace: RequestTrace) -> None:
+        """Вызов эндпоинта начат (до ожидания слота)"""
+
+    def on_request_end(self, trace: RequestTrace) -> None:
+        """Вызов эндпоинта завершён (успешно или с ошибкой trace.error)"""
+
+
+_current_trace: ContextVar[RequestTrace | None] = ContextVar("kit_api_trace", default=None)
+
+
+def current_trace() -> RequestTrace | None:
+    """Трасса вызова эндпоинта, выполняющегося в текущем контексте"""
+    return _current_trace.get()
+
+
+@contextmanager
+def trace_request(tracer: RequestTracer, endpoint: str):
+    """
+    Контекстный менеджер: трасса вызова эндпоинта, доступная через current_trace().
+    Ошибки в хуках трейсера записываются в лог и не прерывают запрос.
+
+    Args:
+        tracer: Трейсер, получающий трассу
+        endpoint: Эндпоинт, например "/GetSales"
+    """
+    trace = start_trace(tracer, endpoint)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    except BaseException as e:
+        trace.error = e
+        raise
+    finally:
+        _current_trace.reset(token)
+        finish_trace(tracer, trace)
+
+
+def start_trace(tracer: RequestTracer, endpoint: str) -> RequestTrace:
+    """
+    Начать трассу вызова без установки current_trace(): для вызовов, которые
+    отдают результат частями (асинхронный генератор не должен держать ContextVar
+    между yield - контекст потребителя и финализатора генератора другой)
+    """
+    trace = RequestTrace(endpoint)
+    _call_hook(tracer.on_request_start, trace)
+    return trace
+
+
+def finish_trace(tracer: RequestTracer, trace: RequestTrace) -> None:
+    """Завершить трассу, начатую start_trace(), и передать её трейсеру"""
+    trace.total = time.perf_counter() - trace.started_at
+    _call_hook(tracer.on_request_end, trace)
+
+
+def _call_hook(hook: Callable[[RequestTrace], None], trace: RequestTrace) -> None:
+    try:
+        hook(trace)
+    except Exception as e:
+        logging.warning(f"Ошибка трейсера запросов: {e}")
+
+
+def connection_trace_config() -> aiohttp.TraceConfig:
+    """
+    TraceConfig aiohttp, записывающий время установки соединения в current_trace().
+    Подключается к сессии, которую создаёт клиент с трейсером.
+    """
+
+    async def on_start(session, context, params) -> None:
+        context.connect_started = time.perf_counter()
+
+    async def on_end(session, context, params) -> None:
+        trace = current_trace()
+        started = getattr(context, "connect_started", None)
+        if trace is not None and started is not None:
+            trace.connect += time.perf_counter() - started
+
+    config = aiohttp.TraceConfig()
+    config.on_connection_create_start.append(on_start)
+    config.on_connection_create_end.append(on_end)
+    return config
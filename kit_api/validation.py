@@ -0,0 +1,463 @@
+"""
+Режимы валидации ответов Kit API
+"""
+
+from collections.abc import Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import Enum
+from functools import cache
+from operator import itemgetter
+from types import UnionType
+from typing import Annotated, Any, Callable, Mapping, TypeVar, Union, get_args, get_origin
+
+from pydantic import BaseModel, BeforeValidator, Discriminator, Tag, TypeAdapter, ValidationError
+from pydantic.fields import FieldInfo
+
+from kit_api.exceptions import KitAPIValidationError
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class ValidationMode(str, Enum):
+    """
+    Режим построения моделей из ответа API
+
+    STRICT - полная валидация pydantic (по умолчанию).
+    TRUSTED - модели собираются по алиасам полей без проверки типов значений: для
+              собственных конвейеров, где схема Kit контролируется фикстурами.
+              Отсутствующие обязательные поля и неизвестные варианты размеченных
+              объединений отклоняются (ValidationError); преобразования полей
+              (BeforeValidator, например разбор времени продаж) выполняются.
+              По CPU режим не быстрее STRICT: время построения продаж определяют
+              разбор времени и создание объектов, а не проверки pydantic.
+    LAZY - элементы коллекций хранятся как разобранный JSON и валидируются
+           (в режиме STRICT) при первом обращении к ним.
+    """
+    STRICT = "strict"
+    TRUSTED = "trusted"
+    LAZY = "lazy"
+
+
+# Режим валидации вызовов в текущем контексте (None - режим клиента)
+_current_validation: ContextVar[ValidationMode | None] = ContextVar("kit_api_validation", default=None)
+
+
+@contextmanager
+def validation_mode(mode: ValidationMode | str | None):
+    """
+    Задать режим валидации ответов для вызовов клиента внутри блока
+
+    Args:
+        mode: Режим валидации (None - не менять текущий)
+
+    Raises:
+        KitAPIValidationError: Неизвестный режим
+    """
+    if mode is None:
+        yield
+        return
+    token = _current_validation.set(resolve_validation_mode(mode))
+    try:
+        yield
+    finally:
+        _current_validation.reset(token)
+
+
+def resolve_validation_mode(mode: ValidationMode | str) -> ValidationMode:
+    """
+    Привести режим валидации к ValidationMode
+
+    Raises:
+        KitAPIValidationError: Неизвестный режим
+    """
+    try:
+        return ValidationMode(mode)
+    except ValueError:
+        raise KitAPIValidationError(f"Неизвестный режим валидации: {mode}")
+
+
+def current_validation_mode() -> ValidationMode | None:
+    """Режим валидации, заданный validation_mode() (None - режим клиента)"""
+    return _current_validation.get()
+
+
+_MISSING = object()
+
+
+class LazyList(Sequence):
+    """
+    Список элементов коллекции, валидирующий элемент при первом обращении.
+
+    Исходные записи доступны через raw; провалидированные элементы кэшируются.
+    """
+
+    __slots__ = ("_raw", "_items", "_validate")
+
+    def __init__(self, raw: list, validate: Callable[[Any], Any]):
+        self._raw = raw
+        self._items = [_MISSING] * len(raw)
+        self._validate = validate
+
+    @property
+    def raw(self) -> list:
+        """Исходные записи ответа"""
+        return self._raw
+
+    @property
+    def validated_count(self) -> int:
+        """Сколько элементов уже провалидировано"""
+        return sum(item is not _MISSING for item in self._items)
+
+    def with_raw(self, raw: list) -> "LazyList":
+        """Ленивый список других записей того же типа"""
+        return LazyList(raw, self._validate)
+
+    def copy(self) -> list:
+        return list(self)
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._raw)))]
+        item = self._items[index]
+        if item is _MISSING:
+            item = self._items[index] = self._validate(self._raw[index])
+        return item
+
+    def __iter__(self):
+        for index in range(len(self._raw)):
+            yield self[index]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (list, LazyList)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __reduce__(self):
+        # Для пула процессов: передаются исходные записи, валидация - на стороне получателя
+        return LazyList, (self._raw, self._validate)
+
+    def __repr__(self) -> str:
+        return f"LazyList({len(self._raw)} элементов, провалидировано {self.validated_count})"
+
+
+class _FieldItemValidator:
+    """Валидатор элемента списка поля модели (сериализуемый для пула процессов)"""
+
+    __slots__ = ("model", "field")
+
+    def __init__(self, model: type[BaseModel], field: str):
+        self.model = model
+        self.field = field
+
+    def __call__(self, value: Any) -> Any:
+        return _item_adapter(self.model, self.field).validate_python(value)
+
+    def __reduce__(self):
+        return _FieldItemValidator, (self.model, self.field)
+
+
+def validate_model(model: type[ModelT], data: Mapping, mode: ValidationMode) -> ModelT:
+    """
+    Построить модель ответа в заданном режиме
+
+    Args:
+        model: Модель ответа (коллекция)
+        data: Разобранный JSON ответа
+        mode: Режим валидации
+
+    Raises:
+        ValidationError: Ответ не соответствует модели (в режиме TRUSTED проверяются
+                         наличие полей и варианты объединений, в режиме LAZY -
+                         только наличие полей верхнего уровня)
+    """
+    if mode is ValidationMode.TRUSTED:
+        return _builder(model)(data)
+    if mode is ValidationMode.STRICT or not _has_required_fields(model, data):
+        return model.model_validate(data)
+
+    values = {}
+    for name, alias, field in _aliases(model):
+        if alias not in data:
+            continue
+        if get_origin(field.annotation) is list and isinstance(data[alias], list):
+            values[name] = LazyList(_apply_before(model, name, data[alias]), _FieldItemValidator(model, name))
+        else:
+            values[name] = _field_adapter(model, name).validate_python(data[alias])
+    return model.model_construct(**values)
+
+
+def validate_items(model: type[BaseModel], field: str, rows: list, mode: ValidationMode) -> Sequence:
+    """
+    Построить элементы списка поля модели в заданном режиме
+    (например, записи продаж потоковой выгрузки для SalesCollection.items)
+    """
+    if mode is ValidationMode.TRUSTED:
+        return _field_builder(model, field)(rows)
+    if mode is ValidationMode.LAZY:
+        return LazyList(_apply_before(model, field, rows), _FieldItemValidator(model, field))
+    return _field_adapter(model, field).validate_python(rows)
+
+
+def _apply_before(model: type[BaseModel], field: str, value: Any) -> Any:
+    """
+    Применить BeforeValidator поля к списку до откладывания валидации элементов
+    (например, интернирование строк продаж в режиме LAZY)
+    """
+    for func in reversed(_before_validators(model, field)):
+        value = func(value)
+    return value
+
+
+def _has_required_fields(model: type[BaseModel], data: Any) -> bool:
+    return isinstance(data, Mapping) and all(
+        alias in data for _, alias, field in _aliases(model) if field.is_required()
+    )
+
+
+@cache
+def _aliases(model: type[BaseModel]) -> list[tuple[str, str, FieldInfo]]:
+    """Поля модели: (имя, ключ во входных данных, описание поля)"""
+    result = []
+    for name, field in model.model_fields.items():
+        alias = field.validation_alias if isinstance(field.validation_alias, str) else field.alias
+        result.append((name, alias or name, field))
+    return result
+
+
+@cache
+def _field_adapter(model: type[BaseModel], field: str) -> TypeAdapter:
+    info = model.model_fields[field]
+    if not info.metadata:
+        return TypeAdapter(info.annotation)
+    return TypeAdapter(Annotated[(info.annotation, *info.metadata)])
+
+
+@cache
+def _before_validators(model: type[BaseModel], field: str) -> tuple[Callable[[Any], Any], ...]:
+    return tuple(item.func for item in model.model_fields[field].metadata if isinstance(item, BeforeValidator))
+
+
+@cache
+def _item_adapter(model: type[BaseModel], field: str) -> TypeAdapter:
+    return TypeAdapter(get_args(model.model_fields[field].annotation)[0])
+
+
+# Построение моделей в режиме TRUSTED. План модели (алиасы, обязательные поля,
+# преобразования) строится один раз; на запись - выборка значений по алиасам,
+# преобразования полей и создание экземпляра без валидатора pydantic.
+
+def _error(title: str, error_type: str, loc: tuple, value: Any, context: dict | None = None) -> ValidationError:
+    line = {"type": error_type, "loc": loc, "input": value}
+    if context is not None:
+        line["ctx"] = context
+    return ValidationError.from_exception_data(title, [line])
+
+
+def _prefixed(error: ValidationError, loc: tuple) -> ValidationError:
+    """Ошибка вложенного значения с путём от внешнего"""
+    lines = []
+    for line in error.errors():
+        prefixed = {"type": line["type"], "loc": (*loc, *line["loc"]), "input": line["input"]}
+        if "ctx" in line:
+            prefixed["ctx"] = line["ctx"]
+        lines.append(prefixed)
+    return ValidationError.from_exception_data(error.title, lines)
+
+
+@cache
+def _builder(model: type[ModelT]) -> Callable[[Any], ModelT]:
+    """
+    Функция построения модели без проверки типов значений
+
+    Raises (при вызове):
+        ValidationError: Нет обязательного поля, значение - не объект или
+                         вариант объединения не найден
+    """
+    required = []
+    optional = []
+    converted = []
+    for name, alias, field in _aliases(model):
+        convert = _converter(model.__name__, field.annotation, tuple(field.metadata))
+        if field.is_required():
+            required.append((name, alias))
+        else:
+            optional.append((name, alias, field))
+        if convert is not None:
+            converted.append((name, alias, convert))
+
+    names = tuple(name for name, _ in required)
+    aliases = tuple(alias for _, alias in required)
+    if len(aliases) == 1:
+        single = itemgetter(*aliases)
+
+        def get_required(data):
+            return (single(data),)
+    elif aliases:
+        get_required = itemgetter(*aliases)
+    else:
+        def get_required(data):
+            return ()
+
+    title = model.__name__
+    required_set = frozenset(names)
+    new = object.__new__
+    set_attribute = object.__setattr__
+    has_private = bool(model.__private_attributes__)
+
+    def build(data: Any) -> ModelT:
+        # Проверка типа dict - без медленного isinstance для ABC
+        if type(data) is not dict and not isinstance(data, Mapping):
+            raise _error(title, "model_type", (), data, {"class_name": title})
+        try:
+            values = dict(zip(names, get_required(data)))
+        except KeyError:
+            missing = [alias for alias in aliases if alias not in data]
+            raise ValidationError.from_exception_data(
+                title, [{"type": "missing", "loc": (alias,), "input": data} for alias in missing]
+            ) from None
+        if optional:
+            for name, alias, _ in optional:
+                if alias in data:
+                    values[name] = data[alias]
+            fields_set = set(values)
+            for name, _, field in optional:
+                if name not in values:
+                    values[name] = field.get_default(call_default_factory=True)
+        else:
+            fields_set = set(required_set)
+        for name, alias, convert in converted:
+            if name in fields_set:
+                try:
+                    values[name] = convert(values[name])
+                except ValidationError as e:
+                    raise _prefixed(e, (alias,)) from None
+        if has_private:
+            return model.model_construct(fields_set, **values)
+        instance = new(model)
+        set_attribute(instance, "__dict__", values)
+        set_attribute(instance, "__pydantic_fields_set__", fields_set)
+        set_attribute(instance, "__pydantic_extra__", None)
+        set_attribute(instance, "__pydantic_private__", None)
+        return instance
+
+    return build
+
+
+@cache
+def _field_builder(model: type[BaseModel], field: str) -> Callable[[Any], Any]:
+    """Построение значения поля модели в режиме TRUSTED"""
+    info = model.model_fields[field]
+    convert = _converter(model.__name__, info.annotation, tuple(info.metadata))
+    return convert if convert is not None else (lambda value: value)
+
+
+def _converter(title: str, annotation: Any, metadata: tuple = ()) -> Callable[[Any], Any] | None:
+    """Преобразование сырого значения по аннотации (None - значение берётся как есть)"""
+    origin = get_origin(annotation)
+    if origin is Annotated:
+        inner, *extra = get_args(annotation)
+        return _converter(title, inner, (*metadata, *extra))
+
+    convert = None
+    if origin in (Union, UnionType):
+        convert = _union_converter(title, get_args(annotation), metadata)
+    elif origin is list:
+        item = _converter(title, get_args(annotation)[0])
+        convert = _list_converter(title, item)
+    elif isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        convert = _builder(annotation)
+
+    before = tuple(reversed([item.func for item in metadata if isinstance(item, BeforeValidator)]))
+    if not before:
+        return convert
+
+    def apply(value):
+        # BeforeValidator применяются в обратном порядке, как в pydantic
+        for func in before:
+            value = func(value)
+        return convert(value) if convert is not None else value
+
+    return apply
+
+
+def _list_converter(title: str, item: Callable[[Any], Any] | None) -> Callable[[Any], Any]:
+    """Построение списка: элементы-модели строятся, остальные берутся как есть"""
+
+    def convert(value):
+        if not isinstance(value, list):
+            raise _error(title, "list_type", (), value)
+        if item is None:
+            return value
+        try:
+            return [item(element) for element in value]
+        except ValidationError as e:
+            # Путь ошибки - с индексом записи; повторное построение только на ошибке
+            for index, element in enumerate(value):
+                try:
+                    item(element)
+                except ValidationError:
+                    raise _prefixed(e, (index,)) from None
+            raise
+
+    return convert
+
+
+def _union_converter(title: str, members: tuple, metadata: tuple) -> Callable[[Any], Any] | None:
+    """
+    Построение варианта размеченного объединения по дискриминатору
+    (объединения без моделей, например int | None, - как есть)
+    """
+    discriminator = None
+    for item in metadata:
+        if isinstance(item, Discriminator):
+            discriminator = item.discriminator
+        elif isinstance(item, FieldInfo) and item.discriminator is not None:
+            discriminator = item.discriminator
+
+    if discriminator is None:
+        if any(_converter(title, member) is not None for member in members):
+            raise TypeError(f"Объединение моделей без дискриминатора не поддерживается режимом trusted: {members}")
+        return None
+
+    builders = {}
+    if callable(discriminator):
+        # Дискриминатор-функция (например, _sale_kind) возвращает Tag варианта
+        for member in members:
+            model, *extra = get_args(member)
+            tag = next(item.tag for item in extra if isinstance(item, Tag))
+            builders[tag] = _builder(model)
+
+        def choose(value):
+            return discriminator(value)
+    else:
+        # Дискриминатор - поле вариантов с Literal значениями
+        alias = discriminator
+        for member in members:
+            model = get_args(member)[0] if get_origin(member) is Annotated else member
+            alias = next(key for name, key, _ in _aliases(model) if name == discriminator)
+            for tag in get_args(model.model_fields[discriminator].annotation):
+                builders[tag] = _builder(model)
+
+        def choose(value):
+            return value.get(alias) if type(value) is dict or isinstance(value, Mapping) else None
+
+    expected = ", ".join(repr(tag) for tag in builders)
+
+    def convert(value):
+        tag = choose(value)
+        builder = builders.get(tag)
+        if builder is None:
+            raise _error(
+                title, "union_tag_invalid", (), value,
+                {"discriminator": repr(discriminator), "tag": repr(tag), "expected_tags": expected},
+            )
+        try:
+            return builder(value)
+        except ValidationError as e:
+            raise _prefixed(e, (tag,)) from None
+
+    return convert
@@ -2,12 +2,16 @@
 Общие фикстуры для тестов
 """
 
+import json
 import pytest
 import pytest_asyncio
 from unittest.mock import AsyncMock, MagicMock
 from datetime import datetime
 from zoneinfo import ZoneInfo
+from aiohttp import ClientResponse, ClientSession
 
+from kit_api.client import KitVendingAPIClient
+from kit_api.rate_limiter import RateLimiter
 from kit_api.timestamp_api import TimestampAPI
 
 
@@ -44,3 +48,75 @@ def api_credentials():
         "company_id": "test_company_id"
     }
 
+
+
+@pytest.fixture
+def sales_rows():
+    """Записи продаж в формате Kit API: товар, напиток по рецепту и продажа без вида"""
+    return [
+        {
+            "LineNumber": 1, "Sum": 100.0, "DateTime": "15.01.2024 12:30:45", "VendingMachine": 1,
+            "VendingMachineName": "VM 1", "MatrixId": 10, "GoodsName": "1|Вода",
+        },
+        {
+            "LineNumber": 2, "Sum": 60.0, "DateTime": "15.01.2024 10:00:00", "VendingMachine": 1,
+            "VendingMachineName": "VM 1", "MatrixId": 10, "FormulationId": 7,
+        },
+        {
+            "LineNumber": 3, "Sum": 80.5, "DateTime": "15.01.2024 11:00:00", "VendingMachine": 1,
+            "VendingMachineName": "VM 1", "MatrixId": 10,
+        },
+    ]
+
+
+@pytest.fixture
+def make_session():
+    """
+    Фабрика мока сессии, возвращающего ответы по очереди.
+    Словарь - тело ответа, читаемое через read(); другие объекты
+    (например, ответы с потоковым телом) возвращаются как есть
+    """
+
+    def factory(*bodies):
+        contexts = []
+        for body in bodies:
+            if isinstance(body, dict):
+                response = MagicMock(spec=ClientResponse)
+                response.read = AsyncMock(return_value=json.dumps(body).encode())
+                response.raise_for_status = MagicMock()
+            else:
+                response = body
+            context_manager = AsyncMock()
+            context_manager.__aenter__ = AsyncMock(return_value=response)
+            context_manager.__aexit__ = AsyncMock(return_value=None)
+            contexts.append(context_manager)
+
+        session = MagicMock(spec=ClientSession)
+        session.post = MagicMock(side_effect=contexts)
+        session.closed = False
+        return session
+
+    return factory
+
+
+@pytest.fixture
+def make_client(api_credentials, mock_timestamp_provider):
+    """Фабрика клиента с тестовыми учётными данными и свободным ограничителем запросов"""
+
+    def factory(**kwargs):
+        return KitVendingAPIClient(
+            login=api_credentials["login"],
+            password=api_credentials["password"],
+            company_id=api_credentials["company_id"],
+            timestamp_provider=mock_timestamp_provider,
+            rate_limiter=RateLimiter(max_requests=100, time_window=0.05),
+            **kwargs
+        )
+
+    return factory
+
+
+@pytest.fixture
+def client(make_client):
+    """Клиент с тестовыми учётными данными и свободным ограничителем запросов"""
+    return make_client()
@@ -0,0 +1,100 @@
+"""
+Тесты для ReferenceCache
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+
+from kit_api.cache import ReferenceCache
+
+
+class TestReferenceCache:
+    """Тесты ReferenceCache"""
+
+    @pytest.mark.asyncio
+    async def test_fresh_entry_is_served_from_cache(self):
+        """Тест что актуальная запись не загружается повторно"""
+        cache = ReferenceCache(ttl=60)
+        loader = AsyncMock(return_value="value")
+
+        assert await cache.get_or_load("/GetGoods", "key", loader) == "value"
+        assert await cache.get_or_load("/GetGoods", "key", loader) == "value"
+
+        assert loader.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_stale_entry_is_served_while_revalidating(self):
+        """Тест что устаревшая запись отдаётся сразу, а обновление идёт в фоне"""
+        cache = ReferenceCache(ttl=0, stale_ttl=60)
+        loader = AsyncMock(side_effect=["old", "new"])
+
+        assert await cache.get_or_load("/GetGoods", "key", loader) == "old"
+        assert await cache.get_or_load("/GetGoods", "key", loader) == "old"
+
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert loader.await_count == 2
+
+        cache._ttls["/GetGoods"] = 60
+        assert await cache.get_or_load("/GetGoods", "key", loader) == "new"
+
+    @pytest.mark.asyncio
+    async def test_expired_stale_entry_is_reloaded(self):
+        """Тест что запись старше stale_ttl загружается синхронно"""
+        cache = ReferenceCache(ttl=0, stale_ttl=0)
+        loader = AsyncMock(side_effect=["old", "new"])
+
+        assert await cache.get_or_load("/GetGoods", "key", loader) == "old"
+        assert await cache.get_or_load("/GetGoods", "key", loader) == "new"
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_keeps_stale_value(self, caplog):
+        """Тест что ошибка фонового обновления не затирает данные"""
+        cache = ReferenceCache(ttl=0, stale_ttl=60)
+        loader = AsyncMock(side_effect=["old", RuntimeError("boom")])
+
+        await cache.get_or_load("/GetGoods", "key", loader)
+        assert await cache.get_or_load("/GetGoods", "key", loader) == "old"
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        assert len(cache) == 1
+        assert "Не удалось обновить кэш" in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_per_endpoint_ttl_and_invalidate(self):
+        """Тест TTL по эндпоинтам и явного сброса"""
+        cache = ReferenceCache(ttl=60, ttls={"/GetSales": 0}, stale_ttl=0)
+        goods_loader = AsyncMock(return_value="goods")
+        sales_loader = AsyncMock(return_value="sales")
+
+        await cache.get_or_load("/GetGoods", "key", goods_loader)
+        await cache.get_or_load("/GetSales", "key", sales_loader)
+        await cache.get_or_load("/GetGoods", "key", goods_loader)
+        await cache.get_or_load("/GetSales", "key", sales_loader)
+
+        assert goods_loader.await_count == 1
+        assert sales_loader.await_count == 2
+
+        cache.invalidate("/GetGoods")
+        await cache.get_or_load("/GetGoods", "key", goods_loader)
+        assert goods_loader.await_count == 2
+
+        cache.invalidate()
+        assert len(cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_size_bound_evicts_least_recently_used(self):
+        """Тест вытеснения давно не использованной записи"""
+        cache = ReferenceCache(ttl=60, max_entries=2)
+        loader = AsyncMock(return_value="value")
+
+        await cache.get_or_load("/GetGoods", 1, loader)
+        await cache.get_or_load("/GetGoods", 2, loader)
+        await cache.get_or_load("/GetGoods", 1, loader)
+        await cache.get_or_load("/GetGoods", 3, loader)
+
+        assert len(cache) == 2
+        await cache.get_or_load("/GetGoods", 1, loader)
+        assert loader.await_count == 3
@@ -2,21 +2,32 @@
 Тесты для KitVendingAPIClient
 """
 
+import asyncio
+import multiprocessing
 import pytest
 import json
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from unittest.mock import AsyncMock, MagicMock, patch
-from datetime import datetime
+from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 from aiohttp import ClientResponse, ClientSession
 from aiohttp.client_exceptions import ClientError
+from pydantic import ValidationError
 
 from kit_api.client import KitVendingAPIClient, ResultCodes
+from kit_api.timestamp_api import SyncedTimestampAPI, TimestampAPI
+from kit_api.project_time import ProjectTime
+from kit_api.cache import ReferenceCache
+from kit_api.connection import ConnectionOptions
+from kit_api.rate_limiter import Priority, RateLimiter
+from kit_api.models import SalesCollection, VendingMachinesCollection
 from kit_api.exceptions import (
     KitAPIValidationError,
     KitAPIResponseError,
     KitAPINetworkError,
     KitAPIError,
     KitAPIAuthError,
+    KitAPIRateLimitError,
 )
 
 
@@ -78,6 +89,113 @@ class TestKitVendingAPIClientInit:
         assert client._session is None
         assert client._own_session is True
 
+    def test_limiter_is_scoped_per_credentials(self):
+        """Тест что ограничитель общий для одинаковых учётных данных и разный для разных"""
+        first = KitVendingAPIClient(login="login", password="password", company_id=101)
+        same = KitVendingAPIClient(login="login", password="password", company_id=101)
+        other = KitVendingAPIClient(login="login", password="password", company_id=102)
+
+        assert first.rate_limiter is same.rate_limiter
+        assert first.rate_limiter is not other.rate_limiter
+        assert first.rate_limiter is not KitVendingAPIClient._limiter
+
+        first.logout()
+        assert first.rate_limiter is KitVendingAPIClient._limiter
+
+    def test_explicit_rate_limiter(self):
+        """Тест что переданный ограничитель используется независимо от учётных данных"""
+        limiter = RateLimiter(max_requests=5, time_window=1.0)
+        client = KitVendingAPIClient(
+            login="login", password="password", company_id=101, rate_limiter=limiter
+        )
+
+        assert client.rate_limiter is limiter
+        client.logout()
+        assert client.rate_limiter is limiter
+
+    @pytest.mark.asyncio
+    async def test_bucket_limiters(self, api_credentials, mock_timestamp_provider):
+        """Тест что эндпоинт с отдельным ограничителем не расходует общий"""
+        shared = RateLimiter(max_requests=10, time_window=1.0)
+        sales = RateLimiter(max_requests=10, time_window=1.0)
+        client = KitVendingAPIClient(
+            login=api_credentials["login"],
+            password=api_credentials["password"],
+            company_id=api_credentials["company_id"],
+            timestamp_provider=mock_timestamp_provider,
+            rate_limiter=shared,
+            bucket_limiters={"/GetSales": sales},
+        )
+        mock_response = MagicMock(spec=ClientResponse)
+        mock_response.read = AsyncMock(return_value=json.dumps({"ResultCode": 0, "Sales": [], "Goods": []}).encode())
+        mock_response.raise_for_status = MagicMock()
+        client._session = create_mock_session_with_post(mock_response)
+
+        from_date = datetime(2024, 1, 1, tzinfo=ZoneInfo('Europe/Moscow'))
+        await client.get_sales(1, from_date, from_date + timedelta(hours=1))
+        await client.get_products()
+
+        assert len(sales.requests) == 1
+        assert len(shared.requests) == 1
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_priority_per_call(self, api_credentials, mock_timestamp_provider):
+        """Тест что приоритет метода передаётся ограничителю"""
+        limiter = RateLimiter(max_requests=10, time_window=1.0)
+        client = KitVendingAPIClient(
+            login=api_credentials["login"],
+            password=api_credentials["password"],
+            company_id=api_credentials["company_id"],
+            timestamp_provider=mock_timestamp_provider,
+            rate_limiter=limiter,
+        )
+        mock_response = MagicMock(spec=ClientResponse)
+        mock_response.read = AsyncMock(return_value=json.dumps({"ResultCode": 0, "Sales": [], "Goods": []}).encode())
+        mock_response.raise_for_status = MagicMock()
+        client._session = create_mock_session_with_post(mock_response)
+
+        from_date = datetime(2024, 1, 1, tzinfo=ZoneInfo('Europe/Moscow'))
+        await client.get_sales(1, from_date, from_date + timedelta(hours=1), priority=Priority.INTERACTIVE)
+        await client.get_sales_for_machines([1, 2], from_date, from_date + timedelta(hours=1), priority=Priority.BULK)
+        await client.get_products()
+
+        stats = limiter.lane_stats()
+        assert stats[Priority.INTERACTIVE].granted == 1
+        assert stats[Priority.BULK].granted == 2
+        assert stats[Priority.NORMAL].granted == 1
+        await client.close()
+
+    def test_init_default_timestamp_provider(self):
+        """Тест что по умолчанию используется провайдер с локальными часами"""
+        client = KitVendingAPIClient()
+        assert isinstance(client._timestamp_provider, SyncedTimestampAPI)
+
+    @pytest.mark.asyncio
+    async def test_default_timestamp_provider_is_shared_per_credentials(self):
+        """Тест что клиенты с одними учётными данными не выдают одинаковые RequestId"""
+        first = KitVendingAPIClient(login="shared_clock", password="p", company_id=1)
+        second = KitVendingAPIClient(login="shared_clock", password="p", company_id=1)
+        other = KitVendingAPIClient(login="other_clock", password="p", company_id=1)
+
+        assert first._timestamp_provider is second._timestamp_provider
+        assert first._timestamp_provider is not other._timestamp_provider
+
+        with patch.object(TimestampAPI, "async_get_now", AsyncMock(return_value=1_700_000_000)):
+            ids = [
+                await client._timestamp_provider.async_get_now()
+                for client in (first, second, first, second)
+            ]
+        assert len(set(ids)) == len(ids)
+
+    def test_explicit_timestamp_provider_survives_login(self, mock_timestamp_provider):
+        """Тест что переданный провайдер не заменяется общим при смене учётных данных"""
+        client = KitVendingAPIClient(timestamp_provider=mock_timestamp_provider)
+        client.login("shared_clock", "p", 1)
+        assert client._timestamp_provider is mock_timestamp_provider
+        client.logout()
+        assert client._timestamp_provider is mock_timestamp_provider
+
 
 class TestAuthMethods:
     """Тесты методов авторизации"""
@@ -165,6 +283,32 @@ class TestBuildAuth:
         with pytest.raises(KitAPIAuthError, match="Учётные данные не установлены"):
             client._build_auth(request_id)
 
+    @pytest.mark.parametrize("result_code, resynced", [
+        (2, True),
+        (3, True),
+        (1, False),
+        (ResultCodes.TOO_MANY_REQUEST, False),
+    ])
+    def test_clock_resync_only_on_configured_codes(self, result_code, resynced):
+        """Тест что часы пересинхронизируются только после заданных кодов ответа"""
+        provider = MagicMock(spec=SyncedTimestampAPI)
+        client = KitVendingAPIClient(timestamp_provider=provider, resync_result_codes={2, 3})
+
+        with pytest.raises(KitAPIResponseError):
+            client._check_result({"ResultCode": result_code, "ErrorMessage": "Ошибка"})
+
+        assert provider.invalidate.called is resynced
+
+    def test_no_clock_resync_by_default(self):
+        """Тест что без заданных кодов часы после отказа не пересинхронизируются"""
+        provider = MagicMock(spec=SyncedTimestampAPI)
+        client = KitVendingAPIClient(timestamp_provider=provider)
+
+        with pytest.raises(KitAPIResponseError):
+            client._check_result({"ResultCode": 2, "ErrorMessage": "Ошибка"})
+
+        assert not provider.invalidate.called
+
 
 class TestGetSession:
     """Тесты получения HTTP сессии"""
@@ -197,8 +341,13 @@ class TestGetSession:
         assert result == session
 
 
-class TestAsyncSendPostRequest:
-    """Тесты отправки POST запросов"""
+async def send_post_request(client: KitVendingAPIClient, data: dict) -> dict:
+    """Отправить POST запрос и проверить ответ, как это делает _request"""
+    return client._check_result(client._decode(await client._fetch("http://test.com", data)))
+
+
+class TestFetchAndCheckResult:
+    """Тесты отправки POST запросов и проверки ответа"""
 
     @pytest.mark.asyncio
     async def test_successful_request(self, api_credentials, sample_api_response):
@@ -211,13 +360,13 @@ class TestAsyncSendPostRequest:
 
         mock_response = MagicMock(spec=ClientResponse)
         mock_response.status = 200
-        mock_response.json = AsyncMock(return_value=sample_api_response)
+        mock_response.read = AsyncMock(return_value=json.dumps(sample_api_response).encode())
         mock_response.raise_for_status = MagicMock()
 
         mock_session = create_mock_session_with_post(mock_response)
         client._session = mock_session
 
-        result = await client._async_send_post_request("http://test.com", {"test": "data"})
+        result = await send_post_request(client, {"test": "data"})
 
         assert result == sample_api_response
         mock_session.post.assert_called_once()
@@ -239,14 +388,14 @@ class TestAsyncSendPostRequest:
 
         mock_response = MagicMock(spec=ClientResponse)
         mock_response.status = 200
-        mock_response.json = AsyncMock(return_value=error_response)
+        mock_response.read = AsyncMock(return_value=json.dumps(error_response).encode())
         mock_response.raise_for_status = MagicMock()
 
         mock_session = create_mock_session_with_post(mock_response)
         client._session = mock_session
 
         with pytest.raises(KitAPIResponseError) as exc_info:
-            await client._async_send_post_request("http://test.com", {"test": "data"})
+            await send_post_request(client, {"test": "data"})
 
         assert exc_info.value.result_code == 1
         await client.close()
@@ -267,16 +416,17 @@ class TestAsyncSendPostRequest:
 
         mock_response = MagicMock(spec=ClientResponse)
         mock_response.status = 200
-        mock_response.json = AsyncMock(return_value=error_response)
+        mock_response.read = AsyncMock(return_value=json.dumps(error_response).encode())
         mock_response.raise_for_status = MagicMock()
 
         mock_session = create_mock_session_with_post(mock_response)
         client._session = mock_session
 
         with pytest.raises(KitAPIResponseError) as exc_info:
-            await client._async_send_post_request("http://test.com", {"test": "data"})
+            await send_post_request(client, {"test": "data"})
 
         assert exc_info.value.result_code == ResultCodes.TOO_MANY_REQUEST
+        assert isinstance(exc_info.value, KitAPIRateLimitError)
         await client.close()
 
     @pytest.mark.asyncio
@@ -290,14 +440,14 @@ class TestAsyncSendPostRequest:
 
         mock_response = MagicMock(spec=ClientResponse)
         mock_response.status = 200
-        mock_response.json = AsyncMock(side_effect=json.JSONDecodeError("Invalid JSON", "", 0))
+        mock_response.read = AsyncMock(return_value=b"{invalid json")
         mock_response.raise_for_status = MagicMock()
 
         mock_session = create_mock_session_with_post(mock_response)
         client._session = mock_session
 
         with pytest.raises(KitAPIResponseError) as exc_info:
-            await client._async_send_post_request("http://test.com", {"test": "data"})
+            await send_post_request(client, {"test": "data"})
 
         assert exc_info.value.result_code == -1
         await client.close()
@@ -315,14 +465,14 @@ class TestAsyncSendPostRequest:
 
         mock_response = MagicMock(spec=ClientResponse)
         mock_response.status = 200
-        mock_response.json = AsyncMock(return_value=invalid_response)
+        mock_response.read = AsyncMock(return_value=json.dumps(invalid_response).encode())
         mock_response.raise_for_status = MagicMock()
 
         mock_session = create_mock_session_with_post(mock_response)
         client._session = mock_session
 
         with pytest.raises(KitAPIResponseError) as exc_info:
-            await client._async_send_post_request("http://test.com", {"test": "data"})
+            await send_post_request(client, {"test": "data"})
 
         assert exc_info.value.result_code == -1
         await client.close()
@@ -344,7 +494,7 @@ class TestAsyncSendPostRequest:
         client._session = mock_session
 
         with pytest.raises(KitAPINetworkError):
-            await client._async_send_post_request("http://test.com", {"test": "data"})
+            await send_post_request(client, {"test": "data"})
 
         await client.close()
 
@@ -382,18 +532,93 @@ class TestAPIMethods:
 
         mock_response = MagicMock(spec=ClientResponse)
         mock_response.status = 200
-        mock_response.json = AsyncMock(return_value=response_data)
+        mock_response.read = AsyncMock(return_value=json.dumps(response_data).encode())
         mock_response.raise_for_status = MagicMock()
 
         mock_session = create_mock_session_with_post(mock_response)
         client._session = mock_session
 
-        result = await client.get_sales(1, from_date, to_date)
+        result = await client.get_sales(1, from_date, to_date, window=timedelta(days=31))
 
         assert result is not None
         mock_session.post.assert_called_once()
         await client.close()
 
+    @pytest.mark.asyncio
+    async def test_get_sales_splits_long_period(self, api_credentials, mock_timestamp_provider):
+        """Тест разбиения длинного периода на окна и объединения результатов"""
+        client = KitVendingAPIClient(
+            login=api_credentials["login"],
+            password=api_credentials["password"],
+            company_id=api_credentials["company_id"],
+            timestamp_provider=mock_timestamp_provider,
+            sales_window=timedelta(days=1)
+        )
+
+        from_date = datetime(2024, 1, 1, tzinfo=ZoneInfo('Europe/Moscow'))
+        to_date = datetime(2024, 1, 4, tzinfo=ZoneInfo('Europe/Moscow'))
+
+        async def fake_window(vending_machine_id, window_from, window_to):
+            # Продажа на границе окон приходит в обоих окнах
+            return SalesCollection.model_validate({"Sales": [
+                make_sale(vending_machine_id, timestamp=ProjectTime.datetime_to_str_kit(window_to)),
+                make_sale(vending_machine_id, timestamp=ProjectTime.datetime_to_str_kit(window_from)),
+            ]})
+
+        with patch.object(client, "_get_sales_window", side_effect=fake_window) as window_mock:
+            result = await client.get_sales(1, from_date, to_date)
+
+        assert window_mock.await_count == 3
+        timestamps = [sale.timestamp for sale in result.items]
+        assert len(timestamps) == 4
+        assert timestamps == sorted(timestamps)
+
+    @pytest.mark.asyncio
+    async def test_get_sales_retries_failed_window(self, api_credentials, mock_timestamp_provider):
+        """Тест что неудачное окно повторяется отдельно"""
+        client = KitVendingAPIClient(
+            login=api_credentials["login"],
+            password=api_credentials["password"],
+            company_id=api_credentials["company_id"],
+            timestamp_provider=mock_timestamp_provider,
+            sales_window=timedelta(days=1)
+        )
+
+        from_date = datetime(2024, 1, 1, tzinfo=ZoneInfo('Europe/Moscow'))
+        to_date = datetime(2024, 1, 3, tzinfo=ZoneInfo('Europe/Moscow'))
+        calls = []
+
+        async def fake_window(vending_machine_id, window_from, window_to):
+            calls.append(window_from)
+            if window_from.day == 2 and calls.count(window_from) == 1:
+                raise KitAPINetworkError("Network error")
+            return SalesCollection.model_validate({"Sales": []})
+
+        with patch.object(client, "_get_sales_window", side_effect=fake_window):
+            await client.get_sales(1, from_date, to_date)
+
+        assert len(calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_get_sales_does_not_retry_response_errors(self, api_credentials, mock_timestamp_provider):
+        """Тест что ошибки ответа API (кроме превышения лимита) не повторяются"""
+        client = KitVendingAPIClient(
+            login=api_credentials["login"],
+            password=api_credentials["password"],
+            company_id=api_credentials["company_id"],
+            timestamp_provider=mock_timestamp_provider
+        )
+
+        from_date = datetime(2024, 1, 1, tzinfo=ZoneInfo('Europe/Moscow'))
+        to_date = datetime(2024, 1, 2, tzinfo=ZoneInfo('Europe/Moscow'))
+        window_mock = AsyncMock(side_effect=KitAPIResponseError("error", result_code=1))
+
+        with patch.object(client, "_get_sales_window", window_mock):
+            with pytest.raises(KitAPIResponseError):
+                await client.get_sales(1, from_date, to_date)
+
+        assert window_mock.await_count == 1
+
     @pytest.mark.asyncio
     async def test_get_products_without_auth_raises_error(self, mock_timestamp_provider):
         """Тест что запрос без учётных данных вызывает ошибку"""
@@ -419,7 +644,7 @@ class TestAPIMethods:
 
         mock_response = MagicMock(spec=ClientResponse)
         mock_response.status = 200
-        mock_response.json = AsyncMock(return_value=response_data)
+        mock_response.read = AsyncMock(return_value=json.dumps(response_data).encode())
         mock_response.raise_for_status = MagicMock()
 
         mock_session = create_mock_session_with_post(mock_response)
@@ -455,7 +680,7 @@ class TestAPIMethods:
 
         mock_response = MagicMock(spec=ClientResponse)
         mock_response.status = 200
-        mock_response.json = AsyncMock(return_value=response_data)
+        mock_response.read = AsyncMock(return_value=json.dumps(response_data).encode())
         mock_response.raise_for_status = MagicMock()
 
         mock_session = create_mock_session_with_post(mock_response)
@@ -491,7 +716,7 @@ class TestAPIMethods:
 
         mock_response = MagicMock(spec=ClientResponse)
         mock_response.status = 200
-        mock_response.json = AsyncMock(return_value=response_data)
+        mock_response.read = AsyncMock(return_value=json.dumps(response_data).encode())
         mock_response.raise_for_status = MagicMock()
 
         mock_session = create_mock_session_with_post(mock_response)
@@ -527,7 +752,7 @@ class TestAPIMethods:
 
         mock_response = MagicMock(spec=ClientResponse)
         mock_response.status = 200
-        mock_response.json = AsyncMock(return_value=response_data)
+        mock_response.read = AsyncMock(return_value=json.dumps(response_data).encode())
         mock_response.raise_for_status = MagicMock()
 
         mock_session = create_mock_session_with_post(mock_response)
@@ -539,6 +764,295 @@ class TestAPIMethods:
         await client.close()
 
 
+def make_sale(vending_machine_id: int, line: int = 1, timestamp: str = "15.01.2024 12:30:45") -> dict:
+    """Сырая запись продажи в формате Kit API"""
+    return {
+        "LineNumber": line,
+        "Sum": 100.0,
+        "DateTime": timestamp,
+        "VendingMachine": vending_machine_id,
+        "VendingMachineName": f"VM {vending_machine_id}",
+        "MatrixId": 10,
+        "GoodsName": "123|Test Product",
+    }
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    """Пул потоков, считающий переданные задачи"""
+
+    def __init__(self):
+        super().__init__(max_workers=1)
+        self.submitted = 0
+
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+
+class TestOffload:
+    """Тесты разбора больших ответов вне event loop"""
+
+    def make_client(self, api_credentials, mock_timestamp_provider, body, **kwargs):
+        client = KitVendingAPIClient(
+            login=api_credentials["login"],
+            password=api_credentials["password"],
+            company_id=api_credentials["company_id"],
+            timestamp_provider=mock_timestamp_provider,
+            rate_limiter=RateLimiter(max_requests=100, time_window=1.0),
+            **kwargs
+        )
+        mock_response = MagicMock(spec=ClientResponse)
+        mock_response.read = AsyncMock(return_value=body)
+        mock_response.raise_for_status = MagicMock()
+        client._session = create_mock_session_with_post(mock_response)
+        return client
+
+    @pytest.mark.asyncio
+    async def test_large_response_is_offloaded(self, api_credentials, mock_timestamp_provider):
+        """Тест что большой ответ разбирается в пуле и возвращается той же моделью"""
+        executor = CountingExecutor()
+        body = json.dumps({"ResultCode": 0, "Sales": [make_sale(1, line) for line in range(50)]}).encode()
+        client = self.make_client(
+            api_credentials, mock_timestamp_provider, body,
+            offload_threshold=1024, offload_executor=executor,
+        )
+
+        from_date = datetime(2024, 1, 15, tzinfo=ZoneInfo('Europe/Moscow'))
+        result = await client.get_sales(1, from_date, from_date + timedelta(hours=1))
+
+        assert executor.submitted == 1
+        assert isinstance(result, SalesCollection)
+        assert len(result.items) == 50
+        executor.shutdown()
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_small_response_stays_inline(self, api_credentials, mock_timestamp_provider):
+        """Тест что небольшой ответ разбирается в event loop"""
+        executor = CountingExecutor()
+        client = self.make_client(
+            api_credentials, mock_timestamp_provider, b'{"ResultCode": 0, "VendingMachines": []}',
+            offload_threshold=1024, offload_executor=executor,
+        )
+
+        result = await client.get_vending_machines()
+
+        assert executor.submitted == 0
+        assert isinstance(result, VendingMachinesCollection)
+        executor.shutdown()
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_offloaded_error_response(self, api_credentials, mock_timestamp_provider):
+        """Тест что код ошибки в большом ответе обрабатывается как обычно"""
+        body = json.dumps({"ResultCode": 5, "ErrorMessage": "x" * 100}).encode()
+        client = self.make_client(api_credentials, mock_timestamp_provider, body, offload_threshold=10)
+
+        with pytest.raises(KitAPIResponseError) as exc_info:
+            await client.get_vending_machines()
+
+        assert exc_info.value.result_code == 5
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_offloaded_invalid_json(self, api_credentials, mock_timestamp_provider):
+        """Тест что ошибка разбора большого ответа - KitAPIResponseError"""
+        client = self.make_client(api_credentials, mock_timestamp_provider, b"{invalid json" * 10, offload_threshold=10)
+
+        with pytest.raises(KitAPIResponseError, match="Не удалось разобрать JSON"):
+            await client.get_vending_machines()
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_process_pool_offload(self, api_credentials, mock_timestamp_provider):
+        """Тест разбора в пуле процессов"""
+        body = json.dumps({"ResultCode": 0, "Sales": [make_sale(1, line) for line in range(20)]}).encode()
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("fork")) as executor:
+            client = self.make_client(
+                api_credentials, mock_timestamp_provider, body,
+                offload_threshold=100, offload_executor=executor,
+            )
+            from_date = datetime(2024, 1, 15, tzinfo=ZoneInfo('Europe/Moscow'))
+            result = await client.get_sales(1, from_date, from_date + timedelta(hours=1))
+
+        assert len(result.items) == 20
+        await client.close()
+
+
+class TestReferenceCaching:
+    """Тесты кэширования справочных данных"""
+
+    @pytest.mark.asyncio
+    async def test_cached_reference_call_skips_request(self, api_credentials, mock_timestamp_provider):
+        """Тест что повторный запрос товаров обслуживается из кэша"""
+        client = KitVendingAPIClient(
+            login=api_credentials["login"],
+            password=api_credentials["password"],
+            company_id=api_credentials["company_id"],
+            timestamp_provider=mock_timestamp_provider,
+            cache=ReferenceCache(ttl=60)
+        )
+
+        mock_response = MagicMock(spec=ClientResponse)
+        mock_response.status = 200
+        mock_response.read = AsyncMock(return_value=json.dumps({"ResultCode": 0, "Goods": []}).encode())
+        mock_response.raise_for_status = MagicMock()
+
+        mock_session = create_mock_session_with_post(mock_response)
+        client._session = mock_session
+
+        first = await client.get_products()
+        second = await client.get_products()
+
+        assert first is second
+        mock_session.post.assert_called_once()
+
+        client.invalidate_cache("/GetGoods")
+        await client.get_products()
+        assert mock_session.post.call_count == 2
+        await client.close()
+
+
+class TestRequestCoalescing:
+    """Тесты объединения одинаковых одновременных запросов"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_calls_share_request(self, api_credentials, mock_timestamp_provider):
+        """Тест что одновременные одинаковые запросы выполняют один HTTP запрос"""
+        client = KitVendingAPIClient(
+            login=api_credentials["login"],
+            password=api_credentials["password"],
+            company_id=api_credentials["company_id"],
+            timestamp_provider=mock_timestamp_provider
+        )
+
+        async def slow_read():
+            await asyncio.sleep(0.01)
+            return json.dumps({"ResultCode": 0, "VendingMachines": []}).encode()
+
+        mock_response = MagicMock(spec=ClientResponse)
+        mock_response.status = 200
+        mock_response.read = AsyncMock(side_effect=slow_read)
+        mock_response.raise_for_status = MagicMock()
+
+        mock_session = create_mock_session_with_post(mock_response)
+        client._session = mock_session
+
+        results = await asyncio.gather(*(client.get_vending_machines() for _ in range(3)))
+
+        assert results[0] is results[1] is results[2]
+        mock_session.post.assert_called_once()
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_coalescing_can_be_disabled(self, api_credentials, mock_timestamp_provider):
+        """Тест отключения объединения запросов"""
+        client = KitVendingAPIClient(
+            login=api_credentials["login"],
+            password=api_credentials["password"],
+            company_id=api_credentials["company_id"],
+            timestamp_provider=mock_timestamp_provider,
+            coalesce_requests=False
+        )
+
+        mock_response = MagicMock(spec=ClientResponse)
+        mock_response.status = 200
+        mock_response.read = AsyncMock(return_value=json.dumps({"ResultCode": 0, "VendingMachines": []}).encode())
+        mock_response.raise_for_status = MagicMock()
+
+        mock_session = create_mock_session_with_post(mock_response)
+        client._session = mock_session
+
+        await asyncio.gather(*(client.get_vending_machines() for _ in range(2)))
+
+        assert mock_session.post.call_count == 2
+        await client.close()
+
+
+class TestGetSalesForMachines:
+    """Тесты массовой загрузки продаж"""
+
+    @pytest.mark.asyncio
+    async def test_collects_sales_and_errors(self, api_credentials, mock_timestamp_provider):
+        """Тест что ошибка по одному автомату не прерывает загрузку остальных"""
+        client = KitVendingAPIClient(
+            login=api_credentials["login"],
+            password=api_credentials["password"],
+            company_id=api_credentials["company_id"],
+            timestamp_provider=mock_timestamp_provider
+        )
+
+        async def fake_get_sales(vending_machine_id, from_date, to_date):
+            if vending_machine_id == 2:
+                raise KitAPINetworkError("Network error")
+            return SalesCollection.model_validate({"Sales": [make_sale(vending_machine_id)]})
+
+        progress = []
+        from_date = datetime(2024, 1, 1, tzinfo=ZoneInfo('Europe/Moscow'))
+        to_date = datetime(2024, 1, 31, tzinfo=ZoneInfo('Europe/Moscow'))
+
+        with patch.object(client, "get_sales", side_effect=fake_get_sales):
+            result = await client.get_sales_for_machines(
+                [1, 2, 3], from_date, to_date, on_progress=progress.append
+            )
+
+        assert set(result.sales) == {1, 3}
+        assert isinstance(result.errors[2], KitAPINetworkError)
+        assert not result.is_complete
+        assert len(result.merged().items) == 2
+        assert sorted(p.completed for p in progress) == [1, 2, 3]
+        assert all(p.total == 3 for p in progress)
+
+    @pytest.mark.asyncio
+    async def test_invalid_response_does_not_abort_batch(self, api_credentials, mock_timestamp_provider):
+        """Тест что ошибка валидации ответа одного автомата не прерывает загрузку остальных"""
+        client = KitVendingAPIClient(
+            login=api_credentials["login"],
+            password=api_credentials["password"],
+            company_id=api_credentials["company_id"],
+            timestamp_provider=mock_timestamp_provider
+        )
+
+        async def fake_get_sales(vending_machine_id, from_date, to_date):
+            row = make_sale(vending_machine_id)
+            if vending_machine_id == 2:
+                row["Sum"] = "бесплатно"
+            return SalesCollection.model_validate({"Sales": [row]})
+
+        from_date = datetime(2024, 1, 1, tzinfo=ZoneInfo('Europe/Moscow'))
+        to_date = datetime(2024, 1, 31, tzinfo=ZoneInfo('Europe/Moscow'))
+
+        with patch.object(client, "get_sales", side_effect=fake_get_sales):
+            result = await client.get_sales_for_machines([1, 2, 3], from_date, to_date)
+
+        assert set(result.sales) == {1, 3}
+        assert isinstance(result.errors[2], ValidationError)
+
+    @pytest.mark.asyncio
+    async def test_accepts_vending_machines_collection(self, api_credentials, mock_timestamp_provider):
+        """Тест что метод принимает результат get_vending_machines()"""
+        client = KitVendingAPIClient(
+            login=api_credentials["login"],
+            password=api_credentials["password"],
+            company_id=api_credentials["company_id"],
+            timestamp_provider=mock_timestamp_provider
+        )
+        machines = VendingMachinesCollection.model_validate({"VendingMachines": [
+            {"VendingMachineId": 5, "VendingMachineName": "VM 5", "GoodsMatrix": None, "AutomatNumber": 1},
+            {"VendingMachineId": 6, "VendingMachineName": "VM 6", "GoodsMatrix": 10, "AutomatNumber": 2},
+        ]})
+
+        fake_get_sales = AsyncMock(return_value=SalesCollection.model_validate({"Sales": []}))
+        from_date = datetime(2024, 1, 1, tzinfo=ZoneInfo('Europe/Moscow'))
+        to_date = datetime(2024, 1, 31, tzinfo=ZoneInfo('Europe/Moscow'))
+
+        with patch.object(client, "get_sales", fake_get_sales):
+            result = await client.get_sales_for_machines(machines, from_date, to_date)
+
+        assert set(result.sales) == {5, 6}
+        assert result.is_complete
+
+
 class TestContextManager:
     """Тесты контекстного менеджера"""
 
@@ -568,3 +1082,126 @@ class TestContextManager:
         # Проверяем что сессия закрыта
         assert client._session is None or client._session.closed
 
+    @pytest.mark.asyncio
+    async def test_close_is_not_rate_limited(self, api_credentials):
+        """Тест что закрытие клиента не ждёт слот ограничителя"""
+        client = KitVendingAPIClient(
+            login=api_credentials["login"],
+            password=api_credentials["password"],
+            company_id=api_credentials["company_id"],
+        )
+        await client._get_session()
+
+        with patch.object(KitVendingAPIClient._limiter, "wait", AsyncMock()) as wait, \
+                patch.object(client._limiter, "wait", AsyncMock()) as client_wait:
+            await client.close()
+
+        wait.assert_not_called()
+        client_wait.assert_not_called()
+
+
+
+class TestTimeouts:
+    """Тесты таймаутов запросов к API"""
+
+    @staticmethod
+    async def start_slow_server(delay: float, sales: list | None = None):
+        """Локальный сервер, отвечающий на /GetSales с задержкой; возвращает сервер и счётчик вызовов"""
+        from aiohttp import web
+        from aiohttp.test_utils import TestServer
+
+        calls = []
+
+        async def handler(request):
+            calls.append(request.path)
+            await asyncio.sleep(delay)
+            return web.json_response({"ResultCode": 0, "Sales": sales or []})
+
+        app = web.Application()
+        app.router.add_post("/APIService.svc/GetSales", handler)
+        server = TestServer(app)
+        await server.start_server()
+        return server, calls
+
+    def make_client(self, server, api_credentials, mock_timestamp_provider, **options):
+        client = KitVendingAPIClient(
+            login=api_credentials["login"],
+            password=api_credentials["password"],
+            company_id=api_credentials["company_id"],
+            timestamp_provider=mock_timestamp_provider,
+            rate_limiter=RateLimiter(max_requests=100, time_window=0.05),
+            sales_window_retries=2,
+            connection_options=ConnectionOptions(**{"total_timeout": 0.2, **options}),
+        )
+        client._base_url = str(server.make_url("/APIService.svc"))
+        return client
+
+    @pytest.mark.asyncio
+    async def test_timeout_is_network_error_and_retried(self, api_credentials, mock_timestamp_provider):
+        """Тест что таймаут окна get_sales - сетевая ошибка, и окно повторяется"""
+        server, calls = await self.start_slow_server(1.0)
+        client = self.make_client(server, api_credentials, mock_timestamp_provider)
+        from_date = datetime(2024, 1, 15, tzinfo=ZoneInfo('Europe/Moscow'))
+
+        try:
+            with pytest.raises(KitAPINetworkError, match="время ожидания"):
+                await client.get_sales(1, from_date, from_date + timedelta(hours=1))
+            assert len(calls) == 3
+        finally:
+            await client.close()
+            await server.close()
+
+    @pytest.mark.asyncio
+    async def test_stream_timeout_is_network_error(self, api_credentials, mock_timestamp_provider):
+        """Тест что таймаут ожидания ответа потоковой выгрузки - сетевая ошибка, и окно повторяется"""
+        server, calls = await self.start_slow_server(1.0)
+        client = self.make_client(server, api_credentials, mock_timestamp_provider, read_timeout=0.2)
+        from_date = datetime(2024, 1, 15, tzinfo=ZoneInfo('Europe/Moscow'))
+
+        try:
+            with pytest.raises(KitAPINetworkError):
+                async for _ in client.iter_sales(1, from_date, from_date + timedelta(hours=1)):
+                    pass
+            assert len(calls) == 3
+        finally:
+            await client.close()
+            await server.close()
+
+    @pytest.mark.asyncio
+    async def test_slow_consumer_is_not_timed_out(self, api_credentials, mock_timestamp_provider):
+        """Тест что общий таймаут не прерывает потоковую выгрузку, которую медленно читает потребитель"""
+        from aiohttp import web
+        from aiohttp.test_utils import TestServer
+
+        row = {
+            "LineNumber": 1, "Sum": 100.0, "DateTime": "15.01.2024 12:30:45", "VendingMachine": 1,
+            "VendingMachineName": "VM 1", "MatrixId": 10, "GoodsName": "1|Вода",
+        }
+
+        async def handler(request):
+            # Ответ передаётся частями, как большая выгрузка: соединение открыто, пока читается тело
+            response = web.StreamResponse()
+            await response.prepare(request)
+            await response.write(b'{"ResultCode": 0, "Sales": [' + json.dumps(row).encode())
+            await asyncio.sleep(0.3)
+            await response.write(b"," + json.dumps({**row, "LineNumber": 2}).encode() + b"]}")
+            await response.write_eof()
+            return response
+
+        app = web.Application()
+        app.router.add_post("/APIService.svc/GetSales", handler)
+        server = TestServer(app)
+        await server.start_server()
+        client = self.make_client(server, api_credentials, mock_timestamp_provider)
+        from_date = datetime(2024, 1, 15, tzinfo=ZoneInfo('Europe/Moscow'))
+        received = []
+
+        try:
+            async for sale in client.iter_sales(1, from_date, from_date + timedelta(hours=1)):
+                received.append(sale)
+                # Потребитель медленнее общего таймаута сессии (0.2 с)
+                await asyncio.sleep(0.5)
+            assert [sale.line for sale in received] == [1, 2]
+        finally:
+            await client.close()
+            await server.close()
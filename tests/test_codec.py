@@ -0,0 +1,54 @@
+"""
+Тесты для JSON кодеков
+"""
+
+import pytest
+
+from kit_api import codec as codec_module
+from kit_api.codec import JSONCodec, available_codecs, get_codec
+from kit_api.exceptions import KitAPIValidationError
+
+
+SAMPLE = {"ResultCode": 0, "Sales": [{"GoodsName": "Кофе", "Sum": 120.5, "LineNumber": 3}]}
+
+
+class TestCodecs:
+    """Тесты кодеков"""
+
+    @pytest.mark.parametrize("name", available_codecs())
+    def test_roundtrip(self, name):
+        """Тест что кодек кодирует в байты и разбирает байты"""
+        codec = get_codec(name)
+
+        data = codec.dumps(SAMPLE)
+
+        assert isinstance(data, bytes)
+        assert codec.loads(data) == SAMPLE
+
+    @pytest.mark.parametrize("name", available_codecs())
+    def test_decode_error_is_value_error(self, name):
+        """Тест что ошибка разбора - ValueError для любого кодека"""
+        with pytest.raises(ValueError):
+            get_codec(name).loads(b"{invalid json")
+
+    def test_default_is_fastest_available(self):
+        """Тест что по умолчанию выбирается первый доступный кодек"""
+        assert get_codec().name == available_codecs()[0]
+        assert available_codecs()[-1] == "json"
+
+    def test_codec_instance_is_returned_as_is(self):
+        """Тест что готовый кодек возвращается без изменений"""
+        codec = JSONCodec()
+        assert get_codec(codec) is codec
+
+    def test_unknown_codec(self):
+        """Тест ошибки для неизвестного кодека"""
+        with pytest.raises(KitAPIValidationError, match="Неизвестный JSON кодек"):
+            get_codec("yaml")
+
+    def test_not_installed_codec(self, monkeypatch):
+        """Тест ошибки для кодека без установленной библиотеки"""
+        monkeypatch.setitem(codec_module._CODECS, "ujson", (codec_module.UjsonCodec, False))
+
+        with pytest.raises(KitAPIValidationError, match="не установлена"):
+            get_codec("ujson")
@@ -0,0 +1,143 @@
+"""
+Тесты для колоночного представления продаж
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from kit_api.client import KitVendingAPIClient
+from kit_api.columnar import SALE_KIND_DRINK, SALE_KIND_OTHER, SALE_KIND_PRODUCT, SalesTable
+from kit_api.exceptions import KitAPIValidationError
+from kit_api.models import ProductSaleModel, RecipeDrinkSaleModel, SalesCollection
+
+MOSCOW = ZoneInfo("Europe/Moscow")
+
+
+class TestSalesTable:
+    """Тесты для SalesTable"""
+
+    def test_columns(self, sales_rows):
+        """Тест что записи ответа раскладываются по типизированным колонкам"""
+        table = SalesTable.from_rows(sales_rows)
+
+        assert len(table) == 3
+        assert list(table.line) == [1, 2, 3]
+        assert list(table.price) == [100.0, 60.0, 80.5]
+        assert table.timestamp[0] == int(datetime(2024, 1, 15, 12, 30, 45, tzinfo=MOSCOW).timestamp())
+        assert list(table.kind) == [SALE_KIND_PRODUCT, SALE_KIND_DRINK, SALE_KIND_OTHER]
+        assert table.column("product_name") == ["1|Вода", None, None]
+
+    def test_strings_are_dictionary_encoded(self, sales_rows):
+        """Тест что повторяющиеся названия хранятся в словаре один раз"""
+        table = SalesTable.from_rows(sales_rows)
+
+        assert table.dictionaries["vending_machine_name"].values == ["VM 1"]
+        assert table.dictionaries["product_name"].values == ["1|Вода"]
+        assert list(table.codes["product_name"]) == [0, -1, -1]
+
+    def test_row_view_matches_model(self, sales_rows):
+        """Тест что строка таблицы совпадает с моделью полной валидации"""
+        expected = SalesCollection.model_validate({"Sales": sales_rows}).items
+        table = SalesTable.from_rows(sales_rows)
+
+        assert [row.to_model() for row in table] == expected
+        assert table[-1].timestamp == datetime(2024, 1, 15, 11, 0, tzinfo=MOSCOW)
+        assert table[1].recipe_id == 7
+        assert table[1].product_name is None
+        assert table[0].key == expected[0].key
+        with pytest.raises(IndexError):
+            table[3]
+
+    def test_from_sales(self, sales_rows):
+        """Тест что таблица из моделей совпадает с таблицей из записей"""
+        collection = SalesCollection.model_validate({"Sales": sales_rows})
+
+        table = SalesTable.from_collection(collection)
+
+        assert isinstance(table.to_models().items[0], ProductSaleModel)
+        assert isinstance(table.to_models().items[1], RecipeDrinkSaleModel)
+        assert table.to_models().items == collection.items
+        assert list(table.timestamp) == list(SalesTable.from_rows(sales_rows).timestamp)
+
+    def test_null_fields_do_not_select_kind(self, sales_rows):
+        """Тест что поле со значением null не определяет вид продажи, как у моделей"""
+        rows = [{**sales_rows[1], "GoodsName": None}, {**sales_rows[0], "FormulationId": None}]
+
+        table = SalesTable.from_rows(rows)
+
+        assert list(table.kind) == [SALE_KIND_DRINK, SALE_KIND_PRODUCT]
+        assert table.column("product_name") == [None, "1|Вода"]
+        assert [row.to_model() for row in table] == SalesCollection.model_validate({"Sales": rows}).items
+
+    def test_invalid_row(self, sales_rows):
+        """Тест что некорректная запись отклоняется"""
+        with pytest.raises(ValueError):
+            SalesTable.from_rows([{**sales_rows[0], "Sum": "бесплатно"}])
+        with pytest.raises(ValueError):
+            SalesTable.from_rows([{"LineNumber": 1}])
+
+    def test_to_numpy_is_zero_copy(self, sales_rows):
+        """Тест что колонки NumPy используют память таблицы"""
+        numpy = pytest.importorskip("numpy")
+        table = SalesTable.from_rows(sales_rows)
+
+        columns = table.to_numpy()
+
+        assert columns["price"].sum() == 240.5
+        assert columns["line"].dtype == numpy.int64
+        table.price[0] = 1.0
+        assert columns["price"][0] == 1.0
+        # Буферы колонок экспортированы: расширить таблицу нельзя, пока живут массивы
+        with pytest.raises(BufferError):
+            table.append_row(sales_rows[0])
+        del columns
+        table.append_row(sales_rows[0])
+        assert len(table) == 4
+
+    def test_to_arrow(self, sales_rows):
+        """Тест что таблица pyarrow содержит все колонки"""
+        pytest.importorskip("pyarrow")
+        table = SalesTable.from_rows(sales_rows)
+
+        arrow_table = table.to_arrow()
+
+        assert arrow_table.num_rows == 3
+        assert arrow_table.column("product_name").to_pylist() == ["1|Вода", None, None]
+        assert arrow_table.column("line").to_pylist() == [1, 2, 3]
+        assert arrow_table.column("price").to_pylist() == [100.0, 60.0, 80.5]
+
+
+class TestClientSalesTable:
+    """Тесты get_sales(sales_format="table")"""
+
+    @pytest.mark.asyncio
+    async def test_get_sales_table(self, make_client, make_session, sales_rows):
+        """Тест что get_sales возвращает таблицу, объединяя окна без построения моделей"""
+        client = make_client()
+        client._session = make_session(
+            {"ResultCode": 0, "Sales": sales_rows[:2]}, {"ResultCode": 0, "Sales": sales_rows[1:]}
+        )
+
+        table = await client.get_sales(
+            1,
+            datetime(2024, 1, 14, tzinfo=MOSCOW),
+            datetime(2024, 1, 16, tzinfo=MOSCOW),
+            window=timedelta(days=1),
+            sales_format="table",
+        )
+
+        assert isinstance(table, SalesTable)
+        assert list(table.line) == [2, 3, 1]
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_unknown_format(self, api_credentials, mock_timestamp_provider):
+        """Тест что неизвестное представление отклоняется"""
+        client = KitVendingAPIClient(timestamp_provider=mock_timestamp_provider)
+
+        with pytest.raises(KitAPIValidationError):
+            await client.get_sales(
+                1, datetime(2024, 1, 15, tzinfo=MOSCOW), datetime(2024, 1, 16, tzinfo=MOSCOW),
+                sales_format="rows",
+            )
@@ -0,0 +1,112 @@
+"""
+Тесты для настроек HTTP соединений
+"""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from aiohttp import ClientResponse, ClientSession
+from aiohttp.client_exceptions import ClientError
+
+from kit_api.client import KitVendingAPIClient
+from kit_api.connection import ConnectionOptions
+from kit_api.pool import KitClientPool
+
+
+def make_head_session(side_effect=None):
+    """Мок сессии с методом head"""
+    response = MagicMock(spec=ClientResponse)
+    response.read = AsyncMock(return_value=b"")
+    context_manager = AsyncMock()
+    context_manager.__aenter__ = AsyncMock(return_value=response)
+    context_manager.__aexit__ = AsyncMock(return_value=None)
+
+    session = MagicMock(spec=ClientSession)
+    session.head = MagicMock(return_value=context_manager, side_effect=side_effect)
+    session.closed = False
+    return session
+
+
+class TestConnectionOptions:
+    """Тесты ConnectionOptions"""
+
+    def test_accept_encoding(self):
+        """Тест что сжатие ответов включено по умолчанию и отключается"""
+        assert "gzip" in ConnectionOptions().accept_encoding
+        assert ConnectionOptions(compress_responses=False).accept_encoding == "identity"
+
+    def test_create_timeout(self):
+        """Тест таймаутов запроса"""
+        timeout = ConnectionOptions(total_timeout=30, connect_timeout=5, read_timeout=None).create_timeout()
+
+        assert timeout.total == 30
+        assert timeout.connect == 5
+        assert timeout.sock_read is None
+
+    @pytest.mark.asyncio
+    async def test_create_session(self):
+        """Тест что сессия создаётся с настроенным пулом соединений"""
+        options = ConnectionOptions(limit=20, limit_per_host=4, ttl_dns_cache=60)
+        session = options.create_session()
+        try:
+            assert session.connector.limit == 20
+            assert session.connector.limit_per_host == 4
+            assert session.timeout.total == options.total_timeout
+            assert session.headers["Accept-Encoding"] == options.accept_encoding
+        finally:
+            await session.close()
+
+
+class TestClientConnection:
+    """Тесты соединений клиента"""
+
+    @pytest.mark.asyncio
+    async def test_client_session_uses_options(self):
+        """Тест что клиент создаёт сессию с переданными параметрами"""
+        client = KitVendingAPIClient(connection_options=ConnectionOptions(limit_per_host=3))
+
+        session = await client._get_session()
+
+        assert session.connector.limit_per_host == 3
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_warmup_opens_connections(self, mock_timestamp_provider):
+        """Тест что прогрев открывает заданное число соединений"""
+        client = KitVendingAPIClient(timestamp_provider=mock_timestamp_provider)
+        client._session = make_head_session()
+
+        await client.warmup(connections=3)
+
+        assert client._session.head.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_warmup_ignores_network_errors(self, mock_timestamp_provider):
+        """Тест что ошибка прогрева не прерывает работу"""
+        client = KitVendingAPIClient(timestamp_provider=mock_timestamp_provider)
+        client._session = make_head_session(side_effect=ClientError("unreachable"))
+
+        await client.warmup()
+
+    @pytest.mark.asyncio
+    async def test_context_manager_prewarms(self, mock_timestamp_provider):
+        """Тест прогрева при входе в async with"""
+        client = KitVendingAPIClient(
+            timestamp_provider=mock_timestamp_provider,
+            connection_options=ConnectionOptions(prewarm_connections=2),
+        )
+        client._session = make_head_session()
+
+        async with client:
+            assert client._session.head.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_pool_session_uses_options(self):
+        """Тест что общая сессия пула создаётся с параметрами пула"""
+        pool = KitClientPool(connection_options=ConnectionOptions(limit=7))
+        client = pool.add("login", "password", company_id=1)
+
+        await pool._attach_session()
+
+        assert pool._session.connector.limit == 7
+        assert client._connection_options is pool._connection_options
+        await pool.close()
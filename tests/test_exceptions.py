@@ -60,3 +60,9 @@ class TestExceptions:
         assert error.result_code == 27
         assert str(error) == "Error message"
 
+
+    def test_kit_api_rate_limit_error_is_response_error(self):
+        """Тест что KitAPIRateLimitError - ошибка ответа с кодом 27"""
+        error = KitAPIRateLimitError("Rate limit error")
+        assert isinstance(error, KitAPIResponseError)
+        assert error.result_code == 27
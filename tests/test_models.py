@@ -2,8 +2,40 @@
 Тесты для моделей данных
 """
 
+import json
 import pytest
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from kit_api.models import (
+    GoodsCell,
+    MatricesKitCollection,
+    ProductsKitCollection,
+    RecipeCell,
+    RecipesKitCollection,
+    VendingMachinesCollection,
+)
 from kit_api.models.common import ProductModel
+from kit_api.validation import ValidationMode, validate_items, validate_model
+from kit_api.models.sales import (
+    BaseSaleModel,
+    ProductSaleModel,
+    RecipeDrinkSaleModel,
+    SalesCollection,
+)
+
+
+def make_sale_row(line: int = 1, **fields) -> dict:
+    """Сырая запись продажи в формате Kit API"""
+    return {
+        "LineNumber": line,
+        "Sum": 100.0,
+        "DateTime": "15.01.2024 12:30:45",
+        "VendingMachine": 1,
+        "VendingMachineName": "VM 1",
+        "MatrixId": 10,
+        **fields,
+    }
 
 
 class TestProductModel:
@@ -53,3 +85,156 @@ class TestProductModel:
         assert product.code is None
         assert product.name == "Test Product"
 
+
+
+class TestSalesCollection:
+    """Тесты коллекции продаж"""
+
+    def test_sales_are_typed_by_kind(self):
+        """Тест что продажи товаров и напитков валидируются в свои модели"""
+        collection = SalesCollection.model_validate({"Sales": [
+            make_sale_row(1, GoodsName="123|Сникерс"),
+            make_sale_row(2, FormulationId=7),
+            make_sale_row(3),
+        ]})
+
+        product, drink, other = collection.items
+        assert isinstance(product, ProductSaleModel)
+        assert product.product_name == "123|Сникерс"
+        assert isinstance(drink, RecipeDrinkSaleModel)
+        assert drink.recipe_id == 7
+        assert type(other) is BaseSaleModel
+        assert collection.get_product_sales() == [product]
+        assert collection.get_drink_sales() == [drink]
+
+    def test_null_fields_do_not_select_kind(self):
+        """Тест что поле со значением null не определяет вид продажи"""
+        collection = SalesCollection.model_validate({"Sales": [
+            make_sale_row(1, GoodsName=None, FormulationId=7),
+            make_sale_row(2, GoodsName="1|Вода", FormulationId=None),
+            make_sale_row(3, GoodsName=None, FormulationId=None),
+        ]})
+
+        drink, product, other = collection.items
+        assert isinstance(drink, RecipeDrinkSaleModel)
+        assert drink.recipe_id == 7
+        assert isinstance(product, ProductSaleModel)
+        assert type(other) is BaseSaleModel
+
+    def test_sale_timestamp_is_moscow_time(self):
+        """Тест что время продажи разбирается как московское"""
+        sale = SalesCollection.model_validate({"Sales": [make_sale_row(GoodsName="1|Вода")]}).items[0]
+        assert sale.timestamp == datetime(2024, 1, 15, 12, 30, 45, tzinfo=ZoneInfo("Europe/Moscow"))
+
+    def test_invalid_row_reports_its_kind(self):
+        """Тест что ошибка валидации относится к выбранному виду продажи"""
+        with pytest.raises(ValueError, match="FormulationId"):
+            SalesCollection.model_validate({"Sales": [make_sale_row(1, FormulationId="кофе")]})
+
+    def test_merge_keeps_types(self):
+        """Тест что объединение сохраняет вид продаж"""
+        first = SalesCollection.model_validate({"Sales": [make_sale_row(1, GoodsName="1|Вода")]})
+        second = SalesCollection.model_validate({"Sales": [
+            make_sale_row(1, GoodsName="1|Вода"),
+            make_sale_row(2, FormulationId=3),
+        ]})
+
+        merged = SalesCollection.merge([first, second])
+
+        assert len(merged.items) == 2
+        assert len(merged.get_product_sales()) == 1
+        assert len(merged.get_drink_sales()) == 1
+
+    @pytest.mark.parametrize("mode", list(ValidationMode))
+    def test_repeated_names_are_shared(self, mode):
+        """Тест что одинаковые названия в ответе и в разных окнах - один объект"""
+        rows = [make_sale_row(1, GoodsName="1|Вода"), make_sale_row(2, GoodsName="1|Вода")]
+        # Каждое окно разбирается из JSON отдельно: у каждой записи своя строка
+        first = json.loads(json.dumps({"Sales": rows}))
+        second = json.loads(json.dumps(rows))
+        assert first["Sales"][0]["GoodsName"] is not first["Sales"][1]["GoodsName"]
+
+        sales = [
+            *validate_model(SalesCollection, first, mode).items,
+            *validate_items(SalesCollection, "items", second, mode),
+        ]
+
+        assert len({id(sale.vending_machine_name) for sale in sales}) == 1
+        assert len({id(sale.product_name) for sale in sales}) == 1
+
+
+class TestCollectionIndexes:
+    """Тесты индексов справочных коллекций"""
+
+    def test_products_and_recipes(self):
+        """Тест поиска товаров и рецептов по ID и названию"""
+        products = ProductsKitCollection.model_validate({"Goods": [
+            {"GoodsId": 1, "GoodsName": "Вода"},
+            {"GoodsId": 2, "GoodsName": "Сок"},
+            {"GoodsId": 3, "GoodsName": "Вода"},
+        ]})
+        recipes = RecipesKitCollection.model_validate({"Formulations": [
+            {"FormulationId": 7, "FormulationName": "Капучино"},
+        ]})
+
+        assert products.get_by_id(2).name == "Сок"
+        assert products.get_by_name("Вода").id == 1
+        assert products.get_by_id(4) is None
+        assert recipes.get_by_id(7).name == "Капучино"
+        assert recipes.get_by_name("Латте") is None
+
+    def test_vending_machines(self):
+        """Тест поиска автоматов по ID, номеру и матрице"""
+        machines = VendingMachinesCollection.model_validate({"VendingMachines": [
+            {"VendingMachineId": 1, "VendingMachineName": "VM 1", "GoodsMatrix": 10, "AutomatNumber": 101},
+            {"VendingMachineId": 2, "VendingMachineName": "VM 2", "GoodsMatrix": 10, "AutomatNumber": 102},
+            {"VendingMachineId": 3, "VendingMachineName": "VM 3", "GoodsMatrix": None, "AutomatNumber": 103},
+        ]})
+
+        assert machines.get_by_id(3).number == 103
+        assert machines.get_by_number(102).id == 2
+        assert [machine.id for machine in machines.get_by_matrix_id(10)] == [1, 2]
+        assert machines.get_by_matrix_id(11) == ()
+
+    def test_matrices_and_cells(self):
+        """Тест поиска матриц по ID и типу и ячеек по матрице и линии"""
+        matrices = MatricesKitCollection.model_validate({"GoodsMatrices": [
+            {
+                "MatrixId": 1, "MatrixName": "Снеки", "MatrixType": 1,
+                "Details": [{"LineNumber": 5, "Price2": 10.0, "GoodsName": "1|Вода", "MaxCount": 5}],
+            },
+            {
+                "MatrixId": 2, "MatrixName": "Кофе", "MatrixType": 2,
+                "Details": [{"LineNumber": 5, "Price2": None, "FormulationId": 3}],
+            },
+        ]})
+
+        assert matrices.get_by_id(2).name == "Кофе"
+        assert [matrix.id for matrix in matrices.get_by_type(1)] == [1]
+        assert matrices.get_by_type(3) == ()
+        assert isinstance(matrices.get_cell(1, 5), GoodsCell)
+        assert isinstance(matrices.get_cell(2, 5), RecipeCell)
+        assert matrices.get_cell(1, 6) is None
+
+    def test_index_is_cached_until_items_replaced(self):
+        """Тест что индекс строится один раз и сбрасывается при замене items"""
+        products = ProductsKitCollection.model_validate({"Goods": [{"GoodsId": 1, "GoodsName": "Вода"}]})
+        index = products._index("id", lambda item: item.id)
+
+        assert products._index("id", lambda item: item.id) is index
+
+        products.items = [products.items[0].model_copy(update={"id": 2})]
+        assert products.get_by_id(1) is None
+        assert products.get_by_id(2).name == "Вода"
+
+        replaced = products.model_copy(update={"items": []})
+        assert replaced.get_by_id(2) is None
+        assert products.get_by_id(2) is not None
+
+    def test_indexes_do_not_affect_equality(self):
+        """Тест что построенные индексы не влияют на сравнение коллекций"""
+        data = {"Goods": [{"GoodsId": 1, "GoodsName": "Вода"}]}
+        indexed = ProductsKitCollection.model_validate(data)
+        indexed.get_by_id(1)
+
+        assert indexed == ProductsKitCollection.model_validate(data)
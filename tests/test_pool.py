@@ -0,0 +1,130 @@
+"""
+Тесты для KitClientPool
+"""
+
+import asyncio
+import pytest
+
+from kit_api.exceptions import KitAPIValidationError
+from kit_api.pool import KitClientPool, _FairScheduler
+
+
+class TestFairScheduler:
+    """Тесты справедливой очереди арендаторов"""
+
+    @pytest.mark.asyncio
+    async def test_round_robin_between_tenants(self):
+        """Тест что места выдаются арендаторам по кругу"""
+        scheduler = _FairScheduler(limit=1)
+        await scheduler.acquire("blocker")
+        order = []
+
+        async def worker(tenant, i):
+            await scheduler.acquire(tenant)
+            order.append((tenant, i))
+            scheduler.release()
+
+        # Арендатор "a" ставит в очередь много операций раньше "b"
+        tasks = [asyncio.create_task(worker("a", i)) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks += [asyncio.create_task(worker("b", i)) for i in range(2)]
+        await asyncio.sleep(0)
+
+        scheduler.release()
+        await asyncio.gather(*tasks)
+
+        assert [tenant for tenant, _ in order] == ["a", "b", "a", "b", "a"]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_block_queue(self):
+        """Тест что отменённое ожидание не блокирует очередь"""
+        scheduler = _FairScheduler(limit=1)
+        await scheduler.acquire("a")
+
+        cancelled = asyncio.create_task(scheduler.acquire("b"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+
+        scheduler.release()
+        await asyncio.wait_for(scheduler.acquire("c"), timeout=1)
+
+        # Отмена и освобождение места в одном такте: _grant() снимает отменённое
+        # ожидание с очереди, пока у арендатора есть другие ожидания
+        waiters = [asyncio.create_task(scheduler.acquire("a")) for _ in range(3)]
+        await asyncio.sleep(0)
+
+        waiters[0].cancel()
+        scheduler.release()
+        await asyncio.sleep(0)
+
+        with pytest.raises(asyncio.CancelledError):
+            await waiters[0]
+        await asyncio.wait_for(waiters[1], timeout=1)
+        scheduler.release()
+        await asyncio.wait_for(waiters[2], timeout=1)
+
+
+class TestKitClientPool:
+    """Тесты KitClientPool"""
+
+    def test_clients_have_independent_limiters(self):
+        """Тест что у разных компаний разные ограничители, а у одинаковых учётных данных - общий"""
+        pool = KitClientPool()
+        first = pool.add("login", "password", 1)
+        second = pool.add("login", "password", 2)
+
+        assert first.rate_limiter is not second.rate_limiter
+        assert pool.get(1) is first
+        assert pool.get(2, login="login") is second
+
+        other_pool = KitClientPool()
+        assert other_pool.add("login", "password", 1).rate_limiter is first.rate_limiter
+
+    def test_duplicate_and_missing_clients(self):
+        """Тест ошибок при повторном добавлении и поиске отсутствующего клиента"""
+        pool = KitClientPool()
+        pool.add("login", "password", 1)
+
+        with pytest.raises(KitAPIValidationError):
+            pool.add("login", "password", 1)
+        with pytest.raises(KitAPIValidationError):
+            pool.get(3)
+
+        pool.add("other", "password", 1)
+        with pytest.raises(KitAPIValidationError, match="укажите login"):
+            pool.get(1)
+
+    @pytest.mark.asyncio
+    async def test_run_uses_shared_session(self):
+        """Тест что клиенты пула используют общую сессию"""
+        async with KitClientPool() as pool:
+            first = pool.add("login", "password", 1)
+            second = pool.add("login", "password", 2)
+
+            sessions = await asyncio.gather(
+                pool.run(1, lambda client: client._get_session()),
+                pool.run(2, lambda client: client._get_session()),
+            )
+
+            assert sessions[0] is sessions[1]
+            assert first._own_session is False
+            assert second._own_session is False
+
+        assert sessions[0].closed
+
+    @pytest.mark.asyncio
+    async def test_added_client_uses_shared_session_directly(self):
+        """Тест что клиент из add() использует общую сессию и без run()"""
+        async with KitClientPool() as pool:
+            first = pool.add("login", "password", 1)
+            second = pool.add("login", "password", 2)
+
+            session = await first._get_session()
+
+            assert await second._get_session() is session
+            assert pool._session is session
+            await first.close()
+            assert not session.closed
+
+        assert session.closed
@@ -3,7 +3,7 @@
 """
 
 import pytest
-from datetime import datetime
+from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
 from kit_api.project_time import ProjectTime
@@ -98,3 +98,60 @@ class TestProjectTime:
         assert result.minute == 59
         assert result.second == 59
 
+    def test_datetime_from_str_kit_matches_strptime(self):
+        """Тест что быстрый разбор совпадает с strptime"""
+        for date_str in ("29.02.2024 07:05:09", "01.10.2023 18:00:00", "15.01.2024 12:30:45"):
+            expected = datetime.strptime(date_str, "%d.%m.%Y %H:%M:%S").replace(tzinfo=ZoneInfo('Europe/Moscow'))
+            assert ProjectTime.datetime_from_str_kit(date_str) == expected
+            assert ProjectTime.datetime_from_str_kit(date_str).tzinfo == ZoneInfo('Europe/Moscow')
+
+    def test_datetime_from_str_kit_other_layout(self):
+        """Тест строки без ведущих нулей (разбирается strptime)"""
+        result = ProjectTime.datetime_from_str_kit("5.1.2024 7:05:09")
+        assert result == datetime(2024, 1, 5, 7, 5, 9, tzinfo=ZoneInfo('Europe/Moscow'))
+
+    @pytest.mark.parametrize("date_str", ["31.02.2024 10:00:00", "aa.01.2024 10:00:00", "2024-01-15 10:00:00", ""])
+    def test_datetime_from_str_kit_invalid(self, date_str):
+        """Тест что некорректная строка вызывает ValueError"""
+        with pytest.raises(ValueError):
+            ProjectTime.datetime_from_str_kit(date_str)
+
+    def test_to_project_timezone(self):
+        """Тест приведения datetime к часовому поясу проекта"""
+        naive = ProjectTime.to_project_timezone(datetime(2024, 1, 15, 12, 0, 0))
+        assert naive == datetime(2024, 1, 15, 12, 0, 0, tzinfo=ZoneInfo('Europe/Moscow'))
+
+        aware = ProjectTime.to_project_timezone(datetime(2024, 1, 15, 9, 0, 0, tzinfo=ZoneInfo('UTC')))
+        assert aware.hour == 12
+        assert aware.tzinfo == ZoneInfo('Europe/Moscow')
+
+    def test_split_period_aligns_to_days(self):
+        """Тест разбиения периода по московским суткам"""
+        tz = ZoneInfo('Europe/Moscow')
+        windows = ProjectTime.split_period(
+            datetime(2024, 1, 1, 15, 0, 0, tzinfo=tz),
+            datetime(2024, 1, 3, 10, 0, 0, tzinfo=tz),
+            timedelta(days=1),
+        )
+
+        assert windows == [
+            (datetime(2024, 1, 1, 15, 0, 0, tzinfo=tz), datetime(2024, 1, 2, 0, 0, 0, tzinfo=tz)),
+            (datetime(2024, 1, 2, 0, 0, 0, tzinfo=tz), datetime(2024, 1, 3, 0, 0, 0, tzinfo=tz)),
+            (datetime(2024, 1, 3, 0, 0, 0, tzinfo=tz), datetime(2024, 1, 3, 10, 0, 0, tzinfo=tz)),
+        ]
+
+    def test_split_period_aligns_to_hours(self):
+        """Тест разбиения периода по часам"""
+        tz = ZoneInfo('Europe/Moscow')
+        windows = ProjectTime.split_period(
+            datetime(2024, 1, 1, 10, 30, 0, tzinfo=tz),
+            datetime(2024, 1, 1, 13, 0, 0, tzinfo=tz),
+            timedelta(hours=2),
+        )
+
+        assert [w[1].hour for w in windows] == [12, 13]
+
+    def test_split_period_empty(self):
+        """Тест разбиения пустого периода"""
+        dt = datetime(2024, 1, 1, tzinfo=ZoneInfo('Europe/Moscow'))
+        assert ProjectTime.split_period(dt, dt, timedelta(days=1)) == []
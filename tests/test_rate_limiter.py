@@ -1,12 +1,25 @@
 """
 Тесты для RateLimiter
 """
+import fcntl
 import inspect
+import multiprocessing
+import os
 
 import pytest
 import asyncio
 import time
-from kit_api.rate_limiter import RateLimiter, rate_limit
+from kit_api.exceptions import KitAPIRateLimitError
+from kit_api.rate_limiter import (
+    AdaptiveRateLimiter,
+    Priority,
+    RateLimiter,
+    SharedFileRateLimiter,
+    api_method,
+    current_priority,
+    rate_limit,
+    request_priority,
+)
 
 
 class TestRateLimiter:
@@ -82,6 +95,577 @@ class TestRateLimiter:
         assert end_time - start_time < 1.5
 
 
+    @pytest.mark.asyncio
+    async def test_rate_limiter_serves_waiters_in_order(self):
+        """Тест что ожидающие получают слоты в порядке очереди"""
+        limiter = RateLimiter(max_requests=1, time_window=0.05)
+        order = []
+
+        async def worker(i):
+            await limiter.wait()
+            order.append(i)
+
+        await asyncio.gather(*(worker(i) for i in range(5)))
+
+        assert order == list(range(5))
+
+    @pytest.mark.asyncio
+    async def test_rate_limiter_gives_cancelled_slot_to_next_waiter(self):
+        """Тест что слот отменённого ожидающего достаётся следующему"""
+        limiter = RateLimiter(max_requests=1, time_window=0.3)
+        await limiter.wait()
+
+        cancelled = asyncio.create_task(limiter.wait())
+        start_time = time.monotonic()
+        next_waiter = asyncio.create_task(limiter.wait())
+        await asyncio.sleep(0)
+        assert limiter.queue_size == 2
+
+        cancelled.cancel()
+        await next_waiter
+        end_time = time.monotonic()
+
+        # Следующий получает слот через одно окно, а не через два
+        assert end_time - start_time < 0.45
+        assert limiter.queue_size == 0
+
+    @pytest.mark.asyncio
+    async def test_rate_limiter_wakes_only_granted_waiters(self):
+        """Тест что при открытии окна будятся только получившие слот"""
+        limiter = RateLimiter(max_requests=2, time_window=0.2)
+        await limiter.wait()
+        await limiter.wait()
+
+        tasks = [asyncio.create_task(limiter.wait()) for _ in range(6)]
+        await asyncio.sleep(0.25)
+
+        assert sum(task.done() for task in tasks) == 2
+        assert limiter.queue_size == 4
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    @pytest.mark.asyncio
+    async def test_rate_limiter_handles_many_waiters(self):
+        """Тест что лимитер предсказуемо обслуживает тысячи ожидающих"""
+        limiter = RateLimiter(max_requests=1000, time_window=0.1)
+        granted = []
+
+        async def request():
+            await limiter.wait()
+            granted.append(time.monotonic() - start_time)
+
+        start_time = time.monotonic()
+        # Верхняя граница - только защита от зависания: время зависит от загрузки машины
+        await asyncio.wait_for(asyncio.gather(*(request() for _ in range(3000))), timeout=10)
+
+        # Момент записи не раньше выдачи слота, поэтому в окне не может оказаться лишних
+        assert len(granted) == 3000
+        assert sum(elapsed < 0.1 for elapsed in granted) <= 1000
+        assert sum(elapsed < 0.2 for elapsed in granted) <= 2000
+        assert max(granted) >= 0.18
+
+    @pytest.mark.asyncio
+    async def test_rate_limiter_counts_request_cost(self):
+        """Тест что запрос со стоимостью занимает несколько слотов окна"""
+        limiter = RateLimiter(max_requests=3, time_window=0.3)
+
+        start_time = time.monotonic()
+        await limiter.wait(cost=2)
+        await limiter.wait()
+        fast = time.monotonic() - start_time
+        await limiter.wait(cost=2)
+        end_time = time.monotonic()
+
+        assert fast < 0.1
+        assert len(limiter.requests) == 2
+        assert end_time - start_time >= 0.25
+
+    @pytest.mark.asyncio
+    async def test_rate_limiter_clamps_cost_to_limit(self):
+        """Тест что стоимость больше лимита не блокирует очередь навсегда"""
+        limiter = RateLimiter(max_requests=2, time_window=0.1)
+
+        await asyncio.wait_for(limiter.wait(cost=5), timeout=0.5)
+
+        assert len(limiter.requests) == 2
+
+
+class TestPriorityLanes:
+    """Тесты очередей приоритетов RateLimiter"""
+
+    @pytest.mark.asyncio
+    async def test_interactive_overtakes_bulk_queue(self):
+        """Тест что интерактивный запрос не ждёт всю очередь массовой выгрузки"""
+        limiter = RateLimiter(max_requests=1, time_window=0.05)
+        order = []
+
+        async def worker(name, priority):
+            await limiter.wait(priority=priority)
+            order.append(name)
+
+        bulk = [asyncio.create_task(worker(f"bulk{i}", Priority.BULK)) for i in range(6)]
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(worker("interactive", Priority.INTERACTIVE))
+        await asyncio.gather(*bulk, interactive)
+
+        assert order.index("interactive") <= 2
+        # Внутри очереди порядок сохраняется
+        assert [name for name in order if name != "interactive"] == [f"bulk{i}" for i in range(6)]
+
+    @pytest.mark.asyncio
+    async def test_weighted_share_between_lanes(self):
+        """Тест что слоты делятся между очередями пропорционально весам"""
+        limiter = RateLimiter(
+            max_requests=1,
+            time_window=0.01,
+            weights={Priority.NORMAL: 3, Priority.BULK: 1},
+        )
+        await limiter.wait()
+        order = []
+
+        async def worker(priority):
+            await limiter.wait(priority=priority)
+            order.append(priority)
+
+        tasks = [asyncio.create_task(worker(Priority.BULK)) for _ in range(8)]
+        tasks += [asyncio.create_task(worker(Priority.NORMAL)) for _ in range(8)]
+        await asyncio.gather(*tasks)
+
+        # Пока обе очереди заняты, обычные запросы получают 3 слота из 4
+        assert order[:8].count(Priority.NORMAL) == 6
+
+    @pytest.mark.asyncio
+    async def test_reserved_share_is_kept_for_interactive(self):
+        """Тест что зарезервированная часть окна доступна только интерактивным запросам"""
+        limiter = RateLimiter(max_requests=4, time_window=0.3, reserved_share=0.5)
+        await limiter.wait(priority=Priority.BULK)
+        await limiter.wait(priority=Priority.BULK)
+
+        blocked = asyncio.create_task(limiter.wait(priority=Priority.BULK))
+        start_time = time.monotonic()
+        await limiter.wait(priority=Priority.INTERACTIVE)
+        await limiter.wait(priority=Priority.INTERACTIVE)
+        end_time = time.monotonic()
+
+        assert end_time - start_time < 0.1
+        assert not blocked.done()
+        await blocked
+
+    @pytest.mark.asyncio
+    async def test_priority_from_context(self):
+        """Тест что приоритет берётся из request_priority()"""
+        limiter = RateLimiter(max_requests=10, time_window=1.0)
+
+        with request_priority(Priority.BULK):
+            assert current_priority() == Priority.BULK
+            await limiter.wait()
+        await limiter.wait()
+
+        stats = limiter.lane_stats()
+        assert stats[Priority.BULK].granted == 1
+        assert stats[Priority.NORMAL].granted == 1
+        assert current_priority() == Priority.NORMAL
+
+    @pytest.mark.asyncio
+    async def test_lane_stats(self):
+        """Тест статистики очередей: длина очереди и время ожидания"""
+        limiter = RateLimiter(max_requests=1, time_window=0.1)
+        await limiter.wait(priority=Priority.BULK)
+
+        waiter = asyncio.create_task(limiter.wait(priority=Priority.BULK))
+        await asyncio.sleep(0)
+        assert limiter.lane_stats()[Priority.BULK].queued == 1
+        await waiter
+
+        stats = limiter.lane_stats()[Priority.BULK]
+        assert stats.queued == 0
+        assert stats.granted == 2
+        assert stats.max_wait >= 0.08
+        assert stats.mean_wait == pytest.approx(stats.total_wait / 2)
+
+
+class TestRateLimiterMetrics:
+    """Тесты метрик RateLimiter"""
+
+    @pytest.mark.asyncio
+    async def test_snapshot_counts_waits_and_queue(self):
+        """Тест что снимок содержит время ожидания, очередь и занятость окна"""
+        limiter = RateLimiter(max_requests=2, time_window=0.1)
+        await asyncio.gather(*(limiter.wait() for _ in range(4)))
+
+        snapshot = limiter.snapshot()
+        assert snapshot.requests_total == 4
+        assert snapshot.slots_total == 4
+        assert snapshot.slots_used == 2
+        assert snapshot.slot_utilisation == 1.0
+        assert snapshot.queue_size == 0
+        assert snapshot.peak_queue_size == 2
+        assert snapshot.wait_max >= 0.08
+        assert sum(snapshot.wait_histogram.values()) == 4
+        assert snapshot.wait_histogram[0.001] == 2
+
+    @pytest.mark.asyncio
+    async def test_snapshot_counts_throttled(self):
+        """Тест подсчёта отказов с кодом 27"""
+        limiter = AdaptiveRateLimiter(max_requests=4, time_window=0.1)
+        limiter.on_throttled()
+        limiter.on_throttled()
+
+        assert limiter.snapshot().throttled_total == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_queue(self):
+        """Тест что отменённый ожидающий не остаётся в длине очереди"""
+        limiter = RateLimiter(max_requests=1, time_window=0.2)
+        await limiter.wait()
+
+        waiter = asyncio.create_task(limiter.wait())
+        await asyncio.sleep(0)
+        assert limiter.queue_size == 1
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+        assert limiter.queue_size == 0
+        assert limiter.snapshot().peak_queue_size == 1
+
+    @pytest.mark.asyncio
+    async def test_metrics_callback_interval(self):
+        """Тест что callback вызывается не чаще заданного интервала"""
+        limiter = RateLimiter(max_requests=100, time_window=1.0)
+        snapshots = []
+        limiter.set_metrics_callback(snapshots.append, interval=60.0)
+
+        for _ in range(5):
+            await limiter.wait()
+
+        assert len(snapshots) == 1
+        assert snapshots[0].requests_total == 1
+
+    @pytest.mark.asyncio
+    async def test_metrics_callback_error_is_ignored(self):
+        """Тест что ошибка в callback не прерывает запрос"""
+        limiter = RateLimiter(max_requests=100, time_window=1.0)
+
+        def callback(snapshot):
+            raise RuntimeError("export failed")
+
+        limiter.set_metrics_callback(callback, interval=0.0)
+        await limiter.wait()
+
+        assert limiter.snapshot().requests_total == 1
+
+    @pytest.mark.asyncio
+    async def test_shared_file_limiter_metrics(self, tmp_path):
+        """Тест метрик SharedFileRateLimiter"""
+        limiter = SharedFileRateLimiter(tmp_path / "limiter.bin", max_requests=1, time_window=0.1)
+        await limiter.wait()
+        await limiter.wait()
+
+        snapshot = limiter.snapshot()
+        assert snapshot.requests_total == 2
+        assert snapshot.slots_used == 1
+        assert snapshot.wait_max >= 0.05
+
+
+class TestAdaptiveRateLimiter:
+    """Тесты AdaptiveRateLimiter"""
+
+    def test_additive_increase(self):
+        """Тест что лимит растёт примерно на increase за окно успешных запросов"""
+        limiter = AdaptiveRateLimiter(max_requests=4, time_window=1.0)
+
+        for _ in range(4):
+            limiter.on_success()
+
+        assert limiter.max_requests == 4
+        assert 4.9 < limiter.limit < 5.0
+
+        limiter.on_success()
+        assert limiter.max_requests == 5
+        assert limiter.effective_rate == 5.0
+
+    def test_increase_is_capped(self):
+        """Тест верхней границы лимита"""
+        limiter = AdaptiveRateLimiter(max_requests=2, time_window=1.0, max_limit=3)
+
+        for _ in range(100):
+            limiter.on_success()
+
+        assert limiter.max_requests == 3
+
+    def test_multiplicative_decrease(self):
+        """Тест уменьшения лимита при отказе сервера"""
+        limiter = AdaptiveRateLimiter(max_requests=10, time_window=1.0, min_requests=2)
+
+        limiter.on_throttled()
+        assert limiter.max_requests == 5
+
+        for _ in range(5):
+            limiter.on_throttled()
+        assert limiter.max_requests == 2
+
+    @pytest.mark.asyncio
+    async def test_throttle_exhausts_current_window(self):
+        """Тест что после отказа следующий слот выдаётся не раньше, чем через окно"""
+        limiter = AdaptiveRateLimiter(max_requests=4, time_window=0.3)
+        await limiter.wait()
+        limiter.on_throttled()
+
+        start_time = time.monotonic()
+        await limiter.wait()
+        end_time = time.monotonic()
+
+        assert end_time - start_time >= 0.25
+
+    @pytest.mark.asyncio
+    async def test_priority_settings_are_applied(self):
+        """Тест что веса очередей и резерв для интерактивных запросов передаются ограничителю"""
+        limiter = AdaptiveRateLimiter(
+            max_requests=4, time_window=0.3, weights={Priority.BULK: 3}, reserved_share=0.5
+        )
+        assert limiter.weights[Priority.BULK] == 3
+        await limiter.wait(priority=Priority.BULK)
+        await limiter.wait(priority=Priority.BULK)
+
+        blocked = asyncio.create_task(limiter.wait(priority=Priority.BULK))
+        start_time = time.monotonic()
+        await limiter.wait(priority=Priority.INTERACTIVE)
+        await limiter.wait(priority=Priority.INTERACTIVE)
+        end_time = time.monotonic()
+
+        assert end_time - start_time < 0.1
+        assert not blocked.done()
+        await blocked
+
+
+def _acquire_shared_slots(path, count, result_queue):
+    """Получить count слотов общего ограничителя в отдельном процессе"""
+    limiter = SharedFileRateLimiter(path, max_requests=4, time_window=0.5)
+
+    async def run():
+        for _ in range(count):
+            await limiter.wait()
+            result_queue.put(time.time())
+
+    asyncio.run(run())
+
+
+class TestSharedFileRateLimiter:
+    """Тесты SharedFileRateLimiter"""
+
+    @pytest.mark.asyncio
+    async def test_limits_within_one_process(self, tmp_path):
+        """Тест ограничения запросов через общий файл"""
+        limiter = SharedFileRateLimiter(tmp_path / "limiter.bin", max_requests=2, time_window=0.3)
+
+        start_time = time.monotonic()
+        await limiter.wait()
+        await limiter.wait()
+        fast = time.monotonic() - start_time
+        await limiter.wait()
+        end_time = time.monotonic()
+
+        assert fast < 0.1
+        assert end_time - start_time >= 0.25
+
+    @pytest.mark.asyncio
+    async def test_instances_share_window(self, tmp_path):
+        """Тест что разные экземпляры с одним файлом делят одно окно"""
+        path = tmp_path / "limiter.bin"
+        first = SharedFileRateLimiter(path, max_requests=2, time_window=0.3)
+        second = SharedFileRateLimiter(path, max_requests=2, time_window=0.3)
+
+        await first.wait()
+        await second.wait()
+
+        start_time = time.monotonic()
+        await second.wait()
+        end_time = time.monotonic()
+
+        assert end_time - start_time >= 0.25
+
+    @pytest.mark.asyncio
+    async def test_cancelled_reservation_is_released(self, tmp_path):
+        """Тест что отменённая резервация освобождает слот"""
+        limiter = SharedFileRateLimiter(tmp_path / "limiter.bin", max_requests=1, time_window=0.3)
+        await limiter.wait()
+
+        cancelled = asyncio.create_task(limiter.wait())
+        await asyncio.sleep(0.01)
+        assert limiter.queue_size == 1
+        cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+
+        start_time = time.monotonic()
+        await limiter.wait()
+        end_time = time.monotonic()
+
+        assert end_time - start_time < 0.35
+
+    @pytest.mark.asyncio
+    async def test_reserves_request_cost(self, tmp_path):
+        """Тест что запрос со стоимостью резервирует несколько слотов"""
+        limiter = SharedFileRateLimiter(tmp_path / "limiter.bin", max_requests=3, time_window=0.3)
+
+        start_time = time.monotonic()
+        await limiter.wait(cost=3)
+        await limiter.wait()
+        end_time = time.monotonic()
+
+        assert end_time - start_time >= 0.25
+
+    @pytest.mark.asyncio
+    async def test_busy_lock_does_not_block_event_loop(self, tmp_path):
+        """Тест что занятая другим процессом блокировка файла не останавливает event loop"""
+        path = tmp_path / "limiter.bin"
+        limiter = SharedFileRateLimiter(path, max_requests=2, time_window=0.3)
+        await limiter.wait()
+        fd = os.open(path, os.O_RDWR)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            waiting = asyncio.create_task(limiter.wait())
+            ticks = 0
+            for _ in range(10):
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+            assert ticks == 10
+            assert not waiting.done()
+            assert limiter.snapshot().slots_used == 1
+            limiter.on_throttled()
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+        await asyncio.wait_for(waiting, timeout=1)
+        await asyncio.sleep(0.05)
+        assert limiter.snapshot().slots_used == 2
+
+    def test_processes_share_budget(self, tmp_path):
+        """Тест что несколько процессов не превышают общий лимит"""
+        path = str(tmp_path / "limiter.bin")
+        context = multiprocessing.get_context("fork")
+        result_queue = context.Queue()
+        processes = [
+            context.Process(target=_acquire_shared_slots, args=(path, 4, result_queue))
+            for _ in range(3)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(timeout=30)
+
+        times = sorted(result_queue.get(timeout=5) for _ in range(12))
+
+        # В любом окне 0.5 секунды не больше 4 запросов
+        for i in range(len(times) - 4):
+            assert times[i + 4] - times[i] >= 0.5 - 0.02
+
+
+class TestApiMethodThrottling:
+    """Тесты повторов api_method при коде 27"""
+
+    @pytest.mark.asyncio
+    async def test_retries_after_throttle(self):
+        """Тест что вызов повторяется после отказа с кодом 27"""
+        limiter = AdaptiveRateLimiter(max_requests=4, time_window=0.1)
+        calls = 0
+
+        @rate_limit(limiter=limiter)
+        class TestClass:
+            @api_method()
+            async def _request(self):
+                nonlocal calls
+                calls += 1
+                if calls == 1:
+                    raise KitAPIRateLimitError("Too many requests")
+                return "result"
+
+        assert await TestClass()._request() == "result"
+        assert calls == 2
+        assert limiter.max_requests == 2
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_retries(self):
+        """Тест что после исчерпания повторов ошибка пробрасывается"""
+
+        @rate_limit(max_requests=10, time_window=0.05)
+        class TestClass:
+            calls = 0
+
+            @api_method(throttle_retries=1)
+            async def _request(self):
+                TestClass.calls += 1
+                raise KitAPIRateLimitError("Too many requests")
+
+        with pytest.raises(KitAPIRateLimitError):
+            await TestClass()._request()
+        assert TestClass.calls == 2
+
+
+class TestApiMethodBuckets:
+    """Тесты стоимости и отдельных ограничителей api_method"""
+
+    @pytest.mark.asyncio
+    async def test_bucket_uses_own_limiter(self):
+        """Тест что метод с bucket расходует слоты своего ограничителя"""
+        shared = RateLimiter(max_requests=10, time_window=1.0)
+        sales = RateLimiter(max_requests=10, time_window=1.0)
+
+        @rate_limit(limiter=shared, wrap_methods=False)
+        class TestClass:
+            def __init__(self):
+                self._bucket_limiters = {"/GetSales": sales}
+
+            @api_method(bucket="/GetSales", cost=3)
+            async def _get_sales(self):
+                return "sales"
+
+            @api_method(bucket="/GetGoods")
+            async def _get_goods(self):
+                return "goods"
+
+        instance = TestClass()
+        assert await instance._get_sales() == "sales"
+        assert await instance._get_goods() == "goods"
+
+        assert len(sales.requests) == 3
+        # Для /GetGoods своего ограничителя нет - используется общий
+        assert len(shared.requests) == 1
+
+    @pytest.mark.asyncio
+    async def test_heavy_bucket_does_not_delay_cheap_calls(self):
+        """Тест что исчерпанный лимит продаж не задерживает справочные запросы"""
+
+        @rate_limit(max_requests=10, time_window=1.0, wrap_methods=False)
+        class TestClass:
+            def __init__(self):
+                self._bucket_limiters = {"/GetSales": RateLimiter(max_requests=1, time_window=1.0)}
+
+            @api_method(bucket="/GetSales")
+            async def _get_sales(self):
+                return "sales"
+
+            @api_method(bucket="/GetGoods")
+            async def _get_goods(self):
+                return "goods"
+
+        instance = TestClass()
+        await instance._get_sales()
+        blocked = asyncio.create_task(instance._get_sales())
+
+        start_time = time.monotonic()
+        await instance._get_goods()
+        end_time = time.monotonic()
+
+        assert end_time - start_time < 0.1
+        assert not blocked.done()
+        blocked.cancel()
+        await asyncio.gather(blocked, return_exceptions=True)
+
+
 class TestRateLimitDecorator:
     """Тесты декоратора rate_limit"""
 
@@ -169,3 +753,22 @@ class TestRateLimitDecorator:
         # Оба вызова должны пройти быстро (без ожидания)
         assert elapsed < 0.1
 
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_decorator_without_wrapping(self):
+        """Тест что при wrap_methods=False публичные методы не ограничиваются"""
+
+        @rate_limit(max_requests=1, time_window=1.0, wrap_methods=False)
+        class TestClass:
+            async def close(self):
+                return "closed"
+
+        instance = TestClass()
+
+        start = time.monotonic()
+        await instance.close()
+        await instance.close()
+        elapsed = time.monotonic() - start
+
+        assert elapsed < 0.1
+        assert isinstance(TestClass._limiter, RateLimiter)
@@ -0,0 +1,90 @@
+"""
+Тесты для компактных записей продаж
+"""
+
+import json
+import pytest
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from kit_api.models import SalesCollection
+from kit_api.records import (
+    ProductSaleRecord,
+    RecipeDrinkSaleRecord,
+    SaleRecord,
+    records_from_collection,
+    records_from_rows,
+)
+
+MOSCOW = ZoneInfo("Europe/Moscow")
+
+
+class TestSaleRecords:
+    """Тесты для SaleRecord"""
+
+    def test_records_match_models(self, sales_rows):
+        """Тест что записи совпадают с моделями полной валидации"""
+        models = SalesCollection.model_validate({"Sales": sales_rows}).items
+
+        records = records_from_rows(json.loads(json.dumps(sales_rows)))
+
+        assert [type(record) for record in records] == [ProductSaleRecord, RecipeDrinkSaleRecord, SaleRecord]
+        assert [record.to_model() for record in records] == models
+        assert [record.key for record in records] == [model.key for model in models]
+        assert records[0].timestamp == datetime(2024, 1, 15, 12, 30, 45, tzinfo=MOSCOW)
+
+    def test_records_have_no_dict(self, sales_rows):
+        """Тест что у записей нет __dict__"""
+        record = records_from_rows(sales_rows)[0]
+
+        assert not hasattr(record, "__dict__")
+        with pytest.raises(AttributeError):
+            record.extra = 1
+
+    def test_strings_are_interned(self, sales_rows):
+        """Тест что одинаковые названия разных продаж - один объект"""
+        rows = json.loads(json.dumps(sales_rows))
+        assert rows[0]["VendingMachineName"] is not rows[1]["VendingMachineName"]
+
+        records = records_from_rows(rows)
+
+        assert records[0].vending_machine_name is records[1].vending_machine_name
+
+    def test_from_collection(self, sales_rows):
+        """Тест что записи строятся и из провалидированной коллекции"""
+        collection = SalesCollection.model_validate({"Sales": sales_rows})
+
+        assert records_from_collection(collection) == records_from_rows(sales_rows)
+
+    def test_null_fields_do_not_select_kind(self, sales_rows):
+        """Тест что поле со значением null не определяет вид продажи, как у моделей"""
+        rows = [{**sales_rows[1], "GoodsName": None}, {**sales_rows[0], "FormulationId": None}]
+
+        records = records_from_rows(rows)
+
+        assert [type(record) for record in records] == [RecipeDrinkSaleRecord, ProductSaleRecord]
+        assert [record.to_model() for record in records] == SalesCollection.model_validate({"Sales": rows}).items
+
+    def test_invalid_row(self, sales_rows):
+        """Тест что некорректная запись отклоняется"""
+        with pytest.raises(ValueError):
+            records_from_rows([{**sales_rows[0], "LineNumber": "первая"}])
+
+
+class TestClientSaleRecords:
+    """Тесты get_sales(sales_format="records")"""
+
+    @pytest.mark.asyncio
+    async def test_get_sales_records(self, make_client, make_session, sales_rows):
+        """Тест что get_sales возвращает записи вместо коллекции моделей"""
+        client = make_client()
+        client._session = make_session({"ResultCode": 0, "Sales": sales_rows})
+
+        records = await client.get_sales(
+            1, datetime(2024, 1, 15, tzinfo=MOSCOW), datetime(2024, 1, 16, tzinfo=MOSCOW),
+            sales_format="records",
+        )
+
+        assert [record.line for record in records] == [1, 2, 3]
+        assert isinstance(records[0], ProductSaleRecord)
+        await client.close()
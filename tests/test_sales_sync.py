@@ -0,0 +1,165 @@
+"""
+Тесты для инкрементальной синхронизации продаж
+"""
+
+import json
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+from zoneinfo import ZoneInfo
+from pydantic import ValidationError
+
+from kit_api.exceptions import KitAPINetworkError, KitAPIValidationError
+from kit_api.models import SalesCollection
+from kit_api.sales_sync import IncrementalSalesSync, JsonWatermarkStore, SalesWatermark
+
+
+def make_sales(*timestamps: str, vending_machine_id: int = 1) -> SalesCollection:
+    """Коллекция продаж с указанными временами"""
+    return SalesCollection.model_validate({"Sales": [
+        {
+            "LineNumber": 1,
+            "Sum": 100.0,
+            "DateTime": timestamp,
+            "VendingMachine": vending_machine_id,
+            "VendingMachineName": "VM",
+            "MatrixId": 10,
+        }
+        for timestamp in timestamps
+    ]})
+
+
+def make_client(get_sales) -> MagicMock:
+    """Мок клиента с заданным get_sales"""
+    client = MagicMock()
+    client.get_sales = get_sales
+    client.rate_limiter.max_requests = 2
+    return client
+
+
+class TestJsonWatermarkStore:
+    """Тесты JsonWatermarkStore"""
+
+    def test_roundtrip(self, tmp_path):
+        """Тест сохранения и чтения отметки из файла"""
+        path = tmp_path / "watermarks.json"
+        timestamp = datetime(2024, 1, 15, 12, 30, 45, tzinfo=ZoneInfo('Europe/Moscow'))
+
+        JsonWatermarkStore(path).set(1, SalesWatermark(timestamp, {"a", "b"}))
+        loaded = JsonWatermarkStore(path).get(1)
+
+        assert loaded.timestamp == timestamp
+        assert loaded.seen_keys == {"a", "b"}
+        assert JsonWatermarkStore(path).get(2) is None
+
+    def test_delete(self, tmp_path):
+        """Тест удаления отметки"""
+        path = tmp_path / "watermarks.json"
+        store = JsonWatermarkStore(path)
+        store.set(1, SalesWatermark(datetime(2024, 1, 15, tzinfo=ZoneInfo('Europe/Moscow'))))
+        store.delete(1)
+
+        assert JsonWatermarkStore(path).get(1) is None
+
+    def test_invalid_file_raises_error(self, tmp_path):
+        """Тест что повреждённый файл вызывает ошибку валидации"""
+        path = tmp_path / "watermarks.json"
+        path.write_text("{not json", encoding="utf-8")
+
+        with pytest.raises(KitAPIValidationError):
+            JsonWatermarkStore(path).get(1)
+
+
+class TestIncrementalSalesSync:
+    """Тесты IncrementalSalesSync"""
+
+    @pytest.mark.asyncio
+    async def test_first_sync_starts_from_start_date(self, tmp_path):
+        """Тест что первая синхронизация начинается с start_date"""
+        get_sales = AsyncMock(return_value=make_sales("15.01.2024 10:00:00", "15.01.2024 11:00:00"))
+        start = datetime(2024, 1, 1, tzinfo=ZoneInfo('Europe/Moscow'))
+        to_date = datetime(2024, 1, 16, tzinfo=ZoneInfo('Europe/Moscow'))
+        sync = IncrementalSalesSync(make_client(get_sales), JsonWatermarkStore(tmp_path / "w.json"), start)
+
+        result = await sync.sync_machine(1, to_date)
+
+        assert len(result.items) == 2
+        assert get_sales.await_args.args == (1, start, to_date)
+
+    @pytest.mark.asyncio
+    async def test_next_sync_fetches_delta_and_skips_overlap(self, tmp_path):
+        """Тест что повторная синхронизация загружает только новый период без дублей"""
+        store = JsonWatermarkStore(tmp_path / "w.json")
+        start = datetime(2024, 1, 1, tzinfo=ZoneInfo('Europe/Moscow'))
+        overlap = timedelta(minutes=30)
+
+        get_sales = AsyncMock(return_value=make_sales("15.01.2024 10:00:00", "15.01.2024 11:40:00"))
+        sync = IncrementalSalesSync(make_client(get_sales), store, start, overlap=overlap)
+        await sync.sync_machine(1, datetime(2024, 1, 15, 12, tzinfo=ZoneInfo('Europe/Moscow')))
+
+        # Повторно приходит продажа из перекрытия и одна новая
+        get_sales = AsyncMock(return_value=make_sales("15.01.2024 11:40:00", "15.01.2024 12:45:00"))
+        sync = IncrementalSalesSync(make_client(get_sales), JsonWatermarkStore(tmp_path / "w.json"), start, overlap=overlap)
+        result = await sync.sync_machine(1, datetime(2024, 1, 15, 13, tzinfo=ZoneInfo('Europe/Moscow')))
+
+        from_date = get_sales.await_args.args[1]
+        assert from_date == datetime(2024, 1, 15, 11, 30, tzinfo=ZoneInfo('Europe/Moscow'))
+        assert [sale.timestamp.minute for sale in result.items] == [45]
+
+    @pytest.mark.asyncio
+    async def test_idle_machine_advances_watermark(self, tmp_path):
+        """Тест что запуск без продаж сдвигает отметку и следующий запуск не перезагружает период"""
+        store = JsonWatermarkStore(tmp_path / "w.json")
+        start = datetime(2024, 1, 1, tzinfo=ZoneInfo('Europe/Moscow'))
+        overlap = timedelta(minutes=30)
+        get_sales = AsyncMock(return_value=make_sales())
+        sync = IncrementalSalesSync(make_client(get_sales), store, start, overlap=overlap)
+
+        await sync.sync_machine(1, datetime(2024, 1, 15, tzinfo=ZoneInfo('Europe/Moscow')))
+        await sync.sync_machine(1, datetime(2024, 1, 16, tzinfo=ZoneInfo('Europe/Moscow')))
+
+        from_date = get_sales.await_args.args[1]
+        assert from_date == datetime(2024, 1, 14, 23, 30, tzinfo=ZoneInfo('Europe/Moscow'))
+        watermark = JsonWatermarkStore(tmp_path / "w.json").get(1)
+        assert watermark.timestamp is None
+        assert watermark.fetched_to == datetime(2024, 1, 16, tzinfo=ZoneInfo('Europe/Moscow'))
+
+    @pytest.mark.asyncio
+    async def test_fleet_sync_keeps_watermark_on_error(self, tmp_path):
+        """Тест что ошибка по автомату не сдвигает его отметку"""
+        store = JsonWatermarkStore(tmp_path / "w.json")
+
+        async def get_sales(vending_machine_id, from_date, to_date):
+            if vending_machine_id == 2:
+                raise KitAPINetworkError("Network error")
+            return make_sales("15.01.2024 10:00:00", vending_machine_id=vending_machine_id)
+
+        start = datetime(2024, 1, 1, tzinfo=ZoneInfo('Europe/Moscow'))
+        sync = IncrementalSalesSync(make_client(get_sales), store, start)
+        result = await sync.sync([1, 2], datetime(2024, 1, 16, tzinfo=ZoneInfo('Europe/Moscow')))
+
+        assert set(result.sales) == {1}
+        assert set(result.errors) == {2}
+        assert store.get(1) is not None
+        assert store.get(2) is None
+
+        saved = json.loads((tmp_path / "w.json").read_text(encoding="utf-8"))
+        assert list(saved) == ["1"]
+
+    @pytest.mark.asyncio
+    async def test_fleet_sync_tolerates_invalid_response(self, tmp_path):
+        """Тест что ошибка валидации ответа по автомату не прерывает синхронизацию остальных"""
+        store = JsonWatermarkStore(tmp_path / "w.json")
+
+        async def get_sales(vending_machine_id, from_date, to_date):
+            if vending_machine_id == 2:
+                return SalesCollection.model_validate({"Sales": [{"LineNumber": "первая"}]})
+            return make_sales("15.01.2024 10:00:00", vending_machine_id=vending_machine_id)
+
+        start = datetime(2024, 1, 1, tzinfo=ZoneInfo('Europe/Moscow'))
+        sync = IncrementalSalesSync(make_client(get_sales), store, start)
+        result = await sync.sync([1, 2, 3], datetime(2024, 1, 16, tzinfo=ZoneInfo('Europe/Moscow')))
+
+        assert set(result.sales) == {1, 3}
+        assert isinstance(result.errors[2], ValidationError)
+        assert store.get(2) is None
@@ -0,0 +1,102 @@
+"""
+Тесты для SingleFlight
+"""
+
+import asyncio
+import pytest
+
+from kit_api.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    """Тесты SingleFlight"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self):
+        """Тест что одинаковые конкурентные вызовы выполняются один раз"""
+        flight = SingleFlight()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return object()
+
+        results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(5)))
+
+        assert calls == 1
+        assert all(result is results[0] for result in results)
+        assert len(flight) == 0
+
+    @pytest.mark.asyncio
+    async def test_different_keys_are_not_coalesced(self):
+        """Тест что вызовы с разными ключами выполняются отдельно"""
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return key
+
+        results = await asyncio.gather(flight.do(1, lambda: fetch(1)), flight.do(2, lambda: fetch(2)))
+
+        assert results == [1, 2]
+        assert sorted(calls) == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_cancelling_one_waiter_keeps_shared_call(self):
+        """Тест что отмена одного ожидающего не отменяет общий вызов"""
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def fetch():
+            await release.wait()
+            return "result"
+
+        first = asyncio.create_task(flight.do("key", fetch))
+        second = asyncio.create_task(flight.do("key", fetch))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await second == "result"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    @pytest.mark.asyncio
+    async def test_call_is_cancelled_when_nobody_waits(self):
+        """Тест что общий вызов отменяется, если его больше никто не ждёт"""
+        flight = SingleFlight()
+        cancelled = asyncio.Event()
+
+        async def fetch():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiter = asyncio.create_task(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+    @pytest.mark.asyncio
+    async def test_exception_is_shared(self):
+        """Тест что исключение общего вызова получают все ожидающие"""
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            flight.do("key", fetch), flight.do("key", fetch), return_exceptions=True
+        )
+
+        assert all(isinstance(result, ValueError) for result in results)
+        assert len(flight) == 0
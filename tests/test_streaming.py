@@ -0,0 +1,327 @@
+"""
+Тесты для потокового разбора ответов и iter_sales
+"""
+
+import asyncio
+import json
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+from zoneinfo import ZoneInfo
+from aiohttp.client_exceptions import ClientError
+
+from kit_api.exceptions import KitAPINetworkError, KitAPIRateLimitError, KitAPIResponseError
+from kit_api.models import ProductSaleModel
+from kit_api.streaming import JSONArrayStreamParser
+from kit_api.tracing import RequestTracer, current_trace
+
+MOSCOW = ZoneInfo("Europe/Moscow")
+
+
+def make_sale(line: int, timestamp: str = "15.01.2024 12:30:45", machine: int = 1) -> dict:
+    """Сырая запись продажи в формате Kit API"""
+    return {
+        "LineNumber": line,
+        "Sum": 100.0,
+        "DateTime": timestamp,
+        "VendingMachine": machine,
+        "VendingMachineName": f"VM {machine}",
+        "MatrixId": 10,
+        "GoodsName": f"{line}|Товар",
+    }
+
+
+def split(data: bytes, size: int) -> list[bytes]:
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def parse(data: bytes, size: int) -> tuple[list, JSONArrayStreamParser]:
+    parser = JSONArrayStreamParser("Sales")
+    items = []
+    for chunk in split(data, size):
+        items.extend(json.loads(item) for item in parser.feed(chunk))
+    parser.close()
+    return items, parser
+
+
+class StreamedResponse:
+    """Ответ, тело которого читается частями; считает прочитанные части"""
+
+    def __init__(self, body: bytes, size: int, fail_after: int | None = None):
+        self.chunks = split(body, size)
+        self.read_chunks = 0
+        self.fail_after = fail_after
+        self.content = MagicMock()
+        self.content.iter_chunked = self.iter_chunked
+        self.raise_for_status = MagicMock()
+
+    async def iter_chunked(self, _size):
+        for chunk in self.chunks:
+            if self.fail_after is not None and self.read_chunks >= self.fail_after:
+                raise ClientError("connection reset")
+            self.read_chunks += 1
+            yield chunk
+
+
+def body(sales: list[dict], result_code: int = 0, code_first: bool = True) -> bytes:
+    if code_first:
+        return json.dumps({"ResultCode": result_code, "Sales": sales}).encode()
+    return json.dumps({"Sales": sales, "ResultCode": result_code}).encode()
+
+
+class TestJSONArrayStreamParser:
+    """Тесты инкрементального разбора массива"""
+
+    @pytest.mark.parametrize("size", [1, 2, 7, 64, 100_000])
+    def test_any_chunking(self, size):
+        """Тест что результат не зависит от разбиения тела на части"""
+        sales = [make_sale(line) for line in range(20)]
+        data = json.dumps({"ResultCode": 0, "ErrorMessage": None, "Sales": sales}, indent=2).encode()
+
+        items, parser = parse(data, size)
+
+        assert items == sales
+        assert parser.field("ResultCode") == 0
+        assert parser.field("ErrorMessage") is None
+
+    @pytest.mark.parametrize("size", [1, 3, 1000])
+    def test_strings_with_structural_characters(self, size):
+        """Тест строк с кавычками, скобками и экранированием"""
+        sales = [
+            {"GoodsName": 'Шоколад "Алёнка" {200 г}', "Nested": {"a": [1, {"b": "]"}]}},
+            {"GoodsName": "back\\slash\\", "Other": "}{"},
+        ]
+
+        items, _ = parse(json.dumps({"Sales": sales, "ResultCode": 0}).encode(), size)
+
+        assert items == sales
+
+    def test_elements_are_returned_incrementally(self):
+        """Тест что элементы отдаются до получения конца массива"""
+        data = body([make_sale(1), make_sale(2)])
+        parser = JSONArrayStreamParser("Sales")
+        first_end = data.index(b"}") + 1
+
+        assert [json.loads(item)["LineNumber"] for item in parser.feed(data[:first_end])] == [1]
+        assert not parser.done
+        assert [json.loads(item)["LineNumber"] for item in parser.feed(data[first_end:])] == [2]
+        assert parser.done
+
+    def test_buffer_is_bounded(self):
+        """Тест что разобранная часть тела не накапливается в буфере"""
+        data = body([make_sale(line) for line in range(1000)])
+        parser = JSONArrayStreamParser("Sales")
+
+        for chunk in split(data, 512):
+            parser.feed(chunk)
+            assert len(parser._buffer) < 1024
+
+    def test_missing_or_null_array(self):
+        """Тест ответа без массива или с null вместо массива"""
+        items, parser = parse('{"ResultCode": 5, "Sales": null, "ErrorMessage": "ошибка"}'.encode(), 4)
+
+        assert items == []
+        assert parser.field("Sales") is None
+        assert parser.field("ErrorMessage") == "ошибка"
+
+    def test_truncated_body(self):
+        """Тест что оборванное тело обнаруживается"""
+        parser = JSONArrayStreamParser("Sales")
+        parser.feed(body([make_sale(1)])[:-5])
+
+        with pytest.raises(ValueError):
+            parser.close()
+
+    def test_not_an_object(self):
+        """Тест что тело не-объект отклоняется"""
+        with pytest.raises(ValueError):
+            JSONArrayStreamParser().feed(b"[1, 2]")
+
+
+class TestIterSales:
+    """Тесты потоковой выгрузки продаж"""
+
+    @pytest.mark.asyncio
+    async def test_yields_validated_sales(self, client, make_session):
+        """Тест что продажи отдаются провалидированными моделями"""
+        client._session = make_session(StreamedResponse(body([make_sale(1), make_sale(2)]), 50))
+
+        sales = [sale async for sale in client.iter_sales(
+            1, datetime(2024, 1, 15, tzinfo=MOSCOW), datetime(2024, 1, 16, tzinfo=MOSCOW)
+        )]
+
+        assert [sale.line for sale in sales] == [1, 2]
+        assert all(isinstance(sale, ProductSaleModel) for sale in sales)
+        assert json.loads(client._session.post.call_args.kwargs["data"])["Filter"]["VendingMachineId"] == 1
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_consumer_controls_pace(self, client, make_session):
+        """Тест что тело читается только по мере потребления продаж"""
+        response = StreamedResponse(body([make_sale(line) for line in range(100)]), 256)
+        client._session = make_session(response)
+
+        stream = client.iter_sales(
+            1, datetime(2024, 1, 15, tzinfo=MOSCOW), datetime(2024, 1, 16, tzinfo=MOSCOW)
+        )
+        await stream.__anext__()
+
+        assert response.read_chunks < len(response.chunks) // 2
+        await stream.aclose()
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_windows_and_machines(self, client, make_session):
+        """Тест обхода окон и автоматов с отбрасыванием дублей на границе окон"""
+        boundary = make_sale(2, "16.01.2024 00:00:00")
+        client._session = make_session(
+            StreamedResponse(body([make_sale(1), boundary]), 64),
+            StreamedResponse(body([boundary, make_sale(3, "16.01.2024 10:00:00")]), 64),
+            StreamedResponse(body([make_sale(1, machine=2)]), 64),
+            StreamedResponse(body([]), 64),
+        )
+
+        sales = [sale async for sale in client.iter_sales(
+            [1, 2],
+            datetime(2024, 1, 15, tzinfo=MOSCOW),
+            datetime(2024, 1, 17, tzinfo=MOSCOW),
+            window=timedelta(days=1),
+        )]
+
+        assert [(sale.vending_machine_id, sale.line) for sale in sales] == [(1, 1), (1, 2), (1, 3), (2, 1)]
+        assert client._session.post.call_count == 4
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_error_code_before_sales(self, client, make_session):
+        """Тест что код ошибки в начале ответа выбрасывается сразу"""
+        client._session = make_session(StreamedResponse(body([], result_code=5), 8))
+
+        with pytest.raises(KitAPIResponseError):
+            async for _ in client.iter_sales(
+                    1, datetime(2024, 1, 15, tzinfo=MOSCOW), datetime(2024, 1, 16, tzinfo=MOSCOW)
+            ):
+                pass
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_error_code_after_sales(self, client, make_session):
+        """Тест что код ошибки в конце ответа проверяется после массива"""
+        client._session = make_session(StreamedResponse(body([make_sale(1)], 5, code_first=False), 8))
+
+        with pytest.raises(KitAPIResponseError):
+            async for _ in client.iter_sales(
+                    1, datetime(2024, 1, 15, tzinfo=MOSCOW), datetime(2024, 1, 16, tzinfo=MOSCOW)
+            ):
+                pass
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_throttled_window_is_retried(self, client, make_session):
+        """Тест повтора окна после отказа с кодом 27"""
+        client._session = make_session(
+            StreamedResponse(body([], result_code=27), 64),
+            StreamedResponse(body([make_sale(1)]), 64),
+        )
+
+        sales = [sale async for sale in client.iter_sales(
+            1, datetime(2024, 1, 15, tzinfo=MOSCOW), datetime(2024, 1, 16, tzinfo=MOSCOW)
+        )]
+
+        assert [sale.line for sale in sales] == [1]
+        assert client.rate_limiter.snapshot().throttled_total == 1
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_network_error_is_retried_before_first_sale(self, client, make_session):
+        """Тест что сетевая ошибка до первой продажи повторяет окно"""
+        client._session = make_session(
+            StreamedResponse(body([make_sale(1)]), 8, fail_after=1),
+            StreamedResponse(body([make_sale(1)]), 8),
+        )
+
+        sales = [sale async for sale in client.iter_sales(
+            1, datetime(2024, 1, 15, tzinfo=MOSCOW), datetime(2024, 1, 16, tzinfo=MOSCOW)
+        )]
+
+        assert len(sales) == 1
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_network_error_after_sales_is_raised(self, client, make_session):
+        """Тест что обрыв после отданных продаж не повторяется (иначе продажи задвоятся)"""
+        data = body([make_sale(line) for line in range(10)])
+        client._session = make_session(StreamedResponse(data, 64, fail_after=8))
+        received = []
+
+        with pytest.raises(KitAPINetworkError):
+            async for sale in client.iter_sales(
+                    1, datetime(2024, 1, 15, tzinfo=MOSCOW), datetime(2024, 1, 16, tzinfo=MOSCOW)
+            ):
+                received.append(sale)
+
+        assert received
+        assert client._session.post.call_count == 1
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_throttled_without_retries_left(self, client, make_session):
+        """Тест что исчерпание повторов после кода 27 выбрасывает ошибку"""
+        client._session = make_session(*(StreamedResponse(body([], result_code=27), 64) for _ in range(4)))
+
+        with pytest.raises(KitAPIRateLimitError):
+            async for _ in client.iter_sales(
+                    1, datetime(2024, 1, 15, tzinfo=MOSCOW), datetime(2024, 1, 16, tzinfo=MOSCOW)
+            ):
+                pass
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_window_is_traced(self, make_client, make_session):
+        """Тест что окно выгрузки попадает в трейсер одним вызовом со всеми попытками"""
+        finished = []
+        tracer = RequestTracer()
+        tracer.on_request_end = finished.append
+        client = make_client(tracer=tracer)
+        data = body([make_sale(1)])
+        client._session = make_session(
+            StreamedResponse(body([], result_code=27), 64),
+            StreamedResponse(data, 64),
+        )
+
+        sales = [sale async for sale in client.iter_sales(
+            1, datetime(2024, 1, 15, tzinfo=MOSCOW), datetime(2024, 1, 16, tzinfo=MOSCOW)
+        )]
+
+        assert len(sales) == 1
+        assert len(finished) == 1
+        trace = finished[0]
+        assert trace.endpoint == "/GetSales"
+        assert trace.attempts == 2
+        assert trace.result_code == 0
+        assert trace.error is None
+        assert trace.request_bytes > 0
+        assert trace.response_bytes == len(body([], result_code=27)) + len(data)
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_trace_is_not_held_across_yields(self, make_client, make_session):
+        """Тест что трасса окна не попадает в контекст потребителя и завершается при раннем выходе"""
+        finished = []
+        tracer = RequestTracer()
+        tracer.on_request_end = finished.append
+        client = make_client(tracer=tracer)
+        client._session = make_session(StreamedResponse(body([make_sale(line) for line in range(10)]), 64))
+
+        stream = client.iter_sales(
+            1, datetime(2024, 1, 15, tzinfo=MOSCOW), datetime(2024, 1, 16, tzinfo=MOSCOW)
+        )
+        await stream.__anext__()
+        assert current_trace() is None
+        # Финализатор генератора закрывает его в другой задаче (и другом контексте)
+        await asyncio.create_task(stream.aclose())
+
+        assert len(finished) == 1
+        assert finished[0].error is None
+        assert finished[0].attempts == 1
+        await client.close()
@@ -2,13 +2,14 @@
 Тесты для TimestampAPI
 """
 
+import asyncio
 import pytest
 import json
 from unittest.mock import AsyncMock, MagicMock, patch
 from aiohttp import ClientResponse, ClientError as AioHTTPClientError
 from requests.exceptions import RequestException
 
-from kit_api.timestamp_api import TimestampAPI
+from kit_api.timestamp_api import TimestampAPI, SyncedTimestampAPI
 from kit_api.exceptions import KitAPINetworkError, KitAPIError
 
 
@@ -164,3 +165,67 @@ class TestGetNow:
             with pytest.raises(KitAPINetworkError, match="Ошибка сети"):
                 api.get_now()
 
+
+
+class TestSyncedTimestampAPI:
+    """Тесты SyncedTimestampAPI"""
+
+    @pytest.mark.asyncio
+    async def test_syncs_once_and_issues_locally(self):
+        """Тест что сетевой запрос выполняется только при первой синхронизации"""
+        api = SyncedTimestampAPI(base_url="https://example.com/api/timestamp")
+
+        with patch.object(TimestampAPI, "async_get_now", AsyncMock(return_value=1234567890)) as remote:
+            first = await api.async_get_now()
+            second = await api.async_get_now()
+
+        assert remote.await_count == 1
+        assert first >= 1234567890
+        assert second > first
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_sync_and_are_unique(self):
+        """Тест что конкурентные вызовы получают уникальные возрастающие значения"""
+        api = SyncedTimestampAPI(base_url="https://example.com/api/timestamp")
+
+        with patch.object(TimestampAPI, "async_get_now", AsyncMock(return_value=1234567890)) as remote:
+            results = await asyncio.gather(*(api.async_get_now() for _ in range(50)))
+
+        assert remote.await_count == 1
+        assert len(set(results)) == 50
+        assert sorted(results) == results
+
+    @pytest.mark.asyncio
+    async def test_invalidate_forces_resync(self):
+        """Тест что invalidate() приводит к повторной синхронизации"""
+        api = SyncedTimestampAPI(base_url="https://example.com/api/timestamp")
+
+        with patch.object(TimestampAPI, "async_get_now", AsyncMock(return_value=1234567890)) as remote:
+            await api.async_get_now()
+            api.invalidate()
+            assert not api.is_synced
+            await api.async_get_now()
+
+        assert remote.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_resync_interval(self):
+        """Тест повторной синхронизации по истечении интервала"""
+        api = SyncedTimestampAPI(base_url="https://example.com/api/timestamp", resync_interval=0.0)
+
+        with patch.object(TimestampAPI, "async_get_now", AsyncMock(return_value=1234567890)) as remote:
+            await api.async_get_now()
+            await api.async_get_now()
+
+        assert remote.await_count == 2
+
+    def test_get_now_sync(self):
+        """Тест синхронного получения timestamp"""
+        api = SyncedTimestampAPI(base_url="https://example.com/api/timestamp")
+
+        with patch.object(TimestampAPI, "get_now", MagicMock(return_value=1234567890)) as remote:
+            first = api.get_now()
+            second = api.get_now()
+
+        assert remote.call_count == 1
+        assert second > first
@@ -0,0 +1,133 @@
+"""
+Тесты для трассировки запросов
+"""
+
+import json
+import pytest
+
+from kit_api.exceptions import KitAPIRateLimitError, KitAPIResponseError
+from kit_api.tracing import RequestTrace, RequestTracer, current_trace, trace_request
+
+
+class RecordingTracer(RequestTracer):
+    def __init__(self):
+        self.started: list[RequestTrace] = []
+        self.finished: list[RequestTrace] = []
+
+    def on_request_start(self, trace: RequestTrace) -> None:
+        self.started.append(trace)
+
+    def on_request_end(self, trace: RequestTrace) -> None:
+        self.finished.append(trace)
+
+
+class TestTraceRequest:
+    """Тесты контекстного менеджера trace_request"""
+
+    def test_trace_is_current_inside_block(self):
+        """Тест что трасса доступна через current_trace() только внутри блока"""
+        tracer = RecordingTracer()
+
+        with trace_request(tracer, "/GetGoods") as trace:
+            assert current_trace() is trace
+
+        assert current_trace() is None
+        assert tracer.started == [trace]
+        assert tracer.finished == [trace]
+        assert trace.total >= 0
+
+    def test_error_is_recorded(self):
+        """Тест что ошибка вызова записывается в трассу"""
+        tracer = RecordingTracer()
+
+        with pytest.raises(ValueError):
+            with trace_request(tracer, "/GetGoods"):
+                raise ValueError("boom")
+
+        assert isinstance(tracer.finished[0].error, ValueError)
+
+    def test_hook_error_is_ignored(self):
+        """Тест что ошибка в хуке трейсера не прерывает вызов"""
+
+        class BrokenTracer(RequestTracer):
+            def on_request_end(self, trace):
+                raise RuntimeError("export failed")
+
+        with trace_request(BrokenTracer(), "/GetGoods"):
+            pass
+
+
+class TestClientTracing:
+    """Тесты трассировки вызовов клиента"""
+
+    @pytest.mark.asyncio
+    async def test_trace_covers_call_path(self, make_client, make_session):
+        """Тест что трасса содержит замеры этапов, размеры и код ответа"""
+        tracer = RecordingTracer()
+        client = make_client(tracer=tracer)
+        client._session = make_session({"ResultCode": 0, "Goods": []})
+
+        await client.get_products()
+
+        trace = tracer.finished[0]
+        assert trace.endpoint == "/GetGoods"
+        assert trace.attempts == 1
+        assert trace.result_code == 0
+        assert trace.error is None
+        assert trace.request_bytes > 0
+        assert trace.response_bytes == len(json.dumps({"ResultCode": 0, "Goods": []}).encode())
+        for phase in ("request_id", "rate_limit_wait", "time_to_first_byte", "download", "decode", "validation"):
+            assert getattr(trace, phase) >= 0
+        assert trace.total >= trace.validation
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_trace_counts_throttled_attempts(self, make_client, make_session):
+        """Тест что повтор после кода 27 попадает в ту же трассу"""
+        tracer = RecordingTracer()
+        client = make_client(tracer=tracer)
+        client._session = make_session(
+            {"ResultCode": 27},
+            {"ResultCode": 0, "VendingMachines": []},
+        )
+
+        await client.get_vending_machines()
+
+        assert len(tracer.finished) == 1
+        assert tracer.finished[0].attempts == 2
+        assert tracer.finished[0].result_code == 0
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_trace_records_error(self, make_client, make_session):
+        """Тест что ошибка ответа записывается в трассу"""
+        tracer = RecordingTracer()
+        client = make_client(tracer=tracer)
+        client._session = make_session({"ResultCode": 5, "ErrorMessage": "error"})
+
+        with pytest.raises(KitAPIResponseError):
+            await client.get_products()
+
+        trace = tracer.finished[0]
+        assert trace.result_code == 5
+        assert isinstance(trace.error, KitAPIResponseError)
+        assert not isinstance(trace.error, KitAPIRateLimitError)
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_no_trace_without_tracer(self, make_client, make_session):
+        """Тест что без трейсера трасса не создаётся"""
+        client = make_client()
+        client._session = make_session({"ResultCode": 0, "Goods": []})
+        seen = []
+        validate = client._validate
+
+        def spy(model, response):
+            seen.append(current_trace())
+            return validate(model, response)
+
+        client._validate = spy
+        await client.get_products()
+
+        assert seen == [None]
+        await client.close()
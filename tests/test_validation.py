@@ -0,0 +1,208 @@
+"""
+Тесты для режимов валидации ответов
+"""
+
+import pickle
+import pytest
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from pydantic import ValidationError
+
+from kit_api.cache import ReferenceCache
+from kit_api.client import KitVendingAPIClient
+from kit_api.exceptions import KitAPIValidationError
+from kit_api.models import (
+    MatricesKitCollection,
+    ProductSaleModel,
+    ProductsKitCollection,
+    RecipeDrinkSaleModel,
+    SalesCollection,
+)
+from kit_api.validation import LazyList, ValidationMode, current_validation_mode, validate_model, validation_mode
+
+MOSCOW = ZoneInfo("Europe/Moscow")
+
+MATRICES = {
+    "GoodsMatrices": [
+        {
+            "MatrixId": 1, "MatrixName": "Снеки", "MatrixType": 1,
+            "Details": [{"LineNumber": 1, "Price2": 10.0, "GoodsName": "1|Вода", "MaxCount": 5}],
+        },
+        {
+            "MatrixId": 2, "MatrixName": "Кофе", "MatrixType": 2,
+            "Details": [{"LineNumber": 1, "Price2": None, "FormulationId": 3}],
+        },
+        {"MatrixId": 3, "MatrixName": "Комбо", "MatrixType": 3, "Details": []},
+    ]
+}
+
+
+@pytest.fixture
+def sales_response(sales_rows):
+    """Ответ /GetSales с записями sales_rows"""
+    return {"ResultCode": 0, "Sales": sales_rows}
+
+
+class TestValidateModel:
+    """Тесты построения моделей в разных режимах"""
+
+    @pytest.mark.parametrize("mode", list(ValidationMode))
+    def test_modes_build_same_models(self, mode, sales_response):
+        """Тест что все режимы дают те же модели, что и полная валидация"""
+        for model, data in ((SalesCollection, sales_response), (MatricesKitCollection, MATRICES)):
+            expected = model.model_validate(data)
+
+            result = validate_model(model, data, mode)
+
+            assert type(result) is model
+            assert list(result.items) == expected.items
+
+    @pytest.mark.parametrize("mode", [ValidationMode.TRUSTED, ValidationMode.LAZY])
+    def test_keeps_subclasses_and_conversions(self, mode, sales_response):
+        """Тест что режимы TRUSTED и LAZY выбирают вид продажи и разбирают время"""
+        sales = validate_model(SalesCollection, sales_response, mode)
+
+        assert isinstance(sales.items[0], ProductSaleModel)
+        assert isinstance(sales.items[1], RecipeDrinkSaleModel)
+        assert sales.items[0].timestamp == datetime(2024, 1, 15, 12, 30, 45, tzinfo=MOSCOW)
+
+    @pytest.mark.parametrize("mode", list(ValidationMode))
+    def test_missing_collection_is_rejected(self, mode):
+        """Тест что ответ без поля коллекции отклоняется в любом режиме"""
+        with pytest.raises(ValidationError):
+            validate_model(SalesCollection, {"ResultCode": 0}, mode)
+
+    @pytest.mark.parametrize("mode", list(ValidationMode))
+    def test_invalid_items_are_rejected(self, mode, sales_rows):
+        """Тест что запись без обязательного поля или с неизвестным типом матрицы отклоняется"""
+        sale = {key: value for key, value in sales_rows[0].items() if key != "Sum"}
+        matrix = {**MATRICES["GoodsMatrices"][2], "MatrixType": 9}
+
+        with pytest.raises(ValidationError):
+            list(validate_model(SalesCollection, {"Sales": [sale]}, mode).items)
+        with pytest.raises(ValidationError):
+            validate_model(MatricesKitCollection, {"GoodsMatrices": [matrix]}, mode).get_by_id(3)
+
+    def test_trusted_skips_value_checks(self):
+        """Тест что режим TRUSTED собирает модели по алиасам без проверки типов значений"""
+        products = validate_model(
+            ProductsKitCollection, {"Goods": [{"GoodsId": "A-1", "GoodsName": "Вода"}]}, ValidationMode.TRUSTED
+        )
+
+        assert products.items[0].id == "A-1"
+        assert products.get_by_id("A-1") is products.items[0]
+        assert products.items[0].model_fields_set == {"id", "name"}
+
+    def test_trusted_reports_error_location(self, sales_rows):
+        """Тест что ошибка режима TRUSTED указывает на запись и поле, как у pydantic"""
+        sale = {key: value for key, value in sales_rows[1].items() if key != "Sum"}
+
+        with pytest.raises(ValidationError) as exc_info:
+            validate_model(SalesCollection, {"Sales": [sales_rows[0], sale]}, ValidationMode.TRUSTED)
+
+        assert exc_info.value.errors()[0]["type"] == "missing"
+        assert exc_info.value.errors()[0]["loc"] == ("Sales", 1, "drink", "Sum")
+
+    def test_lazy_validates_on_access(self, sales_rows):
+        """Тест что режим LAZY валидирует запись только при обращении к ней"""
+        data = {"Sales": [sales_rows[0], {**sales_rows[1], "Sum": "бесплатно"}]}
+
+        sales = validate_model(SalesCollection, data, ValidationMode.LAZY)
+
+        assert isinstance(sales.items, LazyList)
+        assert sales.items.validated_count == 0
+        assert isinstance(sales.items[0], ProductSaleModel)
+        assert sales.items.validated_count == 1
+        assert sales.items[0] is sales.items[0]
+        with pytest.raises(ValidationError):
+            sales.items[1]
+
+    def test_lazy_merge_does_not_validate(self, sales_rows, sales_response):
+        """Тест что объединение ленивых коллекций не валидирует записи"""
+        first = validate_model(SalesCollection, sales_response, ValidationMode.LAZY)
+        second = validate_model(SalesCollection, {"Sales": sales_rows[:1]}, ValidationMode.LAZY)
+
+        merged = SalesCollection.merge([first, second])
+
+        assert isinstance(merged.items, LazyList)
+        assert merged.items.validated_count == 0
+        assert [sale.line for sale in merged.items] == [2, 3, 1]
+
+    def test_lazy_list_is_picklable(self, sales_response):
+        """Тест что ленивая коллекция передаётся в пул процессов"""
+        sales = validate_model(SalesCollection, sales_response, ValidationMode.LAZY)
+
+        restored = pickle.loads(pickle.dumps(sales))
+
+        assert list(restored.items) == list(sales.items)
+
+
+class TestValidationModeContext:
+    """Тесты контекстного менеджера validation_mode"""
+
+    def test_mode_is_scoped(self):
+        """Тест что режим действует только внутри блока"""
+        with validation_mode("lazy"):
+            assert current_validation_mode() is ValidationMode.LAZY
+            with validation_mode(None):
+                assert current_validation_mode() is ValidationMode.LAZY
+
+        assert current_validation_mode() is None
+
+    def test_unknown_mode(self):
+        """Тест что неизвестный режим отклоняется"""
+        with pytest.raises(KitAPIValidationError):
+            with validation_mode("fast"):
+                pass
+        with pytest.raises(KitAPIValidationError):
+            KitVendingAPIClient(validation="fast")
+
+
+class TestClientValidation:
+    """Тесты режима валидации клиента"""
+
+    @pytest.mark.asyncio
+    async def test_client_mode(self, make_client, make_session, sales_response):
+        """Тест что клиент применяет свой режим валидации"""
+        client = make_client(validation="lazy")
+        client._session = make_session(sales_response)
+
+        sales = await client.get_sales(
+            1, datetime(2024, 1, 15, tzinfo=MOSCOW), datetime(2024, 1, 16, tzinfo=MOSCOW)
+        )
+
+        assert isinstance(sales.items, LazyList)
+        assert len(sales.get_product_sales()) == 1
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_per_call_mode(self, make_client, make_session, sales_response):
+        """Тест что режим вызова переопределяет режим клиента"""
+        client = make_client()
+        client._session = make_session(sales_response, sales_response)
+        from_date = datetime(2024, 1, 15, tzinfo=MOSCOW)
+        to_date = datetime(2024, 1, 16, tzinfo=MOSCOW)
+
+        lazy = await client.get_sales(1, from_date, to_date, validation=ValidationMode.LAZY)
+        strict = await client.get_sales(1, from_date, to_date)
+
+        assert isinstance(lazy.items, LazyList)
+        assert isinstance(strict.items, list)
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_cache_is_separate_per_mode(self, make_client, make_session):
+        """Тест что кэш не отдаёт ленивую коллекцию вызову в режиме STRICT"""
+        goods = {"ResultCode": 0, "Goods": [{"GoodsId": 1, "GoodsName": "Вода"}]}
+        client = make_client(cache=ReferenceCache(ttl=60))
+        client._session = make_session(goods, goods)
+
+        lazy = await client.get_products(validation="lazy")
+        strict = await client.get_products()
+        cached = await client.get_products()
+
+        assert isinstance(lazy.items, LazyList)
+        assert isinstance(strict.items, list)
+        assert cached is strict
+        assert client._session.post.call_count == 2
+        await client.close()